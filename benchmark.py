@@ -0,0 +1,313 @@
+# benchmark.py
+
+import argparse
+import importlib
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from orchestrator import USER_AGENT, get_logger
+from scrapers.common.log_pipeline import close_logger
+from scrapers.common.product_writer import count_records
+from scrapers.common.replay import RECORDINGS_ROOT, Recording, ReplayServer
+from scrapers.common.scrape_run import ScrapeOptions
+
+PROJECT_ROOT = os.path.abspath(os.path.dirname(__file__))
+RESULTS_FILEPATH = os.path.join(PROJECT_ROOT, "benchmarks", "resultados.jsonl")
+# Grabación de muestra incluida en el repositorio (`--muestra`): tres categorías de Jumbo (API de catálogo de VTEX)
+# armadas con los productos de `raw_data/jumbo/jumbo_products.json`, para medir sin grabar antes.
+SAMPLE_RECORDINGS_ROOT = os.path.join(PROJECT_ROOT, "benchmarks", "muestra")
+
+USAGE_NOTES = """
+Grabaciones: cada tienda se mide contra su grabación en benchmarks/grabaciones/<tienda>/ (no se versiona).
+Para crearla, ejecute primero el scraper de la tienda (para tener su catálogo de enlaces) y luego, con internet:
+
+    python benchmark.py --tienda jumbo --record --categorias 5
+
+Las siguientes corridas (sin --record) reproducen la grabación sin salir a internet. Para una prueba rápida sin
+grabar, --muestra usa la grabación de benchmarks/muestra/ incluida en el repositorio (solo Jumbo).
+Solo se miden los motores sin navegador (http en Jumbo y Carulla, async en Zapatoca).
+"""
+
+# Tiendas medidas: motor de la Fase 2 sin navegador, clave de la URL en sus enlaces y archivos (relativos a la
+# raíz del proyecto) del catálogo de enlaces, del archivo de enlaces anterior y de los productos.
+STORES = {
+    "jumbo": {
+        "module": "scrapers.jumbo.scraper_jumbo",
+        "function": "scrape_jumbo",
+        "engine": "http",
+        "url_key": "url",
+        "catalog": os.path.join("raw_data", "jumbo", "jumbo_link_catalog.json"),
+        "legacy_links": os.path.join("raw_data", "jumbo", "jumbo_links.json"),
+        "products": os.path.join("raw_data", "jumbo", "productos_jumbo.jsonl"),
+    },
+    "carulla": {
+        "module": "scrapers.carulla.scraper_carulla",
+        "function": "scrape_carulla",
+        "engine": "http",
+        "url_key": "href",
+        "catalog": os.path.join("raw_data", "carulla", "carulla_link_catalog.json"),
+        "legacy_links": None,
+        "products": os.path.join("raw_data", "carulla", "productos_carulla.jsonl"),
+    },
+    "zapatoca": {
+        "module": "scrapers.zapatoca.scraper_zapatoca",
+        "function": "scrape_zapatoca",
+        "engine": "async",
+        "url_key": "url",
+        "catalog": os.path.join("raw_data", "zapatoca", "zapatoca_link_catalog.json"),
+        "legacy_links": os.path.join("raw_data", "zapatoca", "zapatoca_links.json"),
+        "products": os.path.join("raw_data", "zapatoca", "productos_zapatoca.jsonl"),
+    },
+}
+
+def _peak_rss_mb():
+    """Memoria residente máxima de este proceso y de sus hijos ya terminados (MB), o None si no se puede medir."""
+    try:
+        import resource
+    except ImportError:
+        return None, None
+    # En macOS `ru_maxrss` está en bytes; en Linux, en kilobytes.
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale,
+            resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale)
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def load_live_links(tienda):
+    """Enlaces del catálogo real de una tienda (o de su archivo de enlaces anterior), para grabarla."""
+    config = STORES[tienda]
+    catalog_path = os.path.join(PROJECT_ROOT, config["catalog"])
+    if os.path.exists(catalog_path):
+        with open(catalog_path, 'r', encoding='utf-8') as f:
+            return json.load(f).get("enlaces", [])
+    legacy_path = config["legacy_links"] and os.path.join(PROJECT_ROOT, config["legacy_links"])
+    if legacy_path and os.path.exists(legacy_path):
+        with open(legacy_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        module = importlib.import_module(config["module"])
+        return module.flatten_links(data) if hasattr(module, "flatten_links") else data
+    return []
+
+def _redirect_store(module, address, workdir):
+    """Apunta el módulo del scraper al servidor de reproducción y sus archivos de salida absolutos a `workdir`."""
+    raw_data = os.path.join(PROJECT_ROOT, "raw_data")
+    for name, value in list(vars(module).items()):
+        if isinstance(value, str) and value.startswith(raw_data):
+            setattr(module, name, os.path.join(workdir, os.path.relpath(value, PROJECT_ROOT)))
+    module.BASE_URL = address + ("/" if module.BASE_URL.endswith("/") else "")
+
+def _run_store(tienda, address, links, scraper_options, workdir, conn):
+    """Proceso hijo: ejecuta el scraper de una tienda contra el servidor y envía sus tiempos al padre."""
+    logger = None
+    try:
+        config = STORES[tienda]
+        logger = get_logger(f"benchmark-{tienda}", os.path.join(PROJECT_ROOT, "logs", f"benchmark_{tienda}.log"), store=tienda)
+        module = importlib.import_module(config["module"])
+        _redirect_store(module, address, workdir)
+        os.chdir(workdir)
+
+        # El catálogo de enlaces grabado reemplaza al recorrido del menú (Fase 1).
+        catalog_path = os.path.join(workdir, config["catalog"])
+        os.makedirs(os.path.dirname(catalog_path), exist_ok=True)
+        with open(catalog_path, 'w', encoding='utf-8') as f:
+            json.dump({"tienda": tienda, "actualizado": time.time(), "enlaces": links}, f, ensure_ascii=False)
+
+        marks = {}
+        run_phase2 = module.run_phase2
+
+        def timed_phase2(*args, **kwargs):
+            marks["fase2_inicio"] = time.perf_counter()
+            try:
+                return run_phase2(*args, **kwargs)
+            finally:
+                marks["fase2_fin"] = time.perf_counter()
+
+        module.run_phase2 = timed_phase2
+        start = time.perf_counter()
+        options = ScrapeOptions(engine=config["engine"], **scraper_options)
+        getattr(module, config["function"])(user_agent=USER_AGENT, logger=logger, options=options)
+        end = time.perf_counter()
+
+        products_path = os.path.join(workdir, config["products"])
+        rss, children_rss = _peak_rss_mb()
+        phase2_start = marks.get("fase2_inicio", end)
+        phase2_end = marks.get("fase2_fin", end)
+        conn.send({
+            "exito": True,
+            "duracion": end - start,
+            "fase2": phase2_end - phase2_start,
+            "fases": {
+                "fase1_enlaces": round(phase2_start - start, 3),
+                "fase2_productos": round(phase2_end - phase2_start, 3),
+                "exportacion": round(end - phase2_end, 3),
+            },
+            "productos": count_records(products_path) if os.path.exists(products_path) else 0,
+            "rss_max_mb": rss,
+            "rss_max_hijos_mb": children_rss,
+        })
+    except Exception as e:
+        conn.send({"exito": False, "error": str(e)})
+    finally:
+        conn.close()
+        if logger:
+            close_logger(logger)
+
+def run_benchmark(tienda, scraper_options, logger, record=False, latency=0.0, categories=None, recordings_root=RECORDINGS_ROOT):
+    """
+    Ejecuta el scraper de una tienda contra su grabación servida localmente y retorna el resultado de la medición.
+    Con `record=True` las páginas que faltan se descargan del sitio real y se agregan a la grabación.
+    """
+    config = STORES[tienda]
+    module = importlib.import_module(config["module"])
+    recording = Recording(tienda, recordings_root)
+    if not os.path.exists(recording.links_path):
+        if not record:
+            logger.warning(f"No hay grabación para {tienda} en '{recording.directory}'. Use --record para crearla "
+                           f"(ver --help).")
+            return None
+        links = load_live_links(tienda)[:categories]
+        if not links:
+            logger.error(f"No hay un catálogo de enlaces de {tienda} con qué grabar; ejecute antes su scraper.")
+            return None
+        for link in links:
+            url = urlsplit(link[config["url_key"]])
+            link[config["url_key"]] = url.path + (f"?{url.query}" if url.query else "")
+        recording.save_links(links)
+    links = recording.load_links()[:categories]
+
+    server = ReplayServer(recording, module.BASE_URL, logger, record=record, latency=latency).start()
+    for link in links:
+        link[config["url_key"]] = server.local_url(link[config["url_key"]])
+    logger.info(f"--- Benchmark de {tienda}: {len(links)} enlaces servidos desde {server.address} ---")
+    measurement = None
+    try:
+        with tempfile.TemporaryDirectory(prefix=f"benchmark_{tienda}_") as workdir:
+            # Cada tienda corre en su propio proceso para medir su memoria máxima por separado.
+            parent_conn, child_conn = multiprocessing.Pipe(duplex=False)
+            process = multiprocessing.Process(target=_run_store, args=(tienda, server.address, links, scraper_options, workdir, child_conn),
+                                              name=f"benchmark-{tienda}")
+            process.start()
+            child_conn.close()
+            try:
+                measurement = parent_conn.recv()
+            except EOFError:
+                pass
+            finally:
+                parent_conn.close()
+                process.join()
+    finally:
+        server.close()
+
+    if not measurement or not measurement["exito"]:
+        error = measurement["error"] if measurement else f"el proceso terminó inesperadamente (código {process.exitcode})"
+        logger.error(f"Falló el benchmark de {tienda}: {error}")
+        return None
+
+    phase2 = measurement["fase2"] or float("nan")
+    result = {
+        "fecha": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": _git_commit(),
+        "tienda": tienda,
+        "motor": config["engine"],
+        "grabacion": os.path.relpath(recordings_root, PROJECT_ROOT),
+        "enlaces": len(links),
+        "latencia_ms": round(latency * 1000),
+        "opciones": scraper_options,
+        "paginas": server.requests_served,
+        "paginas_no_grabadas": server.misses,
+        "productos": measurement["productos"],
+        "duracion": round(measurement["duracion"], 3),
+        "paginas_por_segundo": round(server.requests_served / phase2, 2),
+        "productos_por_segundo": round(measurement["productos"] / phase2, 2),
+        "rss_max_mb": measurement["rss_max_mb"] and round(measurement["rss_max_mb"], 1),
+        "rss_max_hijos_mb": measurement["rss_max_hijos_mb"] and round(measurement["rss_max_hijos_mb"], 1),
+        "fases": measurement["fases"],
+    }
+    if server.misses and not record:
+        logger.warning(f"{server.misses} peticiones de {tienda} no estaban en la grabación (respondieron 404).")
+    return result
+
+def previous_result(result, results_path=RESULTS_FILEPATH):
+    """Última medición guardada comparable con `result` (misma tienda, motor, grabación, enlaces, latencia y opciones)."""
+    if not os.path.exists(results_path):
+        return None
+    keys = ("tienda", "motor", "grabacion", "enlaces", "latencia_ms", "opciones")
+    previous = None
+    with open(results_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                row = json.loads(line)
+                if all(row.get(key) == result[key] for key in keys):
+                    previous = row
+    return previous
+
+def log_result(result, previous, logger):
+    logger.info(
+        f"  {result['tienda']:<10} {result['paginas']:>6} páginas  {result['productos']:>7} productos  "
+        f"{result['paginas_por_segundo']:>8.2f} pág/s  {result['productos_por_segundo']:>9.2f} prod/s  "
+        f"RSS máx {result['rss_max_mb']} MB (hijos {result['rss_max_hijos_mb']} MB)  fases {result['fases']}"
+    )
+    if previous:
+        change = (result["productos_por_segundo"] - previous["productos_por_segundo"]) / previous["productos_por_segundo"] * 100
+        logger.info(f"  {'':<10} frente a {previous['fecha']} ({previous.get('commit')}): "
+                    f"{previous['productos_por_segundo']:.2f} prod/s -> {result['productos_por_segundo']:.2f} prod/s ({change:+.1f} %)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de los scrapers contra grabaciones servidas localmente (sin internet).",
+                                     epilog=USAGE_NOTES, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tienda', choices=STORES.keys(), action='append', help='Tienda a medir (repetible; por defecto todas).')
+    parser.add_argument('--record', action='store_true',
+                        help='Graba las páginas que falten pidiéndolas al sitio real (requiere internet y el catálogo de enlaces).')
+    parser.add_argument('--muestra', action='store_true',
+                        help=f"Usa la grabación de muestra de '{os.path.relpath(SAMPLE_RECORDINGS_ROOT, PROJECT_ROOT)}' (solo Jumbo).")
+    parser.add_argument('--categorias', type=int, default=None, metavar='N', help='Usa solo los primeros N enlaces de cada tienda.')
+    parser.add_argument('--latencia', type=float, default=0.0, metavar='MS', help='Latencia simulada por respuesta, en milisegundos.')
+    parser.add_argument('--workers', type=int, default=1, metavar='N', help='Conexiones simultáneas de la Fase 2 (por defecto 1).')
+    parser.add_argument('--parse-workers', type=int, default=1, metavar='N', help='Procesos de parseo de la Fase 2 (por defecto 1).')
+    parser.add_argument('--no-save', action='store_true', help=f"No guarda el resultado en '{os.path.relpath(RESULTS_FILEPATH, PROJECT_ROOT)}'.")
+    args = parser.parse_args()
+    if args.muestra and args.record:
+        parser.error("--muestra no se puede combinar con --record.")
+
+    logger = get_logger('Benchmark', os.path.join(PROJECT_ROOT, 'logs', 'benchmark.log'))
+    # Las etapas que dependen de datos de ejecuciones anteriores se desactivan para que todas las corridas sean iguales.
+    scraper_options = {
+        "workers": args.workers,
+        "parse_workers": args.parse_workers,
+        "links_ttl_hours": 24 * 365,
+        "history": False,
+        "events": False,
+    }
+    results = []
+    recordings_root = SAMPLE_RECORDINGS_ROOT if args.muestra else RECORDINGS_ROOT
+    tiendas = args.tienda or ([tienda for tienda in STORES if os.path.isdir(os.path.join(recordings_root, tienda))]
+                              if args.muestra else list(STORES))
+    for tienda in tiendas:
+        result = run_benchmark(tienda, scraper_options, logger, record=args.record, latency=args.latencia / 1000,
+                               categories=args.categorias, recordings_root=recordings_root)
+        if result:
+            results.append((result, previous_result(result)))
+            if not args.no_save:
+                os.makedirs(os.path.dirname(RESULTS_FILEPATH), exist_ok=True)
+                with open(RESULTS_FILEPATH, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(result, ensure_ascii=False) + "\n")
+
+    logger.info("===== RESULTADOS DEL BENCHMARK =====")
+    for result, previous in results:
+        log_result(result, previous, logger)
+
+if __name__ == '__main__':
+    main()
@@ -2,9 +2,11 @@
 
 import argparse
 import logging
+import multiprocessing
 import sys
 import os
 import time
+from multiprocessing.connection import wait
 
 # --- AJUSTE CRUCIAL DE RUTA ---
 # Añade el directorio raíz del proyecto al path de Python.
@@ -12,19 +14,24 @@ sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
 # --- FIN DEL AJUSTE ---
 
 # --- IMPORTACIÓN DE LOS SCRAPERS ---
-from scrapers.carulla.scraper_carulla import scrape_carulla
-from scrapers.jumbo.scraper_jumbo import scrape_jumbo
-from scrapers.zapatoca.scraper_zapatoca import scrape_zapatoca
+from scrapers.carulla.scraper_carulla import scrape_carulla, ENGINES as CARULLA_ENGINES
+from scrapers.jumbo.scraper_jumbo import scrape_jumbo, ENGINES as JUMBO_ENGINES
+from scrapers.zapatoca.scraper_zapatoca import scrape_zapatoca, ENGINES as ZAPATOCA_ENGINES
 #from scrapers.exito.scraper_exito import scrape_exito
+from scrapers.common import metrics
+from scrapers.common.log_pipeline import JsonFormatter, close_logger, start_queue_logging
+from scrapers.common.scrape_run import ScrapeOptions
 
 
 # User-Agent centralizado para todos los scrapers.
 USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36"
 
-def get_logger(name, log_file, level=logging.INFO):
+def get_logger(name, log_file, level=logging.INFO, store=None, sampling=None):
     """
-    Crea y configura un logger para escribir en un archivo y en la consola.
-    Garantiza que el logger no tenga handlers duplicados.
+    Crea y configura un logger para escribir en un archivo (una línea JSON por registro, ver `JsonFormatter`)
+    y en la consola. La escritura ocurre en un hilo de fondo (ver `start_queue_logging`): registrar solo encola.
+    `store` es el campo `tienda` de los registros (por defecto, `name`) y `sampling` ({nivel: n}) muestrea los
+    mensajes por página. Garantiza que el logger no tenga handlers duplicados; `close_logger` lo cierra.
     """
     # Asegurarse de que el directorio de logs exista
     log_dir = os.path.dirname(log_file)
@@ -36,17 +43,21 @@ def get_logger(name, log_file, level=logging.INFO):
     logger = logging.getLogger(name)
     logger.setLevel(level)
 
+    # Los registros no se propagan al logger raíz: un handler síncrono allí (p. ej. de `logging.basicConfig`)
+    # volvería a formatearlos y escribirlos en el hilo que registra.
+    logger.propagate = False
+
     # Prevenir handlers duplicados si el script se llama múltiples veces
     if not logger.handlers:
         # Handler para el archivo (modo 'w' para limpiar en cada ejecución)
         file_handler = logging.FileHandler(log_file, mode='w', encoding='utf-8')
-        file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+        file_handler.setFormatter(JsonFormatter())
 
         # Handler para la consola
         stream_handler = logging.StreamHandler()
         stream_handler.setFormatter(formatter)
-        logger.addHandler(stream_handler)
+
+        start_queue_logging(logger, [file_handler, stream_handler], store=store, sampling=sampling)
 
     return logger
 
@@ -58,6 +69,141 @@ SCRAPERS = {
     #"exito": scrape_exito
 }
 
+# Motores de Fase 2 disponibles por tienda. El primero es el predeterminado.
+ENGINES = {
+    "carulla": CARULLA_ENGINES,
+    "jumbo": JUMBO_ENGINES,
+    "zapatoca": ZAPATOCA_ENGINES
+}
+
+def parse_engine(value):
+    """Valida un argumento `--engine` con formato `tienda=motor` y lo retorna como tupla."""
+    tienda, _, motor = value.partition('=')
+    if tienda not in ENGINES:
+        raise argparse.ArgumentTypeError(f"Tienda desconocida '{tienda}'. Opciones: {', '.join(ENGINES)}.")
+    if motor not in ENGINES[tienda]:
+        raise argparse.ArgumentTypeError(f"Motor '{motor}' no disponible para {tienda}. Opciones: {', '.join(ENGINES[tienda])}.")
+    return tienda, motor
+
+def parse_sampling(value):
+    """Valida un argumento `--log-sampling` con formato `NIVEL=N` y lo retorna como tupla `(nivel, n)`."""
+    nombre, _, tasa = value.partition('=')
+    nivel = logging.getLevelName(nombre.upper())
+    if not isinstance(nivel, int):
+        raise argparse.ArgumentTypeError(f"Nivel de log desconocido '{nombre}'. Opciones: DEBUG, INFO, WARNING.")
+    if not tasa.isdigit() or int(tasa) < 1:
+        raise argparse.ArgumentTypeError(f"La tasa de muestreo de {nombre} debe ser un entero mayor o igual a 1.")
+    return nivel, int(tasa)
+
+def run_scraper(tienda, scraper_options=None):
+    """
+    Ejecuta el scraper de una tienda con su propio logger y mide su duración.
+    `scraper_options` son las opciones de la ejecución (los argumentos de `ScrapeOptions`, p. ej. `workers`).
+    La clave especial `engines` ({tienda: motor}) se traduce al argumento `engine` de la tienda correspondiente,
+    y `log_sampling` ({nivel: n}) es el muestreo de los mensajes por página del logger de la tienda.
+    Las métricas de la ejecución (ver `scrapers.common.metrics`) se guardan en `logs/metricas/` al terminar.
+    Retorna un diccionario con el resultado para el resumen del orquestador.
+    """
+    options = dict(scraper_options or {})
+    tienda_logger = get_logger(tienda, f'logs/{tienda}.log', sampling=options.pop("log_sampling", None))
+    engine = options.pop("engines", {}).get(tienda)
+    if engine:
+        options["engine"] = engine
+    start_time = time.time()
+    metrics.start_run(tienda)
+    try:
+        SCRAPERS[tienda](user_agent=USER_AGENT, logger=tienda_logger, options=ScrapeOptions(**options))
+        return {"tienda": tienda, "exito": True, "duracion": time.time() - start_time, "error": None}
+    except Exception as e:
+        tienda_logger.error(f"Falló el scraper para {tienda}: {e}", exc_info=True)
+        return {"tienda": tienda, "exito": False, "duracion": time.time() - start_time, "error": str(e)}
+    finally:
+        try:
+            metrics.finish_run(tienda_logger)
+        except Exception as e:
+            tienda_logger.error(f"No se pudieron guardar las métricas de {tienda}: {e}", exc_info=True)
+        close_logger(tienda_logger)
+
+def run_matching(orchestrator_logger):
+    """Genera la tabla de productos canónicos a partir de los productos de la última ejecución de cada tienda."""
+    try:
+        from scrapers.common.matching import build_canonical_table
+        build_canonical_table(orchestrator_logger)
+    except Exception as e:
+        orchestrator_logger.error(f"Falló el emparejamiento de productos entre tiendas: {e}", exc_info=True)
+
+def start_query_service(port, orchestrator_logger):
+    """Inicia el servicio local de consulta de precios en `port`. Retorna el servicio o None si no se pudo iniciar."""
+    try:
+        from scrapers.common.query_service import QueryService
+        return QueryService(orchestrator_logger, port=port).start()
+    except Exception as e:
+        orchestrator_logger.error(f"No se pudo iniciar el servicio de consulta en el puerto {port}: {e}", exc_info=True)
+        return None
+
+def _worker_process(tienda, scraper_options, conn):
+    """Punto de entrada de cada proceso hijo: ejecuta el scraper y envía el resultado al padre."""
+    try:
+        conn.send(run_scraper(tienda, scraper_options))
+    finally:
+        conn.close()
+
+def run_parallel(tiendas, max_workers, scraper_options, orchestrator_logger):
+    """
+    Ejecuta cada tienda en su propio proceso, con un máximo de `max_workers` procesos simultáneos.
+    Un proceso que muere (p. ej. por un crash de Chrome) solo afecta a su tienda.
+    """
+    pendientes = list(tiendas)
+    en_ejecucion = {}  # sentinel -> (proceso, tienda, conexión, inicio)
+    resultados = []
+
+    while pendientes or en_ejecucion:
+        while pendientes and len(en_ejecucion) < max_workers:
+            tienda = pendientes.pop(0)
+            parent_conn, child_conn = multiprocessing.Pipe(duplex=False)
+            proceso = multiprocessing.Process(target=_worker_process, args=(tienda, scraper_options, child_conn), name=f"scraper-{tienda}")
+            proceso.start()
+            child_conn.close()
+            en_ejecucion[proceso.sentinel] = (proceso, tienda, parent_conn, time.time())
+            orchestrator_logger.info(f"--- Iniciando scraper para {tienda} (PID {proceso.pid}) ---")
+
+        for sentinel in wait(list(en_ejecucion.keys())):
+            proceso, tienda, conn, start_time = en_ejecucion.pop(sentinel)
+            proceso.join()
+            resultado = None
+            try:
+                if conn.poll():
+                    resultado = conn.recv()
+            except (EOFError, OSError):
+                resultado = None
+            finally:
+                conn.close()
+
+            if resultado is None:
+                resultado = {
+                    "tienda": tienda,
+                    "exito": False,
+                    "duracion": time.time() - start_time,
+                    "error": f"El proceso terminó inesperadamente (código de salida {proceso.exitcode}).",
+                }
+            if resultado["exito"]:
+                orchestrator_logger.info(f"--- Scraper para {tienda} finalizado con éxito ---")
+            else:
+                orchestrator_logger.error(f"--- Falló el scraper para {tienda}: {resultado['error']} ---")
+            orchestrator_logger.info(f"--- Tiempo de ejecución para {tienda}: {resultado['duracion']:.2f} segundos. ---")
+            resultados.append(resultado)
+
+    return resultados
+
+def log_summary(resultados, total_duration, orchestrator_logger):
+    """Escribe el resumen combinado de todas las tiendas ejecutadas."""
+    orchestrator_logger.info("===== RESUMEN DE EJECUCIÓN =====")
+    for resultado in sorted(resultados, key=lambda r: r["duracion"], reverse=True):
+        estado = "OK" if resultado["exito"] else f"FALLÓ ({resultado['error']})"
+        orchestrator_logger.info(f"  {resultado['tienda']:<12} {resultado['duracion']:>10.2f} s  {estado}")
+    suma = sum(r["duracion"] for r in resultados)
+    orchestrator_logger.info(f"  Suma de tiempos por tienda: {suma:.2f} s | Tiempo real transcurrido: {total_duration:.2f} s")
+
 def main():
     """
     Función principal que lee los argumentos, configura los loggers y ejecuta
@@ -71,45 +217,232 @@ def main():
         help='Ejecuta el scraper de una tienda específica.', 
         choices=SCRAPERS.keys()
     )
+    parser.add_argument(
+        '--parallel',
+        type=int,
+        default=1,
+        metavar='N',
+        help='Ejecuta hasta N tiendas a la vez, cada una en su propio proceso (por defecto 1: secuencial).'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        metavar='N',
+        help='Número de navegadores que procesan en paralelo los enlaces de la Fase 2 de cada tienda (por defecto 1).'
+    )
+    parser.add_argument(
+        '--parse-workers',
+        type=int,
+        default=1,
+        metavar='N',
+        help='Procesos que parsean el HTML de la Fase 2 de cada tienda mientras los navegadores siguen navegando '
+             '(por defecto 1; 0 parsea en el hilo que escribe los productos).'
+    )
+    parser.add_argument(
+        '--full-browser',
+        action='store_true',
+        help='Usa en la Fase 2 un Chrome visible y completo en lugar del perfil liviano '
+             '(headless, sin imágenes, fuentes ni analítica).'
+    )
+    parser.add_argument(
+        '--warm-browsers',
+        type=int,
+        default=1,
+        metavar='N',
+        help='Navegadores precalentados que cada tienda mantiene listos en la Fase 2, además de los --workers en uso '
+             '(por defecto 1; 0 los desactiva).'
+    )
+    parser.add_argument(
+        '--links-ttl',
+        type=float,
+        default=None,
+        metavar='HORAS',
+        help='Antigüedad máxima del catálogo de enlaces antes de volver a recorrer el menú '
+             '(por defecto, la de cada tienda; 0 fuerza la actualización).'
+    )
+    parser.add_argument(
+        '--pages-per-driver',
+        type=int,
+        default=50,
+        metavar='N',
+        help='Recicla cada navegador del pool tras cargar N páginas (por defecto 50).'
+    )
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help='Continúa la ejecución anterior usando la bitácora de la Fase 2: omite categorías y páginas ya guardadas.'
+    )
+    parser.add_argument(
+        '--delta',
+        action='store_true',
+        help='Modo de cambios: si la primera página de una categoría no cambió desde la ejecución anterior, '
+             'no se recorren sus demás páginas y sus productos se copian de la ejecución anterior.'
+    )
+    parser.add_argument(
+        '--no-http-cache',
+        action='store_true',
+        help='Desactiva el caché de respuestas de los motores sin navegador (http, async), que revalida cada página '
+             'con ETag / Last-Modified y lee del disco las que no cambiaron (raw_data/<tienda>/cache_http/).'
+    )
+    parser.add_argument(
+        '--no-history',
+        action='store_true',
+        help='No guarda los precios de la ejecución en el historial SQLite (raw_data/historial_precios.sqlite3).'
+    )
+    parser.add_argument(
+        '--no-events',
+        action='store_true',
+        help='No genera los eventos de cambio de precio, productos nuevos y retirados frente a la ejecución anterior '
+             '(raw_data/<tienda>/productos_<tienda>_eventos.jsonl).'
+    )
+    parser.add_argument(
+        '--no-unit-prices',
+        action='store_true',
+        help='No agrega a las exportaciones las columnas cantidad, unidad y precio_por_unidad (requieren numpy).'
+    )
+    parser.add_argument(
+        '--parquet',
+        action='store_true',
+        help='Exporta además los productos a Parquet (requiere pyarrow), particionados por tienda y fecha '
+             'en raw_data/parquet/tienda=<tienda>/fecha=<AAAA-MM-DD>/.'
+    )
+    parser.add_argument(
+        '--images',
+        action='store_true',
+        help='Descarga las imágenes de los productos que aún no están en el caché (raw_data/imagenes/, requiere aiohttp) '
+             'y escribe un manifiesto por tienda que asocia cada producto con su archivo local.'
+    )
+    parser.add_argument(
+        '--match',
+        action='store_true',
+        help='Al terminar, empareja los productos de todas las tiendas y genera la tabla de productos canónicos '
+             '(raw_data/productos_canonicos.jsonl; requiere numpy).'
+    )
+    parser.add_argument(
+        '--serve',
+        type=int,
+        default=None,
+        metavar='PUERTO',
+        help='Inicia un servicio HTTP local de consulta de precios (GET /buscar?q=...) sobre el último catálogo de cada '
+             'tienda; se recarga solo cuando termina un scraper. El orquestador sigue activo hasta Ctrl+C.'
+    )
+    parser.add_argument(
+        '--no-scrape',
+        action='store_true',
+        help='No ejecuta los scrapers (útil con --serve o --match sobre los datos de la última ejecución).'
+    )
+    parser.add_argument(
+        '--log-sampling',
+        type=parse_sampling,
+        action='append',
+        default=[],
+        metavar='NIVEL=N',
+        help='Registra solo uno de cada N mensajes por página de ese nivel en los logs de las tiendas, '
+             'p. ej. INFO=10 (repetible). Los demás mensajes no se muestrean.'
+    )
+    parser.add_argument(
+        '--engine',
+        type=parse_engine,
+        action='append',
+        default=[],
+        metavar='TIENDA=MOTOR',
+        help='Motor de la Fase 2 para una tienda, p. ej. jumbo=http (repetible). '
+             + '; '.join(f"{tienda}: {', '.join(motores)}" for tienda, motores in ENGINES.items())
+    )
     
     args = parser.parse_args()
+    if args.parallel < 1:
+        parser.error("--parallel debe ser un entero mayor o igual a 1.")
+    if args.workers < 1:
+        parser.error("--workers debe ser un entero mayor o igual a 1.")
+    if args.parse_workers < 0:
+        parser.error("--parse-workers debe ser un entero mayor o igual a 0.")
+    if args.warm_browsers < 0:
+        parser.error("--warm-browsers debe ser un entero mayor o igual a 0.")
+    if args.links_ttl is not None and args.links_ttl < 0:
+        parser.error("--links-ttl debe ser un número mayor o igual a 0.")
+    if args.pages_per_driver < 1:
+        parser.error("--pages-per-driver debe ser un entero mayor o igual a 1.")
+    if args.serve is not None and not 0 <= args.serve <= 65535:
+        parser.error("--serve debe ser un puerto entre 0 y 65535.")
+
+    scraper_options = {
+        "workers": args.workers,
+        "parse_workers": args.parse_workers,
+        "lightweight": not args.full_browser,
+        "warm_browsers": args.warm_browsers,
+        "links_ttl_hours": args.links_ttl,
+        "max_pages_per_driver": args.pages_per_driver,
+        "resume": args.resume,
+        "delta": args.delta,
+        "parquet": args.parquet,
+        "history": not args.no_history,
+        "unit_prices": not args.no_unit_prices,
+        "events": not args.no_events,
+        "images": args.images,
+        "http_cache": not args.no_http_cache,
+        "engines": dict(args.engine),
+        "log_sampling": dict(args.log_sampling),
+    }
     
     # Logger principal para el orquestador
     orchestrator_logger = get_logger('Orchestrator', 'logs/orchestrator.log')
+    try:
+        service = start_query_service(args.serve, orchestrator_logger) if args.serve is not None else None
 
-    if args.tienda:
-        orchestrator_logger.info(f"Ejecución solicitada para una sola tienda: {args.tienda}")
-        scraper_func = SCRAPERS.get(args.tienda)
-        if scraper_func:
-            tienda_logger = get_logger(args.tienda, f'logs/{args.tienda}.log')
+        if args.no_scrape:
+            orchestrator_logger.info("Se omite la ejecución de los scrapers (--no-scrape).")
+        elif args.tienda:
+            orchestrator_logger.info(f"Ejecución solicitada para una sola tienda: {args.tienda}")
             orchestrator_logger.info(f"Iniciando scraper para la tienda: {args.tienda}")
-            start_time = time.time()
-            try:
-                scraper_func(user_agent=USER_AGENT, logger=tienda_logger)
+            resultado = run_scraper(args.tienda, scraper_options)
+            if resultado["exito"]:
                 orchestrator_logger.info(f"Scraper para {args.tienda} finalizado con éxito.")
-            except Exception as e:
-                orchestrator_logger.error(f"Falló el scraper para {args.tienda}: {e}", exc_info=True)
-            finally:
-                duration = time.time() - start_time
-                orchestrator_logger.info(f"Tiempo de ejecución para {args.tienda}: {duration:.2f} segundos.")
-    else:
-        orchestrator_logger.info("Ejecutando todos los scrapers disponibles.")
-        total_start_time = time.time()
-        for tienda, scraper_func in SCRAPERS.items():
-            tienda_logger = get_logger(tienda, f'logs/{tienda}.log')
-            orchestrator_logger.info(f"--- Iniciando scraper para {tienda} ---")
-            start_time = time.time()
+            else:
+                orchestrator_logger.error(f"Falló el scraper para {args.tienda}: {resultado['error']}")
+            orchestrator_logger.info(f"Tiempo de ejecución para {args.tienda}: {resultado['duracion']:.2f} segundos.")
+        elif args.parallel > 1:
+            orchestrator_logger.info(f"Ejecutando todos los scrapers disponibles en paralelo (máximo {args.parallel} procesos).")
+            total_start_time = time.time()
+            resultados = run_parallel(list(SCRAPERS.keys()), args.parallel, scraper_options, orchestrator_logger)
+            total_duration = time.time() - total_start_time
+            log_summary(resultados, total_duration, orchestrator_logger)
+            orchestrator_logger.info(f"\nProceso de orquestación completado. Tiempo total: {total_duration:.2f} segundos.")
+        else:
+            orchestrator_logger.info("Ejecutando todos los scrapers disponibles.")
+            total_start_time = time.time()
+            resultados = []
+            for tienda in SCRAPERS:
+                orchestrator_logger.info(f"--- Iniciando scraper para {tienda} ---")
+                resultado = run_scraper(tienda, scraper_options)
+                if resultado["exito"]:
+                    orchestrator_logger.info(f"--- Scraper para {tienda} finalizado con éxito ---")
+                else:
+                    orchestrator_logger.error(f"--- Falló el scraper para {tienda}: {resultado['error']} ---")
+                orchestrator_logger.info(f"--- Tiempo de ejecución para {tienda}: {resultado['duracion']:.2f} segundos. ---")
+                resultados.append(resultado)
+        
+            total_duration = time.time() - total_start_time
+            log_summary(resultados, total_duration, orchestrator_logger)
+            orchestrator_logger.info(f"\nProceso de orquestación completado. Tiempo total: {total_duration:.2f} segundos.")
+
+        if args.match:
+            run_matching(orchestrator_logger)
+
+        if service:
+            service.reload()
+            orchestrator_logger.info(f"Servicio de consulta activo en {service.address}. Presione Ctrl+C para terminar.")
             try:
-                scraper_func(user_agent=USER_AGENT, logger=tienda_logger)
-                orchestrator_logger.info(f"--- Scraper para {tienda} finalizado con éxito ---")
-            except Exception as e:
-                orchestrator_logger.error(f"--- Falló el scraper para {tienda}: {e} ---", exc_info=True)
+                while True:
+                    time.sleep(3600)
+            except KeyboardInterrupt:
+                orchestrator_logger.info("Deteniendo el servicio de consulta.")
             finally:
-                duration = time.time() - start_time
-                orchestrator_logger.info(f"--- Tiempo de ejecución para {tienda}: {duration:.2f} segundos. ---")
-        
-        total_duration = time.time() - total_start_time
-        orchestrator_logger.info(f"\nProceso de orquestación completado. Tiempo total: {total_duration:.2f} segundos.")
+                service.close()
+    finally:
+        # Escribe los registros pendientes antes de que termine el proceso.
+        close_logger(orchestrator_logger)
 
 if __name__ == '__main__':
     main()
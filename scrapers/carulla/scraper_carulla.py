@@ -1,54 +1,84 @@
-import json
 import os
+import sys
+from functools import partial
 import time
 import gc
 from selenium import webdriver
-from selenium.webdriver.chrome.service import Service as ChromeService
-from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
-from bs4 import BeautifulSoup
 
-def setup_driver(user_agent, logger):
-    """Configura e inicializa el WebDriver de Selenium."""
+# Permite importar los módulos compartidos también al ejecutar este archivo directamente.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from scrapers.common.browser_profile import ScrapeProfile
+from scrapers.common.driver_factory import new_chrome
+from scrapers.common.driver_pool import DriverPool
+from scrapers.common.html_parser import parse_listing
+from scrapers.common.http_cache import ResponseCache
+from scrapers.common.link_catalog import LinkCatalog
+from scrapers.common.phase2 import run_phase2
+from scrapers.common.product_record import ProductRecord
+from scrapers.common.readiness import PageReadiness
+from scrapers.common.scrape_run import ScrapeOptions, finish_run
+
+BASE_URL = "https://www.carulla.com"
+IMAGE_BASE_URL = "https://carulla.vtexassets.com"
+# Tamaño de la miniatura de las tarjetas del listado (el motor HTTP reconstruye la misma URL de imagen).
+CARD_IMAGE_SIZE = (360, 360)
+PRODUCT_CARD_SELECTOR = "article.productCard_productCard__M0677"
+FIRST_PRODUCT_NAME_SELECTOR = "div[class*='product-grid_fs-product-grid'] h3[class*='styles_name']"
+# Motores disponibles para la Fase 2: navegador completo o API de catálogo de VTEX.
+ENGINES = ("selenium", "http")
+# Horas tras las cuales se vuelve a recorrer el menú para actualizar el catálogo de enlaces.
+LINKS_TTL_HOURS = 72
+
+def setup_driver(user_agent, logger, profile=None):
+    """
+    Configura e inicializa el WebDriver de Selenium.
+    Con `profile` (un `ScrapeProfile`) el navegador es headless y sin descargar recursos pesados.
+    """
     logger.info(f"Configurando driver con User-Agent: {user_agent}")
     options = webdriver.ChromeOptions()
     options.page_load_strategy = 'eager'
-    # options.add_argument("--headless")
     options.add_argument(f"user-agent={user_agent}")
-    options.add_argument("--window-size=1920,1080")
-    options.add_argument("--start-maximized")
+    if profile:
+        profile.configure(options)
+    else:
+        options.add_argument("--window-size=1920,1080")
+        options.add_argument("--start-maximized")
     options.add_argument("--no-sandbox")
     options.add_argument("--disable-dev-shm-usage")
     options.add_argument("--log-level=3")
     options.add_argument('--ignore-certificate-errors')
-    service = ChromeService(ChromeDriverManager().install())
-    driver = webdriver.Chrome(service=service, options=options)
+    driver = new_chrome(options, logger, cache_namespace="carulla")
     return driver
 
+def _guess_brand(name):
+    """Deduce la marca a partir del nombre: las palabras en mayúsculas que siguen a la primera palabra."""
+    name_parts = name.split()
+    brand_words = []
+    for word in name_parts[1:]:
+        if word.isupper() or (len(word) > 1 and word.replace('.', '').isupper()):
+            brand_words.append(word.replace('.', ''))
+        else:
+            if brand_words: break
+    return ' '.join(brand_words) if brand_words else (name_parts[1] if len(name_parts) > 1 else name_parts[0])
+
 def extract_product_data(soup, main_category_name, sub_category, tipo, logger):
     """Extrae los datos de los productos de la página."""
     productos_en_pagina = []
-    product_containers = soup.select('article.productCard_productCard__M0677')
+    product_containers = soup.select(PRODUCT_CARD_SELECTOR)
     
     for item in product_containers:
         try:
             name_tag = item.select_one('h3.styles_name__qQJiK')
             name = name_tag.get_text(strip=True) if name_tag else "N/A"
             
-            name_parts = name.split()
-            brand_words = []
-            for word in name_parts[1:]:
-                if word.isupper() or (len(word) > 1 and word.replace('.', '').isupper()):
-                    brand_words.append(word.replace('.', ''))
-                else:
-                    if brand_words: break
-            brand = ' '.join(brand_words) if brand_words else (name_parts[1] if len(name_parts) > 1 else name_parts[0])
+            brand = _guess_brand(name)
 
             link_tag = item.select_one('a[data-testid="product-link"]')
-            url_producto = f"https://www.carulla.com{link_tag['href']}" if link_tag and link_tag.get('href') else "N/A"
+            url_producto = f"{BASE_URL}{link_tag['href']}" if link_tag and link_tag.get('href') else "N/A"
 
             image_tag = item.select_one('img')
             url_imagen = image_tag.get('src') if image_tag else "N/A"
@@ -68,43 +98,36 @@ def extract_product_data(soup, main_category_name, sub_category, tipo, logger):
             if precio_sin_descuento > precio_final:
                 descuento_porcentaje = round(((precio_sin_descuento - precio_final) / precio_sin_descuento) * 100)
 
-            producto_data = {
-                "tienda": "Carulla",
-                "categoria_principal": main_category_name,
-                "sub_categoria": sub_category,
-                "tipo": tipo,
-                "nombre_completo": name,
-                "marca": brand,
-                "precio_final": precio_final,
-                "precio_sin_descuento": precio_sin_descuento,
-                "porcentaje_descuento": descuento_porcentaje,
-                "url_producto": url_producto,
-                "url_imagen": url_imagen,
-            }
+            producto_data = ProductRecord(
+                tienda="Carulla",
+                categoria_principal=main_category_name,
+                sub_categoria=sub_category,
+                tipo=tipo,
+                nombre_completo=name,
+                marca=brand,
+                precio_final=precio_final,
+                precio_sin_descuento=precio_sin_descuento,
+                porcentaje_descuento=descuento_porcentaje,
+                url_producto=url_producto,
+                url_imagen=url_imagen,
+            )
             productos_en_pagina.append(producto_data)
         except Exception as e:
             logger.warning(f"Se omitió un producto por datos incompletos o error de parsing. Error: {e}")
             continue
     return productos_en_pagina
 
-def append_to_json(new_data, filepath, logger):
-    """Añade datos a un archivo JSON de forma segura."""
-    if not new_data: return
-    existing_data = []
-    if os.path.exists(filepath):
-        with open(filepath, 'r', encoding='utf-8') as f:
-            try: existing_data = json.load(f)
-            except json.JSONDecodeError: logger.warning(f"Archivo JSON {filepath} corrupto. Se sobreescribirá.")
-    existing_data.extend(new_data)
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(existing_data, f, indent=4, ensure_ascii=False)
+def parse_page(html, link_info, logger):
+    """Parsea el HTML de una página de listado y extrae sus productos (se ejecuta en los procesos de parseo)."""
+    soup = parse_listing(html, PRODUCT_CARD_SELECTOR)
+    return extract_product_data(soup, link_info['main_category'], link_info['sub_category'], link_info['tipo'], logger)
 
 def collect_all_links(user_agent, fast_timeout, logger):
     """Navega el menú para recolectar todos los enlaces de subcategorías."""
     driver = None
     try:
         driver = setup_driver(user_agent, logger)
-        driver.get("https://www.carulla.com/")
+        driver.get(BASE_URL + "/")
         try:
             WebDriverWait(driver, fast_timeout).until(EC.element_to_be_clickable((By.ID, "onetrust-accept-btn-handler"))).click()
             logger.info("Banner de cookies aceptado.")
@@ -144,97 +167,224 @@ def collect_all_links(user_agent, fast_timeout, logger):
                 WebDriverWait(driver, fast_timeout).until(EC.visibility_of_element_located((By.XPATH, main_categories_xpath)))
             except Exception as e:
                 logger.error(f"Error procesando la categoría {i} ('{main_category_name}'): {e}", exc_info=True)
-                driver.get("https://www.carulla.com/") # Intenta recuperar
+                driver.get(BASE_URL + "/") # Intenta recuperar
                 WebDriverWait(driver, fast_timeout).until(EC.element_to_be_clickable((By.CSS_SELECTOR, menu_button_selector))).click()
                 continue
         return all_sub_categories_to_scrape
     finally:
         if driver: driver.quit()
 
-def scrape_carulla(user_agent, logger):
-    """Flujo principal de scraping para Carulla.com."""
-    start_time = time.time()
-    logger.info("--- INICIANDO PROCESO DE SCRAPING PARA CARULLA ---")
+def _product_from_vtex(item, main_category_name, sub_category, tipo):
+    """Convierte un producto de la API de catálogo de VTEX al mismo `ProductRecord` que produce `extract_product_data`."""
+    from scrapers.common.vtex_http import first_image, first_offer, thumbnail_url
+    name = (item.get("productName") or "N/A").strip()
+    offer = first_offer(item) or {}
+    precio_final = float(offer.get("Price") or 0)
+    precio_sin_descuento = float(offer.get("ListPrice") or precio_final)
     
-    FAST_TIMEOUT = 10
-    PAGE_LOAD_TIMEOUT = 15
+    descuento_porcentaje = 0
+    if precio_sin_descuento > precio_final:
+        descuento_porcentaje = round(((precio_sin_descuento - precio_final) / precio_sin_descuento) * 100)
 
-    output_dir = 'raw_data/carulla'
-    os.makedirs(output_dir, exist_ok=True)
-    output_path = os.path.join(output_dir, 'productos_carulla.json')
-    if os.path.exists(output_path):
-        os.remove(output_path)
-        logger.info(f"Archivo de productos anterior '{output_path}' eliminado.")
-    
-    logger.info("--- INICIANDO FASE 1: Recolección de enlaces ---")
-    all_links = collect_all_links(user_agent, FAST_TIMEOUT, logger)
-    if not all_links:
-        logger.critical("No se pudo recolectar ningún enlace. Abortando scraping.")
-        return
-        
-    logger.info(f"--- FASE 1 COMPLETADA: Se recolectaron {len(all_links)} enlaces de sub-categorías. ---")
-    logger.info("--- INICIANDO FASE 2: SCRAPING DE PRODUCTOS ---")
+    image = first_image(item)
+    return ProductRecord(
+        tienda="Carulla",
+        categoria_principal=main_category_name,
+        sub_categoria=sub_category,
+        tipo=tipo,
+        nombre_completo=name,
+        marca=_guess_brand(name),
+        precio_final=precio_final,
+        precio_sin_descuento=precio_sin_descuento,
+        porcentaje_descuento=descuento_porcentaje,
+        url_producto=f"{BASE_URL}/{item['linkText']}/p" if item.get("linkText") else "N/A",
+        # Misma miniatura que el `<img src>` de la tarjeta, no la imagen original de `imageUrl`.
+        url_imagen=thumbnail_url(image, IMAGE_BASE_URL, *CARD_IMAGE_SIZE) if image else "N/A",
+    )
 
-    for link_info in all_links:
-        driver = None
-        try:
-            main_cat, sub_cat, tipo, sub_cat_href = link_info['main_category'], link_info['sub_category'], link_info['tipo'], link_info['href']
-            if not all([main_cat, sub_cat, tipo, sub_cat_href]): continue
+def scrape_category_http(link_info, client, logger, emit, pages_done=frozenset()):
+    """Equivalente HTTP de `scrape_category`: obtiene los listados desde la API de catálogo de VTEX sin navegador."""
+    main_cat, sub_cat, tipo, sub_cat_href = link_info['main_category'], link_info['sub_category'], link_info['tipo'], link_info['href']
+    logger.info(f"\nScrapeando (HTTP): {main_cat} -> {sub_cat} -> {tipo} | URL: {sub_cat_href}")
+    try:
+        for page_num, items in client.iter_pages(sub_cat_href, pages_done):
+            products_on_page = []
+            for item in items:
+                try:
+                    products_on_page.append(_product_from_vtex(item, main_cat, sub_cat, tipo))
+                except Exception as e:
+                    logger.warning(f"Se omitió un producto por datos incompletos o error de parsing. Error: {e}")
+            logger.info(f"    - Página {page_num}: {len(products_on_page)} productos.", extra={"pagina": page_num})
+            if emit(page_num, products_on_page) is False:
+                logger.info("    - Listado sin cambios desde la ejecución anterior. Se omiten las demás páginas.")
+                break
+    except Exception as e:
+        logger.error(f"Error CRÍTICO procesando el enlace '{sub_cat_href}': {e}", exc_info=True)
+        raise
 
-            driver = setup_driver(user_agent, logger)
+def scrape_category(link_info, pool, readiness, page_load_timeout, logger, emit, pages_done=frozenset()):
+    """
+    Recorre todas las páginas de una sub-categoría con una sesión del pool.
+    El HTML de cada página se entrega a `emit(page_num, html)` para que el pipeline lo parsee con `parse_page`;
+    las páginas en `pages_done` ya fueron guardadas y se omiten. Si `emit` retorna False para la página 1
+    (modo delta, listado sin cambios), no se recorre el resto de la paginación.
+    """
+    pages_in_subcategory = 0
+    try:
+        main_cat, sub_cat, tipo, sub_cat_href = link_info['main_category'], link_info['sub_category'], link_info['tipo'], link_info['href']
+
+        with pool.session() as driver:
             logger.info(f"\nScrapeando: {main_cat} -> {sub_cat} -> {tipo} | URL: {sub_cat_href}")
             driver.get(sub_cat_href)
             
-            products_in_subcategory = [] 
             page_num = 1
             while True:
                 try:
-                    logger.info(f"    - Extrayendo productos de la página {page_num}...")
-                    wait = WebDriverWait(driver, PAGE_LOAD_TIMEOUT)
+                    wait = WebDriverWait(driver, page_load_timeout)
                     gallery_xpath = "//div[contains(@class, 'product-grid_fs-product-grid')]"
                     wait.until(EC.presence_of_element_located((By.XPATH, gallery_xpath)))
                     
                     first_product_name_xpath = f"({gallery_xpath}//h3[contains(@class, 'styles_name')])[1]"
                     initial_product_name = wait.until(EC.presence_of_element_located((By.XPATH, first_product_name_xpath))).text
-                    time.sleep(2) 
-                    
-                    soup = BeautifulSoup(driver.page_source, 'html.parser')
-                    products_on_page = extract_product_data(soup, main_cat, sub_cat, tipo, logger)
-                    products_in_subcategory.extend(products_on_page)
+                    pool.count_page(driver)
+
+                    if page_num in pages_done:
+                        logger.info(f"    - Página {page_num} ya guardada en la ejecución anterior. Avanzando...", extra={"pagina": page_num})
+                    else:
+                        logger.info(f"    - Extrayendo productos de la página {page_num}...", extra={"pagina": page_num})
+                        snapshot = readiness.wait(driver, PRODUCT_CARD_SELECTOR, FIRST_PRODUCT_NAME_SELECTOR, timeout=page_load_timeout)
+                        
+                        page_source = driver.page_source
+                        readiness.confirm(driver, snapshot, PRODUCT_CARD_SELECTOR)
+                        pages_in_subcategory += 1
+                        if emit(page_num, page_source) is False:
+                            logger.info("    - Listado sin cambios desde la ejecución anterior. Se omiten las demás páginas.")
+                            break
                     
                     next_button_xpath = "//button[.//span[text()='Siguiente']]"
                     next_button = wait.until(EC.element_to_be_clickable((By.XPATH, next_button_xpath)))
-                    driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", next_button)
-                    time.sleep(0.5)
-                    driver.execute_script("arguments[0].click();", next_button)
+                    # El clic por JavaScript no requiere esperar a que termine el scroll.
+                    driver.execute_script("arguments[0].scrollIntoView({block: 'center'}); arguments[0].click();", next_button)
                     
                     wait.until(lambda d: d.find_element(By.XPATH, first_product_name_xpath).text != initial_product_name)
                     page_num += 1
                 except TimeoutException:
-                    logger.info(f"    - Fin de la paginación para '{tipo}'. {len(products_in_subcategory)} productos encontrados en esta subcategoría.")
+                    logger.info(f"    - Fin de la paginación para '{tipo}'. {pages_in_subcategory} páginas extraídas en esta subcategoría.")
                     break
                 except Exception as e:
                     logger.error(f"    - Error inesperado en paginación: {e}", exc_info=True)
-                    break
-            
-            logger.info(f"  -> Guardando {len(products_in_subcategory)} productos de '{tipo}'.")
-            append_to_json(products_in_subcategory, output_path, logger)
-        except Exception as e:
-            logger.error(f"Error CRÍTICO procesando el enlace '{link_info.get('href')}': {e}", exc_info=True)
-        finally:
-            if driver: driver.quit()
-            gc.collect()
+                    raise
+    except Exception as e:
+        logger.error(f"Error CRÍTICO procesando el enlace '{link_info.get('href')}': {e}", exc_info=True)
+        raise
+    finally:
+        gc.collect()
+
+def scrape_carulla(user_agent, logger, options=None):
+    """
+    Flujo principal de scraping para Carulla.com.
+    `options` (un `ScrapeOptions`) reúne las opciones de la ejecución; sin él se usan las opciones por defecto.
+    """
+    options = options or ScrapeOptions()
+    start_time = time.time()
+    logger.info("--- INICIANDO PROCESO DE SCRAPING PARA CARULLA ---")
+    
+    FAST_TIMEOUT = 10
+    PAGE_LOAD_TIMEOUT = 15
+
+    output_dir = 'raw_data/carulla'
+    os.makedirs(output_dir, exist_ok=True)
+    output_path = os.path.join(output_dir, 'productos_carulla.jsonl')
+    json_output_path = os.path.join(output_dir, 'productos_carulla.json')
+    if os.path.exists(json_output_path):
+        os.remove(json_output_path)
+    
+    # La Fase 1 solo recorre el menú cuando el catálogo de enlaces venció.
+    catalog = LinkCatalog(
+        "Carulla",
+        os.path.join(output_dir, "carulla_link_catalog.json"),
+        logger,
+        LINKS_TTL_HOURS if options.links_ttl_hours is None else options.links_ttl_hours,
+        url_key='href',
+        label_keys=('main_category', 'sub_category', 'tipo'),
+    )
+
+    def crawl_links():
+        logger.info("--- INICIANDO FASE 1: Recolección de enlaces ---")
+        links = collect_all_links(user_agent, FAST_TIMEOUT, logger)
+        logger.info(f"--- FASE 1 COMPLETADA: Se recolectaron {len(links)} enlaces de sub-categorías. ---")
+        return [link for link in links if link['href']]
+
+    all_links = catalog.get_links(crawl_links)
+    if not all_links:
+        logger.critical("No se pudo recolectar ningún enlace. Abortando scraping.")
+        return
+        
+    logger.info("--- INICIANDO FASE 2: SCRAPING DE PRODUCTOS ---")
+
+    valid_links = [link for link in all_links if all([link['main_category'], link['sub_category'], link['tipo'], link['href']])]
+    readiness = None
+    parse_page_fn = None
+    profile = None
+    fallback_pool = None
+    if options.engine == "http":
+        # Importación diferida: requests solo es necesario para este motor.
+        from scrapers.common.vtex_http import VtexCatalogClient
+        logger.info("Fase 2 con motor HTTP (API de catálogo de VTEX, sin navegador).")
+        cache = ResponseCache("Carulla", os.path.join(output_dir, "cache_http"), logger) if options.http_cache else None
+        pool = VtexCatalogClient(BASE_URL, user_agent, logger, max_connections=options.workers, cache=cache)
+        browser_links = [link['href'] for link in valid_links if not pool.supports(link['href'])]
+        if browser_links:
+            # Enlaces con filtros que la API no reproduce (p. ej. búsquedas de texto): se recorren con el navegador
+            # y su HTML se parsea en el mismo hilo.
+            logger.warning(f"{len(browser_links)} enlaces tienen filtros que la API de catálogo no admite; se recorren con Selenium: {browser_links}")
+            readiness = PageReadiness("Carulla", logger, stats_path=os.path.join(output_dir, "carulla_readiness.json"))
+            fallback_pool = DriverPool(lambda: setup_driver(user_agent, logger), logger, max_size=options.workers, max_pages=options.max_pages_per_driver)
+
+        def category_scraper(link_info, pool, emit, pages_done):
+            if pool.supports(link_info['href']):
+                return scrape_category_http(link_info, pool, logger, emit, pages_done)
+            emit_html = lambda page_num, html: emit(page_num, parse_page(html, link_info, logger))
+            return scrape_category(link_info, fallback_pool, readiness, PAGE_LOAD_TIMEOUT, logger, emit_html, pages_done)
+    else:
+        pool = None
+        readiness = PageReadiness("Carulla", logger, stats_path=os.path.join(output_dir, "carulla_readiness.json"))
+        category_scraper = lambda link_info, pool, emit, pages_done: scrape_category(link_info, pool, readiness, PAGE_LOAD_TIMEOUT, logger, emit, pages_done)
+        parse_page_fn = partial(parse_page, logger=logger)
+        if options.lightweight:
+            profile = ScrapeProfile("Carulla", logger, stats_path=os.path.join(output_dir, "carulla_browser_profile.json"))
+
+    try:
+        result = run_phase2(
+            valid_links,
+            category_scraper,
+            lambda: setup_driver(user_agent, logger, profile),
+            output_path,
+            logger,
+            workers=options.workers,
+            max_pages_per_driver=options.max_pages_per_driver,
+            resume=options.resume,
+            url_key='href',
+            pool=pool,
+            parse_page=parse_page_fn,
+            parse_workers=options.parse_workers,
+            profile=profile,
+            warm_browsers=options.warm_browsers,
+            delta=options.delta,
+        )
+    finally:
+        if fallback_pool:
+            fallback_pool.close()
+    if readiness:
+        readiness.save()
+    if profile:
+        profile.save()
 
     duration = time.time() - start_time
     logger.info("--- FASE 2 Finalizada: Proceso de scraping de productos completado. ---")
 
     # --- RESUMEN FINAL ---
-    try:
-        with open(output_path, 'r', encoding='utf-8') as f:
-            final_products = json.load(f)
-            logger.info(f"Resumen: Total de productos extraídos para Carulla: {len(final_products)}")
-    except (FileNotFoundError, json.JSONDecodeError):
-        logger.warning("No se pudo leer el archivo final de productos o está vacío.")
+    finish_run(output_path, "Carulla", options, logger, user_agent, start_time, complete=result.complete)
 
     logger.info(f"Duración total del scraper de Carulla: {duration:.2f} segundos.")
     logger.info("--- SCRAPING PARA CARULLA FINALIZADO ---")
@@ -1,19 +1,21 @@
 import json
 import logging
 import os
+import sys
 import time
 import gc
 from selenium import webdriver
-from selenium.webdriver.chrome.service import Service as ChromeService
-from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
-from bs4 import BeautifulSoup
 
-# 1. Configuración de Logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+# Permite importar los módulos compartidos también al ejecutar este archivo directamente.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from scrapers.common.driver_factory import new_chrome
+from scrapers.common.html_parser import parse_listing
+
+PRODUCT_CARD_SELECTOR = 'article.productCard_productCard__M0677'
 
 def setup_driver(user_agent):
     """Configura e inicializa el WebDriver de Selenium."""
@@ -28,14 +30,13 @@ def setup_driver(user_agent):
     options.add_argument("--disable-dev-shm-usage")
     options.add_argument("--log-level=3")
     options.add_argument('--ignore-certificate-errors')
-    service = ChromeService(ChromeDriverManager().install())
-    driver = webdriver.Chrome(service=service, options=options)
+    driver = new_chrome(options, logging.getLogger())
     return driver
 
 def extract_product_data(soup, main_category_name, sub_category, tipo):
     """Extrae los datos de los productos de la página con la estructura de datos corregida."""
     productos_en_pagina = []
-    product_containers = soup.select('article.productCard_productCard__M0677')
+    product_containers = soup.select(PRODUCT_CARD_SELECTOR)
     
     for item in product_containers:
         try:
@@ -203,7 +204,7 @@ def scrape_carulla(user_agent):
                         
                         time.sleep(2) 
                         
-                        soup = BeautifulSoup(driver.page_source, 'html.parser')
+                        soup = parse_listing(driver.page_source, PRODUCT_CARD_SELECTOR)
                         # FIX: Pasar los argumentos correctos a la función de extracción
                         products_on_page = extract_product_data(soup, main_cat, sub_cat, tipo)
                         products_in_subcategory.extend(products_on_page)
@@ -246,5 +247,7 @@ def scrape_carulla(user_agent):
         logging.info(f"Scraping de Carulla finalizado.")
 
 if __name__ == '__main__':
+    # Configuración de Logging (solo al ejecutar el script directamente)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
     UA_for_test = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36"
     scrape_carulla(user_agent=UA_for_test)
\ No newline at end of file
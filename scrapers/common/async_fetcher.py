@@ -0,0 +1,194 @@
+import asyncio
+import threading
+import time
+from contextlib import nullcontext
+
+import aiohttp
+
+from scrapers.common import metrics
+
+# Marcador de fin de un recorrido de paginación (ver `crawl_paginated`).
+_END = object()
+
+def _is_transient(error):
+    """
+    True si vale la pena reintentar la descarga: errores de conexión, timeouts, 5xx y 429. Los demás 4xx
+    (404, 403, 410...) no cambian al reintentar.
+    """
+    if isinstance(error, aiohttp.ClientResponseError):
+        return not (400 <= error.status < 500) or error.status == 429
+    return True
+
+class AsyncPageFetcher:
+    """
+    Descargador asíncrono de páginas HTML sobre un event loop propio (en un hilo de fondo).
+
+    Todas las descargas comparten una `aiohttp.ClientSession` con conexiones keep-alive y un semáforo
+    que limita la concurrencia total a `max_concurrency`, sin importar cuántos hilos de la Fase 2 lo usen.
+    Expone `session()` / `close()` como `DriverPool`, de modo que puede pasarse como `pool` a `run_phase2`.
+
+    Con `cache` (un `ResponseCache`) cada página se pide de forma condicional y, si no cambió, se lee del disco;
+    el fetcher cierra el caché al cerrarse.
+    """
+
+    def __init__(self, user_agent, logger, max_concurrency=8, timeout=30, retries=2, cache=None):
+        self.logger = logger
+        self.cache = cache
+        self.retries = retries
+        self.max_concurrency = max_concurrency
+        self.pages_fetched = 0
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="async-fetcher", daemon=True)
+        self._thread.start()
+        self._run(self._open(user_agent, max_concurrency, timeout))
+
+    async def _open(self, user_agent, max_concurrency, timeout):
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        connector = aiohttp.TCPConnector(limit=max_concurrency, keepalive_timeout=60)
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            headers={"User-Agent": user_agent, "Accept": "text/html,application/xhtml+xml"},
+            timeout=aiohttp.ClientTimeout(total=timeout),
+        )
+
+    def _run(self, coro):
+        """Ejecuta una corrutina en el loop del fetcher y espera su resultado desde el hilo que llama."""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    async def _fetch(self, url):
+        for attempt in range(self.retries + 1):
+            try:
+                async with self._semaphore:
+                    start = time.perf_counter()
+                    html = await self._get(url)
+                    metrics.observe("descarga_http", time.perf_counter() - start)
+                self.pages_fetched += 1
+                return html
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt == self.retries or not _is_transient(e):
+                    raise
+                self.logger.warning(f"Error descargando {url} (intento {attempt + 1}): {e}. Reintentando...")
+                await asyncio.sleep(2 ** attempt)
+
+    async def _get(self, url):
+        # Las operaciones del caché son lecturas y escrituras locales pequeñas; se hacen en el mismo loop.
+        headers = self.cache.validators(url) if self.cache else {}
+        async with self._session.get(url, headers=headers) as response:
+            if response.status == 304 and self.cache:
+                body = self.cache.hit(url)
+                if body is not None:
+                    return body.decode('utf-8')
+            else:
+                response.raise_for_status()
+                html = await response.text()
+                if self.cache:
+                    self.cache.put(url, response.headers, html.encode('utf-8'))
+                return html
+        # El cuerpo guardado ya no está en disco: se repite la petición sin validadores.
+        async with self._session.get(url) as response:
+            response.raise_for_status()
+            html = await response.text()
+        if self.cache:
+            self.cache.put(url, response.headers, html.encode('utf-8'))
+        return html
+
+    async def _crawl(self, first_url, discover_pages, first_html, out):
+        """
+        Productor de `crawl_paginated`: pone `(page_num, html, error)` en la cola `out` en orden de página, a medida
+        que se descargan, y `_END` al terminar. Hay a lo sumo `2 * max_concurrency` páginas pedidas y sin entregar.
+        """
+        page_urls = {1: first_url}
+        waiting = []
+        pending = {}
+
+        def schedule():
+            waiting.sort()
+            while waiting and len(pending) < 2 * self.max_concurrency:
+                num = waiting.pop(0)
+                pending[num] = asyncio.ensure_future(self._fetch(page_urls[num]))
+
+        async def discover(html, page_num):
+            # El descubrimiento de enlaces parsea HTML; se ejecuta fuera del loop para no bloquear las descargas.
+            found = await self._loop.run_in_executor(None, discover_pages, html, page_urls[page_num], page_num)
+            for num, url in found.items():
+                if num not in page_urls:
+                    page_urls[num] = url
+                    waiting.append(num)
+            schedule()
+
+        try:
+            html = first_html if first_html is not None else await self._fetch(first_url)
+            await out.put((1, html, None))
+            await discover(html, 1)
+            while pending:
+                num = min(pending)
+                try:
+                    html = await pending.pop(num)
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    # Se pierde solo esta página; las demás se siguen entregando.
+                    await out.put((num, None, e))
+                    schedule()
+                    continue
+                await out.put((num, html, None))
+                await discover(html, num)
+        except Exception as e:
+            await out.put((None, None, e))
+        finally:
+            for task in pending.values():
+                task.cancel()
+        await out.put(_END)
+
+    async def _new_queue(self):
+        return asyncio.Queue(maxsize=2)
+
+    def fetch(self, url):
+        """Descarga una página y retorna su HTML."""
+        return self._run(self._fetch(url))
+
+    def crawl_paginated(self, first_url, discover_pages, first_html=None):
+        """
+        Descarga la primera página de un listado y luego, de forma concurrente, todas las páginas de su paginación.
+
+        `discover_pages(html, url, page_num)` retorna `{numero_de_pagina: url}` con los enlaces de paginación
+        visibles en una página; se vuelve a llamar sobre las páginas nuevas hasta que no aparezcan más.
+        Si ya se descargó la primera página, `first_html` evita pedirla de nuevo.
+
+        Es un generador de `(page_num, html)` en orden de página: cada página se entrega apenas están listas ella
+        y las anteriores, sin esperar al resto de la categoría (y sin guardarla completa en memoria). Si una página
+        falla tras los reintentos, se omite, se entregan las demás y al final se lanza el primer error. Si quien
+        consume el generador lo abandona, las descargas pendientes se cancelan.
+        """
+        out = self._run(self._new_queue())
+        producer = asyncio.run_coroutine_threadsafe(self._crawl(first_url, discover_pages, first_html, out), self._loop)
+        first_error = None
+        try:
+            while True:
+                item = self._run(out.get())
+                if item is _END:
+                    break
+                page_num, html, error = item
+                if error is None:
+                    yield page_num, html
+                    continue
+                if page_num is None:
+                    raise error
+                self.logger.error(f"No se pudo descargar la página {page_num} de {first_url}: {error}")
+                first_error = first_error or error
+        finally:
+            producer.cancel()
+        if first_error:
+            raise first_error
+
+    # --- Interfaz compatible con DriverPool ---
+
+    def session(self):
+        return nullcontext(self)
+
+    def close(self):
+        self._run(self._session.close())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self.logger.info(f"Fetcher asíncrono cerrado: {self.pages_fetched} páginas descargadas.")
+        if self.cache:
+            self.cache.close()
@@ -0,0 +1,142 @@
+import json
+import threading
+import time
+
+# Recursos que nunca se usan al extraer productos: del HTML solo se conserva el `src` de la imagen.
+BLOCKED_RESOURCE_PATTERNS = [
+    "*.jpg*", "*.jpeg*", "*.png*", "*.gif*", "*.webp*", "*.avif*", "*.svg*", "*.ico*",
+    "*.woff*", "*.ttf*", "*.otf*", "*.eot*",
+    "*.mp4*", "*.webm*", "*.m3u8*", "*.mp3*",
+]
+
+# Dominios de analítica, publicidad y seguimiento.
+BLOCKED_TRACKER_PATTERNS = [
+    "*google-analytics.com*", "*googletagmanager.com*", "*googleadservices.com*", "*doubleclick.net*",
+    "*connect.facebook.net*", "*facebook.com/tr*", "*hotjar.com*", "*clarity.ms*", "*analytics.tiktok.com*",
+    "*bat.bing.com*", "*criteo.com*", "*criteo.net*", "*scorecardresearch.com*", "*nr-data.net*",
+    "*segment.io*", "*cdn.segment.com*", "*optimizely.com*", "*insider.com*", "*useinsider.com*",
+]
+
+def _average(values):
+    return sum(values) / len(values) if values else 0.0
+
+class ScrapeProfile:
+    """
+    Perfil de navegador liviano para la Fase 2: Chrome headless que, mediante DevTools (`Network.setBlockedURLs`),
+    no descarga imágenes, video, fuentes ni scripts de analítica.
+
+    El viewport (`window_size`) no es parte del ahorro: se mantiene en un tamaño de escritorio, porque con uno
+    menor las tiendas pueden pasar a su diseño móvil y no está verificado que los selectores de los parsers
+    encuentren ahí la grilla de productos.
+
+    - `configure(options)` ajusta las `ChromeOptions` antes de crear el driver.
+    - `begin_session(driver)` y `record_page(driver)` los llama `DriverPool` al entregar una sesión y por
+      cada página cargada: miden los bytes recibidos (registro de rendimiento de Chrome) y el tiempo por página.
+    - Una de cada `baseline_every` sesiones navega sin bloqueo como muestra de referencia, de modo que
+      `save()` puede informar los bytes y el tiempo ahorrados por página.
+    """
+
+    def __init__(self, store, logger, stats_path=None, headless=True, window_size=(1280, 800), baseline_every=25):
+        self.store = store
+        self.logger = logger
+        self.stats_path = stats_path
+        self.headless = headless
+        self.window_size = window_size
+        self.baseline_every = baseline_every
+        self.blocked_patterns = BLOCKED_RESOURCE_PATTERNS + BLOCKED_TRACKER_PATTERNS
+        self._lock = threading.Lock()
+        self._sessions = 0
+        self._state = {}  # id(driver) -> {"baseline": bool, "last": float}
+        self._pages = {"liviano": [], "referencia": []}  # listas de (bytes, segundos, bloqueados)
+
+    def configure(self, options):
+        """Aplica el perfil a unas `ChromeOptions` (reemplaza `--start-maximized`)."""
+        if self.headless:
+            options.add_argument("--headless=new")
+        options.add_argument(f"--window-size={self.window_size[0]},{self.window_size[1]}")
+        options.add_argument("--mute-audio")
+        options.add_argument("--disable-extensions")
+        options.add_argument("--disable-background-networking")
+        # El registro de rendimiento expone los eventos de red de DevTools para medir los bytes recibidos.
+        options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+        options.add_experimental_option("perfLoggingPrefs", {"enableNetwork": True, "enablePage": False})
+        return options
+
+    def begin_session(self, driver):
+        """Activa el bloqueo de recursos (o lo desactiva en las sesiones de referencia) al entregar una sesión."""
+        with self._lock:
+            self._sessions += 1
+            baseline = bool(self.baseline_every) and self._sessions % self.baseline_every == 0
+        try:
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": [] if baseline else self.blocked_patterns})
+            self._drain(driver)
+        except Exception as e:
+            self.logger.warning(f"No se pudo aplicar el bloqueo de recursos: {e}")
+        with self._lock:
+            self._state[id(driver)] = {"baseline": baseline, "last": time.monotonic()}
+
+    def record_page(self, driver):
+        """Registra los bytes recibidos y el tiempo transcurrido desde la página anterior de la sesión."""
+        now = time.monotonic()
+        received, blocked = self._drain(driver)
+        with self._lock:
+            state = self._state.get(id(driver))
+            if state is None:
+                return
+            seconds, state["last"] = now - state["last"], now
+            self._pages["referencia" if state["baseline"] else "liviano"].append((received, seconds, blocked))
+
+    def _drain(self, driver):
+        """Vacía el registro de rendimiento y retorna `(bytes recibidos, peticiones bloqueadas)`."""
+        try:
+            entries = driver.get_log("performance")
+        except Exception:
+            return 0, 0
+        received = blocked = 0
+        for entry in entries:
+            message = entry.get("message", "")
+            # Se filtra por texto antes de parsear: la mayoría de los eventos no interesan.
+            if "Network.loadingFinished" in message:
+                received += json.loads(message)["message"]["params"].get("encodedDataLength", 0)
+            elif "Network.loadingFailed" in message and "blockedReason" in message:
+                blocked += 1
+        return int(received), blocked
+
+    def summary(self):
+        """Promedios por página con y sin bloqueo, y el ahorro estimado por página."""
+        with self._lock:
+            pages = {mode: list(values) for mode, values in self._pages.items()}
+        summary = {"tienda": self.store, "headless": self.headless, "viewport": list(self.window_size)}
+        for mode, values in pages.items():
+            summary[mode] = {
+                "paginas": len(values),
+                "bytes_por_pagina": round(_average([v[0] for v in values])),
+                "segundos_por_pagina": round(_average([v[1] for v in values]), 3),
+                "peticiones_bloqueadas_por_pagina": round(_average([v[2] for v in values]), 1),
+            }
+        if pages["liviano"] and pages["referencia"]:
+            summary["ahorro_por_pagina"] = {
+                "bytes": summary["referencia"]["bytes_por_pagina"] - summary["liviano"]["bytes_por_pagina"],
+                "segundos": round(summary["referencia"]["segundos_por_pagina"] - summary["liviano"]["segundos_por_pagina"], 3),
+            }
+        return summary
+
+    def save(self):
+        """Registra el resumen en el log y lo persiste en `stats_path`."""
+        summary = self.summary()
+        light, reference = summary["liviano"], summary["referencia"]
+        self.logger.info(
+            f"Perfil liviano ({self.store}): {light['paginas']} páginas, {light['bytes_por_pagina'] / 1024:.0f} KiB y "
+            f"{light['segundos_por_pagina']:.2f} s por página, {light['peticiones_bloqueadas_por_pagina']:.0f} peticiones bloqueadas por página."
+        )
+        if "ahorro_por_pagina" in summary:
+            saved = summary["ahorro_por_pagina"]
+            self.logger.info(
+                f"Ahorro frente a {reference['paginas']} páginas de referencia sin bloqueo: "
+                f"{saved['bytes'] / 1024:.0f} KiB y {saved['segundos']:.2f} s por página."
+            )
+        if self.stats_path and light["paginas"]:
+            with open(self.stats_path, 'w', encoding='utf-8') as f:
+                json.dump(summary, f, indent=4, ensure_ascii=False)
+        return summary
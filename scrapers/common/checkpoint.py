@@ -0,0 +1,84 @@
+import json
+import os
+import threading
+import time
+
+class RunLedger:
+    """
+    Bitácora persistente del avance de la Fase 2 (un evento JSON por línea, solo de anexado).
+
+    Registra las páginas ya guardadas de cada URL de categoría y las categorías terminadas, para
+    que una ejecución con `resume=True` continúe donde quedó la anterior en lugar de empezar de cero.
+    Sin `resume`, la bitácora anterior se descarta y comienza una ejecución nueva.
+    """
+
+    def __init__(self, filepath, logger, resume=False):
+        self.filepath = filepath
+        self.logger = logger
+        self._lock = threading.Lock()
+        self._done_categories = set()
+        self._done_pages = {}  # url -> {números de página guardados}
+
+        output_dir = os.path.dirname(filepath)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+
+        if resume and os.path.exists(filepath):
+            self._load()
+            logger.info(f"Reanudando desde la bitácora '{filepath}': {len(self._done_categories)} categorías completas, "
+                        f"{sum(len(p) for p in self._done_pages.values())} páginas guardadas.")
+        elif os.path.exists(filepath):
+            os.remove(filepath)
+            logger.info(f"Bitácora anterior '{filepath}' eliminada. Iniciando una ejecución nueva.")
+
+        self._file = open(filepath, 'a', encoding='utf-8')
+
+    def _load(self):
+        complete_size = 0
+        with open(self.filepath, 'rb') as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # Última línea truncada por un corte abrupto: se descarta también del archivo, para que el
+                    # siguiente evento no quede pegado a ella y se pierda en la próxima reanudación.
+                    break
+                complete_size += len(line)
+                try:
+                    event = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if event.get("evento") == "pagina":
+                    self._done_pages.setdefault(event["url"], set()).add(event["pagina"])
+                elif event.get("evento") == "categoria":
+                    self._done_categories.add(event["url"])
+        if complete_size < os.path.getsize(self.filepath):
+            os.truncate(self.filepath, complete_size)
+
+    def _append(self, event, sync=False):
+        event["ts"] = round(time.time(), 3)
+        with self._lock:
+            self._file.write(json.dumps(event, ensure_ascii=False) + "\n")
+            self._file.flush()
+            if sync:
+                os.fsync(self._file.fileno())
+
+    def is_category_done(self, url):
+        return url in self._done_categories
+
+    def pages_done(self, url):
+        """Retorna el conjunto de páginas ya guardadas para la URL (vacío si no hay ninguna)."""
+        return set(self._done_pages.get(url, ()))
+
+    def mark_page(self, url, page_num):
+        """Registra que los productos de una página ya fueron escritos."""
+        self._done_pages.setdefault(url, set()).add(page_num)
+        self._append({"evento": "pagina", "url": url, "pagina": page_num})
+
+    def mark_category(self, url):
+        """Registra que una URL de categoría se recorrió por completo."""
+        self._done_categories.add(url)
+        self._append({"evento": "categoria", "url": url}, sync=True)
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
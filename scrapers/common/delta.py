@@ -0,0 +1,141 @@
+import hashlib
+import json
+import os
+import threading
+
+def listing_fingerprint(products):
+    """Huella de la primera página de un listado: número de productos y hash de los pares (URL, precio)."""
+    digest = hashlib.sha1()
+    for product in products:
+        digest.update(f"{product.get('url_producto')}|{product.get('precio_final')}\n".encode('utf-8'))
+    return f"{len(products)}:{digest.hexdigest()}"
+
+def state_path_for(products_filepath):
+    """Ruta del archivo de huellas asociado a un archivo de productos."""
+    return os.path.splitext(products_filepath)[0] + "_huellas.jsonl"
+
+class DeltaState:
+    """
+    Estado del modo de cambios (delta) de la Fase 2.
+
+    Por cada categoría se guarda la huella de su primera página y la posición (offset y longitud en bytes) de
+    cada página dentro del JSONL de productos. En la ejecución siguiente, si la primera página tiene la misma
+    huella, no se recorre el resto de la paginación: los productos de las demás páginas se copian tal cual
+    desde el JSONL de la ejecución anterior. Para no arrastrar indefinidamente una categoría (p. ej. si
+    solo cambió una página profunda), tras `max_carries` arrastres consecutivos se recorre completa.
+
+    Al iniciar (sin reanudar) el JSONL y las huellas de la ejecución anterior se renombran a
+    `<base>_anterior.jsonl` y `<base>_huellas_anterior.jsonl`.
+    """
+
+    def __init__(self, products_filepath, logger, resume=False, max_carries=3):
+        base = os.path.splitext(products_filepath)[0]
+        self.logger = logger
+        self.max_carries = max_carries
+        self.previous_products_path = base + "_anterior.jsonl"
+        self.state_path = state_path_for(products_filepath)
+        previous_state_path = base + "_huellas_anterior.jsonl"
+
+        if not resume:
+            if os.path.exists(products_filepath):
+                os.replace(products_filepath, self.previous_products_path)
+                if os.path.exists(self.state_path):
+                    os.replace(self.state_path, previous_state_path)
+                elif os.path.exists(previous_state_path):
+                    # Las huellas anteriores describen otro archivo de productos: ya no son válidas.
+                    os.remove(previous_state_path)
+            elif os.path.exists(self.state_path):
+                os.remove(self.state_path)
+
+        self.previous = {}
+        if os.path.exists(previous_state_path) and os.path.exists(self.previous_products_path):
+            with open(previous_state_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        record = json.loads(line)
+                        self.previous[record["url"]] = record
+
+        self._current = {}
+        self._unchanged = set()
+        self._lock = threading.Lock()
+        self._state_file = open(self.state_path, 'a', encoding='utf-8')
+        self.categories_checked = 0
+        self.categories_unchanged = 0
+        self.pages_skipped = 0
+        self.products_carried = 0
+
+    def check(self, url, products):
+        """
+        Compara la primera página de una categoría con la de la ejecución anterior.
+        Retorna True si el listado no cambió y se puede omitir el resto de la paginación.
+        """
+        fingerprint = listing_fingerprint(products)
+        previous = self.previous.get(url)
+        unchanged = (
+            previous is not None
+            and previous.get("huella") == fingerprint
+            and previous.get("arrastres", 0) < self.max_carries
+        )
+        with self._lock:
+            self._current.setdefault(url, {"paginas": {}})["huella"] = fingerprint
+            self.categories_checked += 1
+            if unchanged:
+                self._unchanged.add(url)
+                self.categories_unchanged += 1
+        return unchanged
+
+    def record_page(self, url, page_num, offset, length):
+        """Registra dónde quedó escrita una página en el JSONL de productos."""
+        with self._lock:
+            self._current.setdefault(url, {"paginas": {}})["paginas"][str(page_num)] = [offset, length]
+
+    def finish_category(self, url, writer):
+        """
+        Cierra una categoría: si su listado no cambió, copia al `writer` los productos de sus demás páginas
+        desde el JSONL anterior. Luego persiste su huella y sus páginas. Se llama desde el hilo escritor.
+        """
+        with self._lock:
+            carried = url in self._unchanged
+            current = self._current.pop(url, {"paginas": {}})
+        previous = self.previous.get(url, {})
+
+        if carried:
+            with open(self.previous_products_path, 'rb') as f:
+                for page, (offset, length) in sorted(previous.get("paginas", {}).items(), key=lambda item: int(item[0])):
+                    if page in current["paginas"]:
+                        continue
+                    f.seek(offset)
+                    data = f.read(length)
+                    start = writer.offset
+                    count = data.count(b"\n")
+                    writer.write_raw(data, count)
+                    current["paginas"][page] = [start, length]
+                    self.pages_skipped += 1
+                    self.products_carried += count
+
+        if "huella" in current:
+            record = {
+                "url": url,
+                "huella": current["huella"],
+                "paginas": current["paginas"],
+                "arrastres": previous.get("arrastres", 0) + 1 if carried else 0,
+            }
+            self._state_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._state_file.flush()
+        return carried
+
+    def report(self):
+        """Registra cuántas categorías y páginas se omitieron. Retorna las métricas."""
+        self.logger.info(
+            f"Modo delta: {self.categories_unchanged} de {self.categories_checked} categorías sin cambios; "
+            f"{self.pages_skipped} páginas omitidas y {self.products_carried} productos copiados de la ejecución anterior."
+        )
+        return {
+            "categorias_revisadas": self.categories_checked,
+            "categorias_sin_cambios": self.categories_unchanged,
+            "paginas_omitidas": self.pages_skipped,
+            "productos_copiados": self.products_carried,
+        }
+
+    def close(self):
+        self._state_file.close()
@@ -0,0 +1,120 @@
+import json
+import os
+import threading
+import time
+
+from selenium import webdriver
+from selenium.common.exceptions import SessionNotCreatedException
+from selenium.webdriver.chrome.service import Service as ChromeService
+from webdriver_manager.chrome import ChromeDriverManager
+
+from scrapers.common import metrics
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+CACHE_DIR = os.path.join(PROJECT_ROOT, ".cache")
+# Ruta del chromedriver resuelta por webdriver-manager, compartida entre procesos y ejecuciones.
+DRIVER_PATH_CACHE = os.path.join(CACHE_DIR, "chromedriver.json")
+# Tras este tiempo se vuelve a consultar a webdriver-manager, por si Chrome se actualizó.
+DRIVER_PATH_MAX_AGE = 7 * 24 * 3600
+# Caché HTTP de disco de Chrome (scripts, hojas de estilo) que persiste entre navegadores y ejecuciones.
+BROWSER_CACHE_DIR = os.path.join(CACHE_DIR, "chrome")
+
+_driver_path = None
+_driver_path_lock = threading.Lock()
+_cache_slots = {}  # namespace -> índices de directorios de caché en uso
+_cache_slots_lock = threading.Lock()
+
+def _read_cached_path():
+    try:
+        with open(DRIVER_PATH_CACHE, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    path = cached.get("path")
+    if path and os.path.exists(path) and time.time() - cached.get("resuelto", 0) < DRIVER_PATH_MAX_AGE:
+        return path
+    return None
+
+def chromedriver_path(logger=None, refresh=False):
+    """
+    Ruta del ejecutable de chromedriver. Se resuelve con webdriver-manager una sola vez por proceso
+    y se guarda en disco, de modo que los procesos y ejecuciones siguientes no vuelvan a consultarlo.
+    Con `refresh=True` se ignoran ambas cachés.
+    """
+    global _driver_path
+    with _driver_path_lock:
+        if _driver_path and not refresh:
+            return _driver_path
+        path = None if refresh else _read_cached_path()
+        if path is None:
+            start = time.monotonic()
+            path = ChromeDriverManager().install()
+            if logger:
+                logger.info(f"chromedriver resuelto por webdriver-manager en {time.monotonic() - start:.2f} s: {path}")
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            tmp_path = DRIVER_PATH_CACHE + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"path": path, "resuelto": time.time()}, f)
+            os.replace(tmp_path, DRIVER_PATH_CACHE)
+        _driver_path = path
+        return path
+
+def _acquire_cache_slot(namespace):
+    with _cache_slots_lock:
+        used = _cache_slots.setdefault(namespace, set())
+        slot = 0
+        while slot in used:
+            slot += 1
+        used.add(slot)
+        return slot
+
+def _release_cache_slot(namespace, slot):
+    with _cache_slots_lock:
+        _cache_slots.get(namespace, set()).discard(slot)
+
+def new_chrome(options, logger, cache_namespace=None):
+    """
+    Crea un `webdriver.Chrome` con el chromedriver en caché.
+
+    Con `cache_namespace` (p. ej. el nombre de la tienda) el navegador usa un directorio de caché de disco
+    persistente propio (`.cache/chrome/<namespace>-<n>`): dos navegadores vivos nunca comparten directorio,
+    pero un navegador nuevo reutiliza la caché que dejó uno anterior. Si la versión en caché de chromedriver
+    ya no es compatible con Chrome, se vuelve a resolver una vez.
+
+    La creación del navegador y cada `driver.get` se registran en las métricas de la ejecución
+    (`creacion_driver` y `driver_get`).
+    """
+    slot = None
+    if cache_namespace:
+        slot = _acquire_cache_slot(cache_namespace)
+        options.add_argument(f"--disk-cache-dir={os.path.join(BROWSER_CACHE_DIR, f'{cache_namespace}-{slot}')}")
+    try:
+        with metrics.timer("creacion_driver"):
+            try:
+                driver = webdriver.Chrome(service=ChromeService(chromedriver_path(logger)), options=options)
+            except SessionNotCreatedException as e:
+                logger.warning(f"chromedriver en caché incompatible con Chrome ({e.msg}). Resolviendo de nuevo...")
+                driver = webdriver.Chrome(service=ChromeService(chromedriver_path(logger, refresh=True)), options=options)
+    except Exception:
+        if slot is not None:
+            _release_cache_slot(cache_namespace, slot)
+        raise
+
+    get = driver.get
+
+    def timed_get(url):
+        with metrics.timer("driver_get"):
+            return get(url)
+    driver.get = timed_get
+
+    if slot is not None:
+        # El directorio de caché queda libre para otro navegador cuando este se cierra.
+        quit_driver = driver.quit
+
+        def quit():
+            try:
+                quit_driver()
+            finally:
+                _release_cache_slot(cache_namespace, slot)
+        driver.quit = quit
+    return driver
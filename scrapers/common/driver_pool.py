@@ -0,0 +1,189 @@
+import threading
+from contextlib import contextmanager
+
+# Limpia el almacenamiento del origen actual antes de devolver la sesión al pool.
+_CLEAR_STORAGE_SCRIPT = """
+try { window.localStorage.clear(); } catch (e) {}
+try { window.sessionStorage.clear(); } catch (e) {}
+"""
+
+class DriverPool:
+    """
+    Pool de sesiones de WebDriver reutilizables y compartido por los hilos de la Fase 2.
+
+    Entrega navegadores ya iniciados en lugar de lanzar un Chrome nuevo por cada enlace.
+    Al devolver una sesión se borran sus cookies y su almacenamiento, y el navegador se recicla
+    (se cierra y se crea uno nuevo en el siguiente uso) cuando supera `max_pages` páginas o deja
+    de responder.
+
+    Con `warm > 0`, un hilo de fondo mantiene hasta `warm` navegadores extra ya iniciados y libres, de modo
+    que al empezar la Fase 2 o al reciclar un navegador la siguiente sesión se entrega sin esperar a Chrome.
+    """
+
+    def __init__(self, factory, logger, max_size=1, max_pages=50, profile=None, warm=0):
+        """
+        `factory` es una función sin argumentos que crea un WebDriver (p. ej. `lambda: setup_driver(ua, logger)`).
+        `max_size` limita el número de navegadores vivos a la vez; `max_pages` es el número de páginas
+        tras el cual un navegador se recicla. Si se entrega un `ScrapeProfile`, se le notifica cada sesión
+        entregada y cada página cargada. `warm` es el número de navegadores precalentados que se mantienen
+        libres, además de los `max_size` en uso.
+        """
+        self.factory = factory
+        self.logger = logger
+        self.max_size = max(1, max_size)
+        self.max_pages = max_pages
+        self.profile = profile
+        self._idle = []
+        self._pages = {}  # id(driver) -> páginas cargadas desde su creación
+        self._live = 0
+        self._closed = False
+        self._lock = threading.Condition()
+        self.created = 0
+        self.recycled = 0
+        self.warm = max(0, warm)
+        self._warming = 0
+        self._warmer = None
+        if self.warm:
+            self._warmer = threading.Thread(target=self._keep_warm, name="driver-warmer", daemon=True)
+            self._warmer.start()
+
+    def _create(self):
+        driver = self.factory()
+        if driver is None:
+            raise RuntimeError("La fábrica de WebDriver no pudo crear una sesión.")
+        with self._lock:
+            self._pages[id(driver)] = 0
+            self.created += 1
+        return driver
+
+    def _needs_warming(self):
+        return len(self._idle) + self._warming < self.warm and self._live < self.max_size + self.warm
+
+    def _keep_warm(self):
+        """Hilo de fondo: crea navegadores hasta que haya `warm` libres (o en camino)."""
+        while True:
+            with self._lock:
+                while not self._closed and not self._needs_warming():
+                    self._lock.wait()
+                if self._closed:
+                    return
+                self._live += 1
+                self._warming += 1
+            try:
+                driver = self._create()
+            except Exception as e:
+                self.logger.warning(f"No se pudo precalentar un WebDriver: {e}")
+                with self._lock:
+                    self._live -= 1
+                    self._warming -= 1
+                    self._lock.notify_all()
+                    # Evita reintentar en bucle si Chrome no puede iniciar.
+                    self._lock.wait(timeout=10)
+                continue
+            with self._lock:
+                self._warming -= 1
+                closed = self._closed
+                if not closed:
+                    self._idle.append(driver)
+                    self._lock.notify_all()
+            if closed:
+                self._discard(driver)
+
+    def acquire(self):
+        """Entrega una sesión libre, creando una nueva si hay cupo o esperando a que otra se libere."""
+        with self._lock:
+            while True:
+                if self._closed:
+                    raise RuntimeError("El pool de WebDriver está cerrado.")
+                if self._idle:
+                    driver = self._idle.pop()
+                    # Avisa al hilo de precalentamiento que hay un navegador libre menos.
+                    self._lock.notify_all()
+                    return driver
+                if self._live < self.max_size:
+                    self._live += 1
+                    break
+                self._lock.wait()
+        try:
+            return self._create()
+        except Exception:
+            with self._lock:
+                self._live -= 1
+                self._lock.notify_all()
+            raise
+
+    def release(self, driver):
+        """Devuelve una sesión al pool, limpiándola o reciclándola según corresponda."""
+        with self._lock:
+            pages = self._pages.get(id(driver), 0)
+            closed = self._closed
+
+        if closed:
+            self._discard(driver)
+            return
+        if pages < self.max_pages and self._reset(driver):
+            with self._lock:
+                self._idle.append(driver)
+                self._lock.notify_all()
+            return
+
+        reason = "límite de páginas alcanzado" if pages >= self.max_pages else "sesión no saludable"
+        self.logger.info(f"Reciclando WebDriver tras {pages} páginas ({reason}).")
+        self._discard(driver)
+        with self._lock:
+            self.recycled += 1
+
+    @contextmanager
+    def session(self):
+        """Context manager que adquiere una sesión y la devuelve al pool al salir."""
+        driver = self.acquire()
+        try:
+            if self.profile:
+                self.profile.begin_session(driver)
+            yield driver
+        finally:
+            self.release(driver)
+
+    def count_page(self, driver):
+        """Registra que la sesión cargó una página más (para el reciclaje por número de páginas)."""
+        with self._lock:
+            self._pages[id(driver)] = self._pages.get(id(driver), 0) + 1
+        if self.profile:
+            self.profile.record_page(driver)
+
+    def _reset(self, driver):
+        """Borra cookies y almacenamiento de la sesión. Retorna False si el navegador no responde."""
+        try:
+            driver.execute_script(_CLEAR_STORAGE_SCRIPT)
+            try:
+                # Borra las cookies de todos los dominios, no solo las del dominio actual.
+                driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+            except Exception:
+                driver.delete_all_cookies()
+            driver.get("about:blank")
+            return True
+        except Exception as e:
+            self.logger.warning(f"La sesión de WebDriver no respondió al limpiarla: {e}")
+            return False
+
+    def _discard(self, driver):
+        try:
+            driver.quit()
+        except Exception as e:
+            self.logger.warning(f"Error cerrando WebDriver: {e}")
+        with self._lock:
+            self._pages.pop(id(driver), None)
+            self._live -= 1
+            self._lock.notify_all()
+
+    def close(self):
+        """Cierra todas las sesiones libres. Las que estén en uso se cierran al devolverse."""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._lock.notify_all()
+        if self._warmer:
+            self._warmer.join()
+        for driver in idle:
+            self._discard(driver)
+        self.logger.info(f"Pool de WebDriver cerrado: {self.created} navegadores creados, {self.recycled} reciclados.")
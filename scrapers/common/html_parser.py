@@ -0,0 +1,54 @@
+import os
+import re
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+from scrapers.common import metrics
+
+try:
+    import lxml  # noqa: F401  (solo se comprueba que el backend esté instalado)
+    _LXML_AVAILABLE = True
+except ImportError:
+    _LXML_AVAILABLE = False
+
+# Backend por defecto: el parser de la librería estándar, que es el que generó los datos históricos.
+# lxml (en C) es más rápido pero repara el HTML mal formado de otra manera, así que se activa explícitamente
+# con la variable de entorno SCRAPERS_HTML_PARSER=lxml (se ignora si lxml no está instalado).
+_REQUESTED_BACKEND = os.environ.get("SCRAPERS_HTML_PARSER", "html.parser")
+DEFAULT_BACKEND = "html.parser" if _REQUESTED_BACKEND == "lxml" and not _LXML_AVAILABLE else _REQUESTED_BACKEND
+
+# Selectores simples de la forma "etiqueta.clase" o "etiqueta#id", que pueden traducirse a un SoupStrainer.
+_SIMPLE_SELECTOR = re.compile(r"^(?P<tag>[a-zA-Z][\w-]*)(?:\.(?P<cls>[\w-]+)|#(?P<id>[\w-]+))?$")
+
+def _strainer_for(selector):
+    """Traduce un selector simple a un `SoupStrainer`; retorna None si el selector no es simple."""
+    match = _SIMPLE_SELECTOR.match(selector.strip())
+    if not match:
+        return None
+    if match.group("cls"):
+        # Durante el parseo el atributo class aún es una cadena ("a b c"): se busca la clase como palabra completa.
+        class_pattern = re.compile(r"(?:^|\s)" + re.escape(match.group("cls")) + r"(?:\s|$)")
+        return SoupStrainer(match.group("tag"), class_=class_pattern)
+    if match.group("id"):
+        return SoupStrainer(match.group("tag"), id=match.group("id"))
+    return SoupStrainer(match.group("tag"))
+
+def parse_html(html, backend=None):
+    """Parsea un documento HTML completo con el backend indicado (o `DEFAULT_BACKEND`)."""
+    with metrics.timer("parseo_html"):
+        return BeautifulSoup(html, backend or DEFAULT_BACKEND)
+
+def parse_listing(html, card_selector, backend=None):
+    """
+    Parsea solo los subárboles de las tarjetas de producto de un listado.
+
+    Cuando `card_selector` es simple ("etiqueta.clase"), el árbol se construye únicamente para las tarjetas
+    y su contenido; el resto de la página (cabecera, menús, scripts, pie) se descarta durante el parseo.
+    El resultado es un `BeautifulSoup` normal: `soup.select(card_selector)` y los `select_one` dentro de cada
+    tarjeta funcionan igual que sobre la página completa. Con selectores compuestos se parsea la página entera.
+    """
+    strainer = _strainer_for(card_selector)
+    if strainer is None:
+        return parse_html(html, backend)
+    with metrics.timer("parseo_html"):
+        return BeautifulSoup(html, backend or DEFAULT_BACKEND, parse_only=strainer)
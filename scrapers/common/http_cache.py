@@ -0,0 +1,155 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS respuestas (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    archivo TEXT NOT NULL,
+    bytes INTEGER NOT NULL,
+    usado REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_respuestas_usado ON respuestas (usado);
+"""
+
+class ResponseCache:
+    """
+    Caché persistente de respuestas HTTP por URL, con revalidación condicional.
+
+    Guarda el cuerpo de cada respuesta que trae `ETag` o `Last-Modified` en `cuerpos/` y sus validadores en un
+    índice SQLite. En la ejecución siguiente `validators(url)` entrega las cabeceras `If-None-Match` /
+    `If-Modified-Since`: si el servidor responde 304, el cuerpo se lee del disco (`hit`) sin volver a transferirse.
+    El tamaño total se limita a `max_bytes` descartando las respuestas usadas hace más tiempo (LRU).
+    Es seguro para hilos.
+    """
+
+    def __init__(self, store, directory, logger, max_bytes=256 * 1024 * 1024):
+        self.store = store
+        self.directory = directory
+        self.logger = logger
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.uncacheable = 0
+        self.bytes_saved = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(directory, "cuerpos"), exist_ok=True)
+        self._conn = sqlite3.connect(os.path.join(directory, "indice.sqlite3"), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._total_bytes = self._conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM respuestas").fetchone()[0]
+
+    def _body_path(self, relative):
+        return os.path.join(self.directory, relative)
+
+    def validators(self, url):
+        """Cabeceras de la petición condicional para una URL en caché (vacío si no está)."""
+        with self._lock:
+            row = self._conn.execute("SELECT etag, last_modified FROM respuestas WHERE url = ?", (url,)).fetchone()
+        if not row:
+            return {}
+        etag, last_modified = row
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        return headers
+
+    def hit(self, url):
+        """
+        El servidor respondió 304: retorna el cuerpo guardado de la URL y la marca como usada.
+        Retorna None si el cuerpo ya no está en disco (hay que repetir la petición sin validadores).
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT archivo FROM respuestas WHERE url = ?", (url,)).fetchone()
+            if row:
+                try:
+                    with open(self._body_path(row[0]), 'rb') as f:
+                        body = f.read()
+                except OSError:
+                    body = None
+                if body is not None:
+                    with self._conn:
+                        self._conn.execute("UPDATE respuestas SET usado = ? WHERE url = ?", (time.time(), url))
+                    self.hits += 1
+                    self.bytes_saved += len(body)
+                    return body
+            self._forget(url)
+            return None
+
+    def put(self, url, headers, body):
+        """Registra una respuesta completa (200). Solo se guarda si trae `ETag` o `Last-Modified`."""
+        etag = headers.get("ETag")
+        last_modified = headers.get("Last-Modified")
+        with self._lock:
+            self.misses += 1
+            if not etag and not last_modified:
+                self.uncacheable += 1
+                self._forget(url)
+                return
+            relative = os.path.join("cuerpos", hashlib.sha1(url.encode('utf-8')).hexdigest())
+            path = self._body_path(relative)
+            tmp_path = path + ".tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(body)
+            os.replace(tmp_path, path)
+            previous = self._conn.execute("SELECT bytes FROM respuestas WHERE url = ?", (url,)).fetchone()
+            with self._conn:
+                self._conn.execute(
+                    "INSERT INTO respuestas (url, etag, last_modified, archivo, bytes, usado) VALUES (?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (url) DO UPDATE SET etag = excluded.etag, last_modified = excluded.last_modified, "
+                    "archivo = excluded.archivo, bytes = excluded.bytes, usado = excluded.usado",
+                    (url, etag, last_modified, relative, len(body), time.time()),
+                )
+            self._total_bytes += len(body) - (previous[0] if previous else 0)
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _forget(self, url):
+        row = self._conn.execute("SELECT archivo, bytes FROM respuestas WHERE url = ?", (url,)).fetchone()
+        if row:
+            with self._conn:
+                self._conn.execute("DELETE FROM respuestas WHERE url = ?", (url,))
+            self._remove_body(row[0])
+            self._total_bytes -= row[1]
+
+    def _remove_body(self, relative):
+        try:
+            os.remove(self._body_path(relative))
+        except FileNotFoundError:
+            pass
+
+    def _evict(self):
+        """Descarta las respuestas menos usadas recientemente hasta quedar en el 90 % de `max_bytes`."""
+        target = self.max_bytes * 0.9
+        evicted = []
+        for url, relative, size in self._conn.execute("SELECT url, archivo, bytes FROM respuestas ORDER BY usado"):
+            if self._total_bytes <= target:
+                break
+            evicted.append((url, relative))
+            self._total_bytes -= size
+        with self._conn:
+            self._conn.executemany("DELETE FROM respuestas WHERE url = ?", [(url,) for url, _ in evicted])
+        for _, relative in evicted:
+            self._remove_body(relative)
+        self.logger.debug(f"Caché HTTP de {self.store}: {len(evicted)} respuestas descartadas por tamaño.")
+
+    def report(self):
+        requests_made = self.hits + self.misses
+        rate = self.hits / requests_made * 100 if requests_made else 0.0
+        self.logger.info(
+            f"Caché HTTP de {self.store}: {self.hits} aciertos (304, {self.bytes_saved / 1024 / 1024:.1f} MiB sin "
+            f"transferir), {self.misses} fallos ({self.uncacheable} sin ETag ni Last-Modified); tasa de aciertos "
+            f"{rate:.1f} %; {self._total_bytes / 1024 / 1024:.1f} MiB en caché."
+        )
+
+    def close(self):
+        self.report()
+        with self._lock:
+            self._conn.close()
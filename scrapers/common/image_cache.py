@@ -0,0 +1,161 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+
+import aiohttp
+
+from scrapers.common.product_writer import iter_records
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+IMAGE_CACHE_ROOT = os.path.join(PROJECT_ROOT, "raw_data", "imagenes")
+
+_EXTENSIONS = {
+    "image/jpeg": ".jpg", "image/jpg": ".jpg", "image/png": ".png", "image/webp": ".webp",
+    "image/gif": ".gif", "image/avif": ".avif", "image/svg+xml": ".svg",
+}
+
+def manifest_path_for(store, root=IMAGE_CACHE_ROOT):
+    """Ruta del manifiesto de imágenes de una tienda."""
+    return os.path.join(root, f"manifiesto_{store.lower().replace(' ', '_')}.jsonl")
+
+class ImageCache:
+    """
+    Caché de imágenes en disco direccionado por contenido.
+
+    Cada imagen se guarda una sola vez en `objetos/<ab>/<sha256><ext>` según el hash de sus bytes, así que
+    dos URLs con la misma imagen (p. ej. el mismo producto en dos tiendas VTEX) comparten archivo. El índice
+    `indice.jsonl` (solo de anexado) recuerda qué archivo corresponde a cada URL descargada: las URLs que ya
+    están en el índice no se vuelven a descargar.
+    """
+
+    def __init__(self, root=IMAGE_CACHE_ROOT):
+        self.root = root
+        self.index_path = os.path.join(root, "indice.jsonl")
+        os.makedirs(os.path.join(root, "objetos"), exist_ok=True)
+        self.index = {}
+        if os.path.exists(self.index_path):
+            for entry in iter_records(self.index_path):
+                self.index[entry["url"]] = entry["archivo"]
+        # Se descartan las entradas cuyo archivo ya no existe (p. ej. si se borró parte del caché).
+        self.index = {url: path for url, path in self.index.items() if os.path.exists(os.path.join(root, path))}
+
+    def get(self, url):
+        """Ruta relativa (a `root`) de la imagen de una URL ya descargada, o None."""
+        return self.index.get(url)
+
+    def put(self, url, data, content_type=None):
+        """Guarda los bytes de una imagen y registra su URL. Retorna la ruta relativa a `root`."""
+        digest = hashlib.sha256(data).hexdigest()
+        extension = _EXTENSIONS.get((content_type or "").split(";")[0].strip().lower(), ".img")
+        relative = os.path.join("objetos", digest[:2], digest + extension)
+        path = os.path.join(self.root, relative)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = path + ".tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        self.index[url] = relative
+        with open(self.index_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({"url": url, "archivo": relative}, ensure_ascii=False) + "\n")
+        return relative
+
+class ImageFetcher:
+    """
+    Descarga imágenes con un grupo acotado de `max_concurrency` tareas asíncronas que comparten una
+    `aiohttp.ClientSession` (conexiones keep-alive) y las guarda en un `ImageCache`. Cada URL se descarga una
+    sola vez aunque la usen varios productos, y las que ya están en el caché se omiten.
+    """
+
+    def __init__(self, user_agent, logger, cache=None, max_concurrency=16, timeout=30, retries=2):
+        self.user_agent = user_agent
+        self.logger = logger
+        self.cache = cache or ImageCache()
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.retries = retries
+
+    async def _fetch(self, session, url):
+        for attempt in range(self.retries + 1):
+            try:
+                async with session.get(url) as response:
+                    response.raise_for_status()
+                    return await response.read(), response.headers.get("Content-Type")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                # Un 4xx (imagen inexistente) no mejora al reintentar.
+                if attempt == self.retries or (isinstance(e, aiohttp.ClientResponseError) and e.status < 500):
+                    raise
+                self.logger.debug(f"Error descargando la imagen {url} (intento {attempt + 1}): {e}. Reintentando...")
+                await asyncio.sleep(2 ** attempt)
+
+    async def _worker(self, session, queue, stats):
+        while True:
+            url = await queue.get()
+            try:
+                data, content_type = await self._fetch(session, url)
+                self.cache.put(url, data, content_type)
+                stats["descargadas"] += 1
+                stats["bytes"] += len(data)
+            except Exception as e:
+                stats["fallidas"] += 1
+                self.logger.warning(f"No se pudo descargar la imagen {url}: {e}")
+            finally:
+                queue.task_done()
+
+    async def _fetch_all(self, urls, stats):
+        # La cola acotada mantiene en memoria solo las URLs que están por procesarse.
+        queue = asyncio.Queue(maxsize=self.max_concurrency * 4)
+        connector = aiohttp.TCPConnector(limit=self.max_concurrency, keepalive_timeout=60)
+        async with aiohttp.ClientSession(
+            connector=connector,
+            headers={"User-Agent": self.user_agent, "Accept": "image/avif,image/webp,image/*,*/*;q=0.8"},
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+        ) as session:
+            workers = [asyncio.create_task(self._worker(session, queue, stats)) for _ in range(self.max_concurrency)]
+            for url in urls:
+                await queue.put(url)
+            await queue.join()
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    def fetch(self, urls):
+        """Descarga las URLs que no están en el caché. Retorna las estadísticas de la descarga."""
+        urls = [url for url in dict.fromkeys(urls) if url]
+        pending = [url for url in urls if self.cache.get(url) is None]
+        stats = {"en_cache": len(urls) - len(pending), "descargadas": 0, "fallidas": 0, "bytes": 0}
+        if pending:
+            asyncio.run(self._fetch_all(pending, stats))
+        return stats
+
+def fetch_store_images(products_filepath, store, user_agent, logger, root=IMAGE_CACHE_ROOT, max_concurrency=16):
+    """
+    Etapa posterior al scraping: descarga las imágenes (`url_imagen`) de los productos de una tienda que aún
+    no están en el caché y escribe el manifiesto `manifiesto_<tienda>.jsonl` con una línea por producto:
+    `url_producto`, `url_imagen` y `archivo` (ruta relativa a `root`, o None si la descarga falló).
+    """
+    start = time.monotonic()
+    products = {}
+    for record in iter_records(products_filepath):
+        image_url = record.get("url_imagen")
+        if record.get("url_producto") and image_url and image_url != "N/A":
+            products.setdefault(record["url_producto"], image_url)
+
+    fetcher = ImageFetcher(user_agent, logger, cache=ImageCache(root), max_concurrency=max_concurrency)
+    stats = fetcher.fetch(products.values())
+
+    manifest_path = manifest_path_for(store, root)
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        for product_url, image_url in products.items():
+            entry = {"url_producto": product_url, "url_imagen": image_url, "archivo": fetcher.cache.get(image_url)}
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    os.replace(tmp_path, manifest_path)
+    logger.info(
+        f"Imágenes de {store}: {stats['descargadas']} descargadas ({stats['bytes'] / 1024 / 1024:.1f} MiB), "
+        f"{stats['en_cache']} ya en caché, {stats['fallidas']} fallidas, para {len(products)} productos; "
+        f"manifiesto en '{manifest_path}' ({time.monotonic() - start:.2f} s)."
+    )
+    return stats
@@ -0,0 +1,166 @@
+import json
+import os
+import time
+from datetime import datetime
+
+from scrapers.common import metrics
+
+def _label(link, label_keys):
+    return tuple(link.get(key) for key in label_keys)
+
+def diff_links(previous, current, url_key, label_keys):
+    """
+    Compara dos versiones del catálogo de enlaces. Retorna un diccionario con listas de enlaces:
+    - `agregados` / `eliminados`: URLs que aparecen o desaparecen.
+    - `renombrados`: misma URL con otro nombre (`{"antes": ..., "ahora": ...}`).
+    - `movidos`: mismo nombre con otra URL (`{"antes": ..., "ahora": ...}`).
+    - `sin_cambios`: número de enlaces idénticos.
+    """
+    previous_by_url = {link[url_key]: link for link in previous}
+    current_by_url = {link[url_key]: link for link in current}
+
+    renamed, unchanged = [], 0
+    for url, link in current_by_url.items():
+        old = previous_by_url.get(url)
+        if old is None:
+            continue
+        if _label(old, label_keys) != _label(link, label_keys):
+            renamed.append({"antes": old, "ahora": link})
+        else:
+            unchanged += 1
+
+    added = [link for url, link in current_by_url.items() if url not in previous_by_url]
+    removed = [link for url, link in previous_by_url.items() if url not in current_by_url]
+
+    # Un enlace eliminado y uno agregado con el mismo nombre corresponden a una categoría cuya URL cambió.
+    removed_by_label = {}
+    for link in removed:
+        removed_by_label.setdefault(_label(link, label_keys), []).append(link)
+    moved, still_added = [], []
+    for link in added:
+        candidates = removed_by_label.get(_label(link, label_keys))
+        if candidates:
+            moved.append({"antes": candidates.pop(), "ahora": link})
+        else:
+            still_added.append(link)
+    moved_urls = {pair["antes"][url_key] for pair in moved}
+    still_removed = [link for link in removed if link[url_key] not in moved_urls]
+
+    return {
+        "agregados": still_added,
+        "eliminados": still_removed,
+        "renombrados": renamed,
+        "movidos": moved,
+        "sin_cambios": unchanged,
+    }
+
+class LinkCatalog:
+    """
+    Catálogo persistente de los enlaces de categorías de una tienda (resultado de la Fase 1).
+
+    El menú solo se vuelve a recorrer cuando el catálogo es más antiguo que `ttl_hours`. Cada actualización se
+    compara con la versión anterior (enlaces agregados, eliminados, renombrados o con URL nueva), el resumen se
+    anexa a `<catalogo>_cambios.jsonl` y la Fase 2 recibe únicamente los enlaces vigentes: los nuevos y los que no
+    cambiaron, nunca las URLs que desaparecieron del menú.
+
+    Si el catálogo no existe pero sí el archivo de enlaces anterior (`legacy_path`), se importa tomando como fecha
+    la de modificación del archivo. `legacy_loader(data)` convierte su contenido a la lista de enlaces.
+    """
+
+    def __init__(self, store, filepath, logger, ttl_hours, url_key="url", label_keys=(), legacy_path=None, legacy_loader=None):
+        self.store = store
+        self.filepath = filepath
+        self.logger = logger
+        self.ttl_hours = ttl_hours
+        self.url_key = url_key
+        self.label_keys = tuple(label_keys)
+        self.changes_path = os.path.splitext(filepath)[0] + "_cambios.jsonl"
+        self.links = []
+        self.updated_at = None
+        self._load(legacy_path, legacy_loader)
+
+    def _load(self, legacy_path, legacy_loader):
+        if os.path.exists(self.filepath):
+            try:
+                with open(self.filepath, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self.links = data.get("enlaces", [])
+                self.updated_at = data.get("actualizado")
+                return
+            except (OSError, ValueError) as e:
+                self.logger.warning(f"No se pudo leer el catálogo de enlaces '{self.filepath}': {e}. Se recorrerá el menú.")
+                return
+        if legacy_path and os.path.exists(legacy_path):
+            try:
+                with open(legacy_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                self.logger.warning(f"No se pudo importar el archivo de enlaces '{legacy_path}': {e}.")
+                return
+            self.links = legacy_loader(data) if legacy_loader else data
+            self.updated_at = os.path.getmtime(legacy_path)
+            self._save()
+            self.logger.info(f"Importados {len(self.links)} enlaces de '{legacy_path}' al catálogo '{self.filepath}'.")
+
+    def age_hours(self):
+        return (time.time() - self.updated_at) / 3600 if self.updated_at else None
+
+    def is_fresh(self):
+        age = self.age_hours()
+        return bool(self.links) and age is not None and age < self.ttl_hours
+
+    def get_links(self, crawl):
+        """
+        Retorna los enlaces vigentes para la Fase 2. Si el catálogo venció (o no existe), llama a `crawl()`
+        para recorrer el menú, calcula las diferencias y guarda la nueva versión. Si el recorrido falla o no
+        encuentra enlaces, se usa la versión anterior.
+        """
+        if self.is_fresh():
+            self.logger.info(f"--- FASE 1 Omitida: catálogo de enlaces vigente ({self.age_hours():.1f} h de {self.ttl_hours} h), "
+                             f"{len(self.links)} enlaces. ---")
+            return list(self.links)
+
+        if self.links:
+            self.logger.info(f"Catálogo de enlaces vencido ({self.age_hours():.1f} h de {self.ttl_hours} h). Actualizando menú...")
+        try:
+            with metrics.timer("fase1_menu"):
+                current = crawl()
+        except Exception as e:
+            self.logger.error(f"Error recorriendo el menú de {self.store}: {e}", exc_info=True)
+            current = None
+        if not current:
+            if self.links:
+                self.logger.warning(f"No se pudo actualizar el menú de {self.store}; se usan los {len(self.links)} enlaces anteriores.")
+            return list(self.links)
+
+        # Un enlace repetido en el menú se visita una sola vez.
+        current = list({link[self.url_key]: link for link in current}.values())
+        diff = diff_links(self.links, current, self.url_key, self.label_keys)
+        self._log_diff(diff, first=not self.links)
+        self.links = current
+        self.updated_at = time.time()
+        self._save()
+        return list(self.links)
+
+    def _log_diff(self, diff, first):
+        if first:
+            self.logger.info(f"Catálogo de enlaces creado con {diff['sin_cambios'] + len(diff['agregados'])} enlaces.")
+            return
+        self.logger.info(
+            f"Cambios en el menú de {self.store}: {len(diff['agregados'])} agregados, {len(diff['eliminados'])} eliminados, "
+            f"{len(diff['renombrados'])} renombrados, {len(diff['movidos'])} con URL nueva, {diff['sin_cambios']} sin cambios."
+        )
+        for link in diff["eliminados"]:
+            self.logger.info(f"  - Eliminado: {link[self.url_key]}")
+        for link in diff["agregados"]:
+            self.logger.info(f"  + Agregado: {link[self.url_key]}")
+        record = {"fecha": datetime.now().isoformat(timespec="seconds"), **diff}
+        with open(self.changes_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.filepath) or ".", exist_ok=True)
+        tmp_path = self.filepath + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"tienda": self.store, "actualizado": self.updated_at, "enlaces": self.links}, f, indent=4, ensure_ascii=False)
+        os.replace(tmp_path, self.filepath)
@@ -0,0 +1,129 @@
+import atexit
+import copy
+import itertools
+import json
+import logging
+import queue
+import threading
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+
+from scrapers.common import metrics
+
+# Listeners activos por nombre de logger (ver `start_queue_logging`).
+_listeners = {}
+_lock = threading.Lock()
+_traceback_formatter = logging.Formatter()
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formatea cada registro como una línea JSON con `fecha`, `nivel`, `logger`, `tienda`, `categoria`, `pagina` y
+    `mensaje` (más `muestreo` si el registro representa a varios, y `excepcion` con el traceback si lo hay).
+    """
+
+    def format(self, record):
+        entry = {
+            "fecha": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "nivel": record.levelname,
+            "logger": record.name,
+            "tienda": getattr(record, "tienda", None),
+            "categoria": getattr(record, "categoria", None),
+            "pagina": getattr(record, "pagina", None),
+            "mensaje": record.getMessage(),
+        }
+        if getattr(record, "muestreo", None):
+            entry["muestreo"] = record.muestreo
+        if record.exc_info:
+            entry["excepcion"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["excepcion"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+class ContextFilter(logging.Filter):
+    """
+    Agrega al registro la tienda y la categoría en la que trabaja el hilo que lo emite (la etiqueta `categoria`
+    de `metrics.labels`). Debe ejecutarse en ese hilo, antes de encolar el registro.
+    """
+
+    def __init__(self, store):
+        super().__init__()
+        self.store = store
+
+    def filter(self, record):
+        record.tienda = self.store
+        if not hasattr(record, "categoria"):
+            record.categoria = metrics.current_labels().get("categoria")
+        if not hasattr(record, "pagina"):
+            record.pagina = None
+        return True
+
+class SamplingFilter(logging.Filter):
+    """
+    Muestreo por nivel de los mensajes repetitivos por página (los que se emiten con `extra={"pagina": n}`):
+    con `rates = {logging.INFO: 10}` se conserva uno de cada 10 mensajes INFO por página, marcado con
+    `muestreo=10`. Los mensajes sin página y los niveles sin tasa pasan siempre.
+    """
+
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = {level: rate for level, rate in rates.items() if rate > 1}
+        self._counters = {level: itertools.count() for level in self.rates}
+
+    def filter(self, record):
+        rate = self.rates.get(record.levelno)
+        if rate is None or getattr(record, "pagina", None) is None:
+            return True
+        if next(self._counters[record.levelno]) % rate:
+            return False
+        record.muestreo = rate
+        return True
+
+class _DeferredQueueHandler(QueueHandler):
+    """
+    `QueueHandler` que resuelve en el hilo que registra solo el mensaje (con sus argumentos, que pueden cambiar
+    después de encolarlo) y el texto del traceback (el objeto de la excepción no debe cruzar de hilo). A diferencia
+    de `QueueHandler.prepare`, no los une en un solo texto: el formato se aplica en el hilo del listener y
+    `JsonFormatter` conserva el traceback en su propio campo (`exc_text`).
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _traceback_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+def start_queue_logging(logger, handlers, store=None, sampling=None):
+    """
+    Conecta `logger` a `handlers` a través de una cola: el hilo que registra solo aplica el muestreo (ver
+    `SamplingFilter`), agrega el contexto (ver `ContextFilter`) y encola el registro; un `QueueListener` en
+    segundo plano lo formatea y lo escribe. El listener se detiene con `close_logger` o al salir del proceso.
+    """
+    queue_handler = _DeferredQueueHandler(queue.SimpleQueue())
+    if sampling:
+        queue_handler.addFilter(SamplingFilter(sampling))
+    queue_handler.addFilter(ContextFilter(store or logger.name))
+    listener = QueueListener(queue_handler.queue, *handlers, respect_handler_level=True)
+    listener.start()
+    with _lock:
+        _listeners[logger.name] = listener
+    logger.addHandler(queue_handler)
+    return listener
+
+def close_logger(logger):
+    """Escribe los registros pendientes de `logger`, detiene su listener y cierra sus handlers."""
+    with _lock:
+        listener = _listeners.pop(logger.name, None)
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    if listener is not None:
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+
+@atexit.register
+def _close_all():
+    for name in list(_listeners):
+        close_logger(logging.getLogger(name))
@@ -0,0 +1,278 @@
+import hashlib
+import json
+import math
+import os
+import time
+from collections import Counter, defaultdict
+
+import numpy as np
+
+from scrapers.common.normalize import fold, parse_quantity, tokenize
+from scrapers.common.product_record import as_dict
+from scrapers.common.product_writer import iter_records
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+# Archivo de productos de la última ejecución de cada tienda.
+DEFAULT_SOURCES = {
+    "Jumbo": os.path.join(PROJECT_ROOT, "raw_data", "jumbo", "productos_jumbo.jsonl"),
+    "Carulla": os.path.join(PROJECT_ROOT, "raw_data", "carulla", "productos_carulla.jsonl"),
+    "Mercado Zapatoca": os.path.join(PROJECT_ROOT, "raw_data", "zapatoca", "productos_zapatoca.jsonl"),
+}
+CANONICAL_FILEPATH = os.path.join(PROJECT_ROOT, "raw_data", "productos_canonicos.jsonl")
+
+def _trigrams(text):
+    padded = f"  {text} "
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+class _UnionFind:
+    """Agrupa productos en grupos que nunca contienen dos productos de la misma tienda."""
+
+    def __init__(self, stores):
+        self.parent = list(range(len(stores)))
+        self.stores = [{store} for store in stores]
+
+    def find(self, i):
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, i, j):
+        root_i, root_j = self.find(i), self.find(j)
+        if root_i == root_j or self.stores[root_i] & self.stores[root_j]:
+            return False
+        self.parent[root_j] = root_i
+        self.stores[root_i] |= self.stores[root_j]
+        return True
+
+class ProductMatcher:
+    """
+    Empareja los mismos productos entre tiendas y les asigna un identificador canónico.
+
+    1. Normalización (`scrapers.common.normalize`): nombre y marca sin tildes ni mayúsculas, y el contenido
+       ("x5kg", "500 g", "1 L") en unidades base.
+    2. Marca: cada tienda informa la marca de forma distinta (Zapatoca toma la primera palabra del nombre), así que se
+       busca en el nombre la marca conocida más larga —las marcas que alguna tienda reporta fuera de la primera
+       palabra— y, si no hay, se usa la marca reportada o, sin marca, la primera palabra del nombre.
+    3. Bloqueo: solo se comparan productos de tiendas distintas con la misma marca y el mismo contenido (cantidad,
+       unidad y unidades del empaque). Los bloques de más de `max_block` productos se subdividen por la primera
+       palabra del nombre, luego por la segunda, y así hasta que quepan o se acaben las palabras.
+    4. Puntaje: similitud coseno de trigramas de caracteres con pesos TF-IDF, calculada por bloque como un
+       producto de matrices (NumPy), de a `max_block` filas para acotar la memoria de los bloques que no se pudieron
+       subdividir. Los pares sobre `threshold` se unen de mayor a menor puntaje, sin juntar nunca dos productos de
+       la misma tienda.
+
+    Cada grupo conserva el identificador canónico que la mayoría de sus productos tenía en la tabla anterior
+    (`previous_ids`); si un grupo anterior se dividió, lo conserva la parte más grande. Los grupos sin
+    identificador previo reciben uno nuevo, derivado de la menor URL del grupo.
+    """
+
+    def __init__(self, logger, threshold=0.6, max_block=2000):
+        self.logger = logger
+        self.threshold = threshold
+        self.max_block = max_block
+
+    def _resolve_brands(self, names, brands):
+        """Marca normalizada de cada producto (ver paso 2)."""
+        known = Counter()
+        for tokens, brand in zip(names, brands):
+            brand_tokens = tuple(tokenize(brand, folded=True))
+            if brand_tokens and tokens[:len(brand_tokens)] != list(brand_tokens):
+                known[brand_tokens] += 1
+        longest = max((len(brand) for brand in known), default=0)
+
+        resolved = []
+        for tokens, brand in zip(names, brands):
+            best = None
+            for size in range(min(longest, len(tokens)), 0, -1):
+                hits = [tuple(tokens[i:i + size]) for i in range(len(tokens) - size + 1) if tuple(tokens[i:i + size]) in known]
+                if hits:
+                    best = max(hits, key=lambda hit: known[hit])
+                    break
+            if best:
+                resolved.append(" ".join(best))
+            elif brand and brand != "n a":
+                resolved.append(brand)
+            else:
+                # Sin marca, se bloquea por la primera palabra del nombre, como hace Zapatoca.
+                resolved.append(tokens[0] if tokens else "")
+        return resolved
+
+    def match(self, products, previous_ids=None):
+        """
+        Empareja una lista de productos (`ProductRecord` o diccionarios, con su `tienda`).
+        `previous_ids` (`{(tienda, url_producto): id_canonico}`, ver `load_assignments`) es la asignación de la
+        ejecución anterior. Retorna una fila por producto con su `id_canonico`.
+        """
+        start = time.monotonic()
+        products = [as_dict(product) for product in products]
+        folded_names = [fold(product.get("nombre_completo")) for product in products]
+        names = [tokenize(name, folded=True) for name in folded_names]
+        brands = self._resolve_brands(names, [fold(product.get("marca")) for product in products])
+        quantities = [parse_quantity(name, folded=True) for name in folded_names]
+        stores = [product.get("tienda") for product in products]
+
+        # Texto que se compara: el nombre sin la marca ni el contenido, que ya coinciden dentro del bloque.
+        texts = []
+        for tokens, brand in zip(names, brands):
+            brand_tokens = set(brand.split())
+            texts.append(" ".join(token for token in tokens if token not in brand_tokens) or " ".join(tokens))
+        document_frequency = Counter()
+        for text in texts:
+            document_frequency.update(set(_trigrams(text)))
+        idf = {gram: math.log(len(texts) / count) + 1.0 for gram, count in document_frequency.items()}
+
+        blocks = defaultdict(list)
+        for i, (brand, quantity) in enumerate(zip(brands, quantities)):
+            if brand:
+                size = tuple(quantity) if quantity else None
+                blocks[(brand, size)].append(i)
+        blocks = self._split_large(blocks, names)
+
+        comparisons = 0
+        pairs = []
+        for members in blocks.values():
+            if len(members) < 2 or len({stores[i] for i in members}) < 2:
+                continue
+            comparisons += len(members) * (len(members) - 1) // 2
+            pairs.extend(self._score_block(members, texts, stores, idf))
+
+        groups = _UnionFind(stores)
+        best_score = [None] * len(products)
+        for score, i, j in sorted(pairs, reverse=True):
+            if groups.union(i, j):
+                best_score[i] = max(best_score[i] or 0.0, score)
+                best_score[j] = max(best_score[j] or 0.0, score)
+
+        members_by_root = defaultdict(list)
+        for i in range(len(products)):
+            members_by_root[groups.find(i)].append(i)
+        canonical_ids = self._assign_ids(members_by_root.values(), products, stores, previous_ids or {})
+        rows = []
+        for root, members in members_by_root.items():
+            canonical_id = canonical_ids[root]
+            for i in members:
+                rows.append({
+                    "id_canonico": canonical_id,
+                    "tienda": stores[i],
+                    "url_producto": products[i].get("url_producto"),
+                    "nombre_completo": products[i].get("nombre_completo"),
+                    "marca_normalizada": brands[i],
+                    "cantidad": quantities[i].cantidad if quantities[i] else None,
+                    "unidad": quantities[i].unidad if quantities[i] else None,
+                    "puntaje": round(best_score[i], 3) if best_score[i] is not None else None,
+                })
+
+        all_pairs = len(products) * (len(products) - 1) // 2
+        shared = sum(1 for members in members_by_root.values() if len(members) > 1)
+        self.logger.info(
+            f"Emparejamiento: {len(products)} productos en {len(blocks)} bloques; {comparisons} comparaciones "
+            f"(de {all_pairs} posibles); {shared} productos canónicos presentes en más de una tienda; "
+            f"{time.monotonic() - start:.2f} s."
+        )
+        return rows
+
+    def _assign_ids(self, groups, products, stores, previous_ids):
+        """
+        Identificador canónico de cada grupo (`{raíz: id}`): el identificador anterior con más votos dentro del
+        grupo, si ningún grupo con más votos lo reclamó antes; si no, uno nuevo que no choque con los existentes.
+        """
+        claims = []
+        for members in groups:
+            votes = Counter(previous_ids.get((stores[i], products[i].get("url_producto"))) for i in members)
+            votes.pop(None, None)
+            for canonical_id, count in votes.items():
+                claims.append((-count, canonical_id, members[0]))
+        taken = set(previous_ids.values())
+        assigned, claimed = {}, set()
+        for _, canonical_id, member in sorted(claims):
+            if member not in assigned and canonical_id not in claimed:
+                assigned[member] = canonical_id
+                claimed.add(canonical_id)
+
+        canonical_ids = {}
+        for members in groups:
+            canonical_id = assigned.get(members[0])
+            if canonical_id is None:
+                anchor = min(products[i].get("url_producto") or "" for i in members)
+                canonical_id = "p" + hashlib.sha1(anchor.encode("utf-8")).hexdigest()[:12]
+                suffix = 0
+                while canonical_id in taken:
+                    suffix += 1
+                    canonical_id = "p" + hashlib.sha1(f"{anchor}#{suffix}".encode("utf-8")).hexdigest()[:12]
+                taken.add(canonical_id)
+            canonical_ids[members[0]] = canonical_id
+        return canonical_ids
+
+    def _split_large(self, blocks, names):
+        """Subdivide los bloques de más de `max_block` productos por la palabra siguiente del nombre (ver paso 3)."""
+        result = {}
+        pending = [(key, members, 0) for key, members in blocks.items()]
+        while pending:
+            key, members, depth = pending.pop()
+            if len(members) <= self.max_block or all(len(names[i]) <= depth for i in members):
+                if len(members) > self.max_block:
+                    self.logger.warning(f"Bloque {key} de {len(members)} productos sin más palabras para subdividir.")
+                result[key] = members
+                continue
+            parts = defaultdict(list)
+            for i in members:
+                parts[names[i][depth] if len(names[i]) > depth else ""].append(i)
+            pending.extend((key + (word,), part, depth + 1) for word, part in parts.items())
+        return result
+
+    def _score_block(self, members, texts, stores, idf):
+        """Pares `(puntaje, i, j)` de tiendas distintas de un bloque con similitud sobre el umbral."""
+        columns = {}
+        rows, cols, values = [], [], []
+        for row, i in enumerate(members):
+            for gram, count in Counter(_trigrams(texts[i])).items():
+                rows.append(row)
+                cols.append(columns.setdefault(gram, len(columns)))
+                values.append(count * idf[gram])
+        matrix = np.zeros((len(members), len(columns)))
+        matrix[rows, cols] = values
+        matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+
+        codes = {}
+        store_ids = np.array([codes.setdefault(stores[i], len(codes)) for i in members])
+        pairs = []
+        for start in range(0, len(members), self.max_block):
+            similarity = matrix[start:start + self.max_block] @ matrix.T
+            candidates = (similarity >= self.threshold) & (store_ids[start:start + self.max_block, None] != store_ids[None, :])
+            left, right = np.nonzero(np.triu(candidates, k=start + 1))
+            pairs.extend((float(similarity[a, b]), members[start + a], members[b]) for a, b in zip(left, right))
+        return pairs
+
+def load_products(sources=None):
+    """
+    Carga los productos de cada tienda (`{tienda: ruta JSONL}`); omite los archivos que no existen.
+    Un producto listado en varias categorías de una tienda se carga una sola vez.
+    """
+    products = {}
+    for store, path in (sources or DEFAULT_SOURCES).items():
+        if os.path.exists(path):
+            for record in iter_records(path):
+                products.setdefault((store, record.get("url_producto")), dict(record, tienda=record.get("tienda") or store))
+    return list(products.values())
+
+def load_assignments(path=CANONICAL_FILEPATH):
+    """Asignación `{(tienda, url_producto): id_canonico}` de una tabla canónica anterior (vacía si no existe)."""
+    if not os.path.exists(path):
+        return {}
+    return {(row.get("tienda"), row.get("url_producto")): row["id_canonico"] for row in iter_records(path)}
+
+def build_canonical_table(logger, sources=None, output_path=CANONICAL_FILEPATH, threshold=0.6):
+    """
+    Empareja los productos de todas las tiendas y escribe la tabla de identificadores canónicos (JSONL). Los
+    identificadores de la tabla anterior en `output_path` se conservan (ver `ProductMatcher`).
+    """
+    rows = ProductMatcher(logger, threshold=threshold).match(load_products(sources), load_assignments(output_path))
+    tmp_path = output_path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+    os.replace(tmp_path, output_path)
+    logger.info(f"Tabla de productos canónicos guardada en '{output_path}' ({len(rows)} filas).")
+    return rows
@@ -0,0 +1,222 @@
+import json
+import math
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+METRICS_DIR = os.path.join(PROJECT_ROOT, "logs", "metricas")
+PERCENTILES = (0.5, 0.9, 0.99)
+
+_current = None
+_context = threading.local()
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+def _context_labels():
+    return getattr(_context, "labels", {})
+
+class RunMetrics:
+    """
+    Temporizadores y contadores de una ejecución de un scraper.
+
+    Cada observación se guarda con sus etiquetas (p. ej. `categoria`); el reporte agrega por operación para toda la
+    tienda y por operación y categoría, con total, media, percentiles (`PERCENTILES`) y máximo. Es seguro para hilos.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.started_at = time.time()
+        self.finished_at = None
+        self._timers = defaultdict(list)  # (operación, etiquetas) -> segundos
+        self._counters = defaultdict(float)  # (contador, etiquetas) -> valor
+        self._lock = threading.Lock()
+
+    def observe(self, name, seconds, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._timers[key].append(seconds)
+
+    def count(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] += value
+
+    @staticmethod
+    def _summary(values):
+        values = sorted(values)
+        summary = {"n": len(values), "total_s": round(sum(values), 4), "media_s": round(sum(values) / len(values), 4)}
+        for fraction in PERCENTILES:
+            summary[f"p{round(fraction * 100)}_s"] = round(_percentile(values, fraction), 4)
+        summary["max_s"] = round(values[-1], 4)
+        return summary
+
+    def report(self):
+        """Reporte de la ejecución: duración, operaciones (por tienda y por categoría) y contadores."""
+        with self._lock:
+            timers = {key: list(values) for key, values in self._timers.items()}
+            counters = dict(self._counters)
+        by_operation = defaultdict(list)
+        by_category = defaultdict(list)
+        for (name, labels), values in timers.items():
+            by_operation[name].extend(values)
+            category = dict(labels).get("categoria")
+            if category:
+                by_category[(name, category)].extend(values)
+
+        counter_totals = defaultdict(float)
+        counters_by_category = defaultdict(float)
+        for (name, labels), value in counters.items():
+            counter_totals[name] += value
+            category = dict(labels).get("categoria")
+            if category:
+                counters_by_category[(name, category)] += value
+
+        categories = defaultdict(lambda: {"operaciones": {}, "contadores": {}})
+        for (name, category), values in by_category.items():
+            categories[category]["operaciones"][name] = self._summary(values)
+        for (name, category), value in counters_by_category.items():
+            categories[category]["contadores"][name] = value
+        finished_at = self.finished_at or time.time()
+        return {
+            "tienda": self.store,
+            "inicio": datetime.fromtimestamp(self.started_at).isoformat(timespec="seconds"),
+            "duracion_s": round(finished_at - self.started_at, 3),
+            "operaciones": {name: self._summary(values) for name, values in sorted(by_operation.items())},
+            "contadores": dict(sorted(counter_totals.items())),
+            "categorias": {category: categories[category] for category in sorted(categories)},
+        }
+
+    def prometheus(self, report=None):
+        """El reporte en formato de texto de Prometheus (un `summary` por operación y un contador por evento)."""
+        report = report or self.report()
+        store = _escape(self.store)
+        lines = [
+            "# HELP scraper_operacion_segundos Duración de las operaciones de un scraper.",
+            "# TYPE scraper_operacion_segundos summary",
+        ]
+
+        def summary_lines(name, summary, extra=""):
+            labels = f'tienda="{store}",operacion="{_escape(name)}"{extra}'
+            for fraction in PERCENTILES:
+                lines.append(f'scraper_operacion_segundos{{{labels},quantile="{fraction}"}} {summary[f"p{round(fraction * 100)}_s"]}')
+            lines.append(f"scraper_operacion_segundos_sum{{{labels}}} {summary['total_s']}")
+            lines.append(f"scraper_operacion_segundos_count{{{labels}}} {summary['n']}")
+
+        for name, summary in report["operaciones"].items():
+            summary_lines(name, summary)
+        for category, data in report["categorias"].items():
+            for name, summary in data["operaciones"].items():
+                summary_lines(name, summary, f',categoria="{_escape(category)}"')
+
+        lines += ["# HELP scraper_eventos_total Contadores de un scraper.", "# TYPE scraper_eventos_total counter"]
+        for name, value in report["contadores"].items():
+            lines.append(f'scraper_eventos_total{{tienda="{store}",contador="{_escape(name)}"}} {value:g}')
+        for category, data in report["categorias"].items():
+            for name, value in data["contadores"].items():
+                lines.append(f'scraper_eventos_total{{tienda="{store}",contador="{_escape(name)}",categoria="{_escape(category)}"}} {value:g}')
+
+        lines += ["# HELP scraper_duracion_segundos Duración total de la ejecución.", "# TYPE scraper_duracion_segundos gauge",
+                  f'scraper_duracion_segundos{{tienda="{store}"}} {report["duracion_s"]}']
+        return "\n".join(lines) + "\n"
+
+    def save(self, logger, directory=METRICS_DIR):
+        """
+        Escribe el reporte JSON de la ejecución (`<tienda>_<fecha>.json`) y el archivo de Prometheus de la última
+        ejecución de la tienda (`<tienda>.prom`, para el recolector de archivos de texto de node_exporter).
+        """
+        self.finished_at = self.finished_at or time.time()
+        report = self.report()
+        os.makedirs(directory, exist_ok=True)
+        slug = self.store.lower().replace(" ", "_")
+        stamp = datetime.fromtimestamp(self.started_at).strftime("%Y%m%d_%H%M%S")
+        json_path = os.path.join(directory, f"{slug}_{stamp}.json")
+        prom_path = os.path.join(directory, f"{slug}.prom")
+        for path, content in ((json_path, json.dumps(report, indent=4, ensure_ascii=False)), (prom_path, self.prometheus(report))):
+            tmp_path = path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+
+        logger.info(f"Métricas de {self.store} guardadas en '{json_path}' y '{prom_path}'. Tiempo por operación:")
+        for name, summary in sorted(report["operaciones"].items(), key=lambda item: item[1]["total_s"], reverse=True):
+            logger.info(f"  {name:<20} {summary['total_s']:>10.2f} s en {summary['n']:>6} llamadas  "
+                        f"(p50 {summary['p50_s']:.3f} s, p90 {summary['p90_s']:.3f} s, p99 {summary['p99_s']:.3f} s)")
+        return report
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def start_run(store):
+    """Inicia el registro de métricas de la ejecución de una tienda en este proceso y lo retorna."""
+    global _current
+    _current = RunMetrics(store)
+    return _current
+
+def finish_run(logger, directory=METRICS_DIR):
+    """Guarda las métricas de la ejecución en curso (ver `RunMetrics.save`) y deja de registrar."""
+    global _current
+    run, _current = _current, None
+    return run.save(logger, directory) if run else None
+
+def observe(name, seconds, **labels):
+    """Registra la duración de una operación, con las etiquetas del hilo (ver `labels`) más las indicadas."""
+    captured = getattr(_context, "captured", None)
+    if captured is not None:
+        captured.append((name, seconds))
+        return
+    if _current is not None:
+        _current.observe(name, seconds, **{**_context_labels(), **labels})
+
+def count(name, value=1, **labels):
+    """Suma `value` a un contador."""
+    if _current is not None:
+        _current.count(name, value, **{**_context_labels(), **labels})
+
+@contextmanager
+def timer(name, **labels):
+    """`with timer("driver_get"):` mide el bloque y lo registra con `observe`."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start, **labels)
+
+def sleep(seconds):
+    """`time.sleep` que registra la espera fija como operación `espera_fija`."""
+    with timer("espera_fija"):
+        time.sleep(seconds)
+
+def current_labels():
+    """Etiquetas activas en este hilo (ver `labels`)."""
+    return dict(_context_labels())
+
+@contextmanager
+def labels(**values):
+    """Etiquetas (p. ej. `categoria`) que se agregan a las métricas registradas por este hilo dentro del bloque."""
+    previous = _context_labels()
+    _context.labels = {**previous, **values}
+    try:
+        yield
+    finally:
+        _context.labels = previous
+
+@contextmanager
+def capture():
+    """
+    Acumula en una lista `(operación, segundos)` las observaciones de este hilo en lugar de registrarlas. Sirve en los
+    procesos de parseo, que no tienen registro propio: las observaciones se devuelven con el resultado al proceso principal.
+    """
+    previous = getattr(_context, "captured", None)
+    _context.captured = captured = []
+    try:
+        yield captured
+    finally:
+        _context.captured = previous
@@ -0,0 +1,98 @@
+import re
+import unicodedata
+from collections import namedtuple
+
+# Unidades reconocidas en los nombres de producto -> (unidad base, factor de conversión).
+UNITS = {
+    "g": ("g", 1.0), "gr": ("g", 1.0), "grs": ("g", 1.0), "gramo": ("g", 1.0), "gramos": ("g", 1.0),
+    "kg": ("g", 1000.0), "kgs": ("g", 1000.0), "kilo": ("g", 1000.0), "kilos": ("g", 1000.0), "kilogramos": ("g", 1000.0),
+    "mg": ("g", 0.001),
+    "lb": ("g", 453.592), "lbs": ("g", 453.592),
+    "oz": ("g", 28.3495),
+    "ml": ("ml", 1.0), "mililitros": ("ml", 1.0), "cc": ("ml", 1.0), "cm3": ("ml", 1.0),
+    "l": ("ml", 1000.0), "lt": ("ml", 1000.0), "lts": ("ml", 1000.0), "litro": ("ml", 1000.0), "litros": ("ml", 1000.0),
+    "gal": ("ml", 3785.41), "galon": ("ml", 3785.41),
+    "un": ("un", 1.0), "und": ("un", 1.0), "unds": ("un", 1.0), "unid": ("un", 1.0), "unidad": ("un", 1.0),
+    "unidades": ("un", 1.0), "u": ("un", 1.0),
+}
+
+# Palabras que no ayudan a distinguir un producto de otro.
+STOPWORDS = frozenset("x de del la las el los y en para por a al e o tipo".split())
+
+_NUMBER = r"\d+(?:[.,]\d+)?"
+_UNIT_ALTERNATION = "|".join(sorted(map(re.escape, UNITS), key=len, reverse=True))
+# "x5kg", "x 500 g", "500gr", "6 x 200 ml", "x6 und". Se aplica sobre el texto ya normalizado con `fold`.
+QUANTITY_RE = re.compile(
+    rf"(?<![a-z0-9])(?:x\s*)?(?:(?P<pack>\d+)\s*x\s*)?(?P<amount>{_NUMBER})\s*(?P<unit>{_UNIT_ALTERNATION})(?![a-z0-9])"
+)
+_NUMBER_PARTS_RE = re.compile(r"(\d+)(?:[.,](\d+))?")
+_NON_WORD_RE = re.compile(r"[^a-z0-9.,]+")
+_COMBINING_RE = re.compile(r"[\u0300-\u036f\u1ab0-\u1aff\u1dc0-\u1dff\u20d0-\u20ff\ufe20-\ufe2f]")
+# Puntos y comas que no están entre dos dígitos (empieza por la clase de caracteres para que la búsqueda sea rápida).
+_EDGE_PUNCT_RE = re.compile(r"[.,](?!(?<=\d[.,])\d)")
+
+Quantity = namedtuple("Quantity", ["cantidad", "unidad", "unidades"])
+Quantity.__doc__ = """
+Contenido de un producto según su nombre: `cantidad` en la unidad base (`g`, `ml` o `un`) y `unidades`
+del empaque (1 si el nombre no indica varias). Con "6 x 200 ml" la cantidad ya es el total (1200 ml).
+"""
+
+def fold(text):
+    """Texto en minúsculas, sin tildes y sin signos (se conservan los separadores decimales entre dígitos)."""
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFKD", text)
+    text = _COMBINING_RE.sub("", text).lower()
+    text = _NON_WORD_RE.sub(" ", text)
+    return " ".join(_EDGE_PUNCT_RE.sub(" ", text).split())
+
+def fold_joined(texts, separator="|"):
+    """
+    Aplica `fold` a muchos textos de una vez y los retorna unidos por `separator` (que `fold` nunca produce), de
+    modo que una sola pasada de `QUANTITY_RE.finditer` recorre un catálogo completo sin cruzar de un texto a otro.
+    """
+    text = unicodedata.normalize("NFKD", separator.join((text or "").replace(separator, " ") for text in texts))
+    text = _COMBINING_RE.sub("", text).lower()
+    text = re.sub(rf"[^a-z0-9.,{re.escape(separator)}]+", " ", text)
+    return _EDGE_PUNCT_RE.sub(" ", text)
+
+def parse_number(value):
+    """
+    Convierte un número de un nombre de producto: "2.5" y "2,5" son decimales; "1.000" (tres dígitos tras el
+    separador) es un separador de miles.
+    """
+    integer, decimals = _NUMBER_PARTS_RE.fullmatch(value).groups()
+    if decimals is None:
+        return float(integer)
+    if len(decimals) == 3:
+        return float(integer + decimals)
+    return float(f"{integer}.{decimals}")
+
+def parse_quantity(text, folded=False):
+    """
+    Extrae el contenido de un nombre de producto como `Quantity`, o None si no indica ninguno.
+    Se toma la primera medida de peso o volumen; los conteos ("x24und") se registran en `unidades`, y si
+    el nombre solo tiene un conteo, ese es la cantidad (en `un`).
+    """
+    text = text if folded else fold(text)
+    measure = count = None
+    for match in QUANTITY_RE.finditer(text):
+        unit, factor = UNITS[match.group("unit")]
+        amount = parse_number(match.group("amount")) * factor
+        pack = int(match.group("pack")) if match.group("pack") else 1
+        if unit == "un":
+            if count is None:
+                count = amount * pack
+        elif measure is None:
+            measure = (amount * pack, unit, pack)
+    if measure:
+        amount, unit, pack = measure
+        return Quantity(round(amount, 3), unit, int(count) if count and pack == 1 else pack)
+    if count:
+        return Quantity(count, "un", int(count))
+    return None
+
+def tokenize(text, folded=False):
+    """Palabras significativas de un nombre: sin tildes, sin medidas ni palabras vacías."""
+    text = text if folded else fold(text)
+    return [token for token in QUANTITY_RE.sub(" ", text).split() if token not in STOPWORDS]
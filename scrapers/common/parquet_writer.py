@@ -0,0 +1,125 @@
+import os
+from datetime import date
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from scrapers.common.product_record import PRODUCT_FIELDS, as_dict
+from scrapers.common.product_writer import iter_batches
+
+# Raíz del conjunto de datos Parquet compartido por todas las tiendas.
+PARQUET_ROOT = os.path.join("raw_data", "parquet")
+
+# Columnas calculadas después de la Fase 2 (ver `add_unit_prices`); quedan nulas si no se calcularon.
+DERIVED_FIELDS = ("cantidad", "unidad", "precio_por_unidad")
+COLUMNS = PRODUCT_FIELDS + DERIVED_FIELDS
+
+# Columnas con pocos valores distintos: se guardan codificadas como diccionario (índice + tabla de valores).
+DICTIONARY_COLUMNS = ("tienda", "categoria_principal", "sub_categoria", "marca", "unidad")
+
+_TYPES = {
+    "precio_final": pa.float64(),
+    "precio_sin_descuento": pa.float64(),
+    "porcentaje_descuento": pa.int32(),
+    "cantidad": pa.float64(),
+    "precio_por_unidad": pa.float64(),
+}
+
+PRODUCT_SCHEMA = pa.schema([
+    pa.field(field, pa.dictionary(pa.int32(), pa.string()) if field in DICTIONARY_COLUMNS else _TYPES.get(field, pa.string()))
+    for field in COLUMNS
+])
+
+def partition_dir(root_dir, store, run_date=None):
+    """Directorio de la partición de una tienda y fecha: `<root>/tienda=<tienda>/fecha=<AAAA-MM-DD>`."""
+    run_date = run_date or date.today()
+    return os.path.join(root_dir, f"tienda={store}", f"fecha={run_date.isoformat()}")
+
+class ParquetProductWriter:
+    """
+    Escritor de productos en formato Parquet, con particiones por tienda y fecha de ejecución al estilo Hive
+    (`tienda=Jumbo/fecha=2024-05-01/productos.parquet`), legibles con `pyarrow.dataset` o pandas.
+
+    Los productos se acumulan en memoria y se escriben en grupos de `row_group_size` filas. El archivo se
+    escribe con un nombre temporal y se renombra al cerrar, de modo que una partición nunca queda a medias;
+    volver a exportar la misma tienda y fecha reemplaza la partición.
+    """
+
+    def __init__(self, root_dir, store, logger, run_date=None, row_group_size=50_000, compression="zstd"):
+        self.logger = logger
+        self.row_group_size = row_group_size
+        self.directory = partition_dir(root_dir, store, run_date)
+        os.makedirs(self.directory, exist_ok=True)
+        self.filepath = os.path.join(self.directory, "productos.parquet")
+        self._tmp_path = self.filepath + ".tmp"
+        self._writer = pq.ParquetWriter(self._tmp_path, PRODUCT_SCHEMA, compression=compression)
+        self._columns = {field: [] for field in COLUMNS}
+        self._buffered = 0
+        self.total_written = 0
+
+    def write(self, products):
+        """Agrega productos (`ProductRecord` o diccionarios). Retorna el total acumulado."""
+        for product in products:
+            product = as_dict(product)
+            for field in COLUMNS:
+                self._columns[field].append(product.get(field))
+            self._buffered += 1
+            if self._buffered >= self.row_group_size:
+                self._flush()
+        return self.total_written + self._buffered
+
+    def _flush(self):
+        if not self._buffered:
+            return
+        arrays = [pa.array(self._columns[field], type=PRODUCT_SCHEMA.field(field).type) for field in COLUMNS]
+        self._writer.write_table(pa.Table.from_arrays(arrays, schema=PRODUCT_SCHEMA))
+        self.total_written += self._buffered
+        self._columns = {field: [] for field in COLUMNS}
+        self._buffered = 0
+
+    def close(self):
+        """Escribe lo pendiente, cierra el archivo y lo publica en la partición."""
+        if self._writer is None:
+            return
+        self._flush()
+        self._writer.close()
+        self._writer = None
+        os.replace(self._tmp_path, self.filepath)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        elif self._writer is not None:
+            # Ante un error se descarta el archivo temporal y se conserva la partición anterior.
+            self._writer.close()
+            self._writer = None
+            os.remove(self._tmp_path)
+
+def open_dataset(root_dir=PARQUET_ROOT):
+    """
+    Abre todas las particiones como un `pyarrow.dataset.Dataset`; las columnas `tienda` y `fecha` se leen del
+    nombre de los directorios, así que un filtro por tienda o fecha solo lee los archivos de esas particiones.
+    Ej.: `open_dataset().to_table(columns=["marca", "precio_final"], filter=ds.field("tienda") == "Jumbo")`.
+    """
+    # Las particiones se leen como diccionario para coincidir con el tipo de `tienda` dentro de los archivos.
+    return ds.dataset(root_dir, format="parquet", partitioning=ds.HivePartitioning.discover(infer_dictionary=True))
+
+def jsonl_to_parquet(jsonl_path, root_dir, store, logger, run_date=None, transform=None):
+    """
+    Convierte el JSONL de productos de una ejecución a su partición Parquet, leyéndolo de forma incremental.
+    `transform` se aplica a los registros por lotes (ver `iter_batches`).
+    Retorna `(ruta del archivo Parquet, número de registros)`.
+    """
+    with ParquetProductWriter(root_dir, store, logger, run_date=run_date) as writer:
+        for batch in iter_batches(jsonl_path, writer.row_group_size, transform):
+            writer.write(batch)
+    jsonl_size, parquet_size = os.path.getsize(jsonl_path), os.path.getsize(writer.filepath)
+    logger.info(
+        f"Productos exportados en formato Parquet a '{writer.filepath}': {writer.total_written} registros, "
+        f"{parquet_size / 1024:.0f} KiB (JSONL: {jsonl_size / 1024:.0f} KiB)."
+    )
+    return writer.filepath, writer.total_written
@@ -0,0 +1,161 @@
+import os
+import time
+from collections import namedtuple
+from urllib.parse import urlsplit
+
+from scrapers.common import metrics
+from scrapers.common.checkpoint import RunLedger
+from scrapers.common.delta import DeltaState, state_path_for
+from scrapers.common.driver_pool import DriverPool
+from scrapers.common.pipeline import ParsePipeline
+from scrapers.common.product_writer import JsonlProductWriter
+from scrapers.common.sharding import run_sharded
+
+# Resultado de la Fase 2: productos escritos en esta ejecución y si todas las categorías quedaron terminadas.
+Phase2Result = namedtuple("Phase2Result", ["total_written", "complete"])
+
+def ledger_path_for(products_filepath):
+    """Ruta de la bitácora de avance asociada a un archivo de productos."""
+    return os.path.splitext(products_filepath)[0] + "_ledger.jsonl"
+
+def category_label(url):
+    """Etiqueta de una categoría en las métricas: la ruta de su URL (p. ej. `despensa/arroz`)."""
+    return urlsplit(url).path.strip('/') or url
+
+def run_phase2(links, scrape_category, driver_factory, products_filepath, logger,
+               workers=1, max_pages_per_driver=50, resume=False, url_key="url", pool=None,
+               parse_page=None, parse_workers=1, profile=None, warm_browsers=0, delta=False):
+    """
+    Ejecuta la Fase 2 común a todos los scrapers: reparte los enlaces entre `workers` navegadores del pool,
+    escribe cada página en el JSONL de productos y registra el avance en la bitácora.
+
+    `scrape_category(link_info, pool, emit, pages_done)` recorre un enlace, llama a `emit(page_num, products)`
+    por cada página y omite el trabajo de las páginas contenidas en `pages_done` (reanudación).
+    Con `resume=True` se conservan los productos y la bitácora previos y se saltan las categorías terminadas.
+    Si se entrega `pool` (p. ej. un `VtexCatalogClient`), se usa en lugar de crear un `DriverPool` con `driver_factory`;
+    `profile` (un `ScrapeProfile`) se entrega al `DriverPool` para medir las páginas cargadas, y `warm_browsers`
+    es el número de navegadores precalentados que el `DriverPool` mantiene listos.
+
+    Con `parse_page(html, link_info)`, la Fase 2 funciona como pipeline (ver `ParsePipeline`): `scrape_category`
+    emite el HTML crudo de cada página, `parse_workers` procesos lo parsean y este hilo escribe los productos.
+
+    Con `delta=True` (ver `DeltaState`), `emit(1, ...)` retorna False cuando la primera página de la categoría
+    es idéntica a la de la ejecución anterior: `scrape_category` debe dejar de paginar y los productos de las
+    demás páginas se copian de la ejecución anterior.
+
+    Las operaciones de cada categoría se registran en las métricas de la ejecución (ver `metrics`) con la etiqueta
+    `categoria`; la Fase 2 completa se registra como `fase2`.
+
+    Retorna un `Phase2Result`. `complete` es False si alguna categoría no quedó terminada en la bitácora (falló
+    su navegación o alguna de sus páginas no se pudo parsear): el archivo de productos no tiene el catálogo completo
+    y las etapas que lo comparan con la ejecución anterior no deben usarlo (ver `finish_run`).
+    """
+    phase_start = time.perf_counter()
+    delta_state = DeltaState(products_filepath, logger, resume=resume) if delta else None
+    if not resume and os.path.exists(products_filepath):
+        os.remove(products_filepath)
+        logger.info(f"Archivo de productos anterior '{products_filepath}' eliminado.")
+    if not delta and not resume and os.path.exists(state_path_for(products_filepath)):
+        # Las huellas describen el archivo de productos que se acaba de eliminar.
+        os.remove(state_path_for(products_filepath))
+
+    ledger = RunLedger(ledger_path_for(products_filepath), logger, resume=resume)
+    pending_links = [link for link in links if not ledger.is_category_done(link[url_key])]
+    if len(pending_links) < len(links):
+        logger.info(f"Se omiten {len(links) - len(pending_links)} categorías ya completadas en la ejecución anterior.")
+
+    writer = JsonlProductWriter(products_filepath, logger)
+    pipeline = ParsePipeline(parse_page, logger, navigation_workers=workers, parse_workers=parse_workers) if parse_page else None
+    # Categorías con páginas que no se pudieron parsear: no se marcan como terminadas para reintentarlas con --resume.
+    failed_categories = set()
+
+    def save_page(link_info, page_num, payload):
+        with metrics.labels(categoria=category_label(link_info[url_key])):
+            write_page(link_info, page_num, payload)
+
+    def write_page(link_info, page_num, payload):
+        products = payload
+        if pipeline:
+            try:
+                products = pipeline.collect(link_info, payload)
+            except Exception as e:
+                logger.error(f"Error parseando la página {page_num} de {link_info[url_key]}: {e}", exc_info=True)
+                failed_categories.add(link_info[url_key])
+                return
+        start = time.monotonic()
+        offset = writer.offset
+        if products:
+            with metrics.timer("escritura"):
+                total = writer.write(products)
+                # El buffer se entrega al sistema operativo antes de marcar la página como guardada.
+                writer.flush()
+            metrics.count("productos", len(products))
+            logger.info(f"  > Guardados {len(products)} productos (página {page_num}). Total acumulado: {total}.",
+                        extra={"pagina": page_num})
+        if delta_state:
+            delta_state.record_page(link_info[url_key], page_num, offset, writer.offset - offset)
+        ledger.mark_page(link_info[url_key], page_num)
+        metrics.count("paginas")
+        if pipeline:
+            pipeline.writing.add(items=1, busy=time.monotonic() - start)
+
+    def finish_category(link_info):
+        if link_info[url_key] in failed_categories:
+            writer.sync()
+            logger.warning(f"La categoría {link_info[url_key]} tuvo páginas sin parsear; no se marca como terminada.")
+            return
+        if delta_state and delta_state.finish_category(link_info[url_key], writer):
+            logger.info(f"  > Categoría sin cambios: se copiaron sus demás páginas de la ejecución anterior. Total acumulado: {writer.total_written}.")
+        writer.sync()
+        ledger.mark_category(link_info[url_key])
+
+    def process_link(link_info, emit):
+        with metrics.labels(categoria=category_label(link_info[url_key])):
+            navigate_link(link_info, emit)
+
+    def navigate_link(link_info, emit):
+        url = link_info[url_key]
+        pages_done = ledger.pages_done(url)
+        # La primera página solo se compara si se va a extraer en esta ejecución.
+        inspect_first = (lambda products: not delta_state.check(url, products)) if delta_state and 1 not in pages_done else None
+        if pipeline:
+            pipeline.navigate(link_info, emit, lambda emit_html: scrape_category(link_info, pool, emit_html, pages_done),
+                              inspect_first=inspect_first)
+        elif inspect_first:
+            def emit_products(page_num, products):
+                emit(page_num, products)
+                return inspect_first(products) if page_num == 1 else True
+            scrape_category(link_info, pool, emit_products, pages_done)
+        else:
+            scrape_category(link_info, pool, emit, pages_done)
+
+    if pool is None:
+        pool = DriverPool(driver_factory, logger, max_size=workers, max_pages=max_pages_per_driver,
+                          profile=profile, warm=warm_browsers)
+    unfinished = []
+    try:
+        run_sharded(
+            pending_links,
+            lambda _, link_info, emit: process_link(link_info, emit),
+            workers,
+            save_page,
+            logger,
+            on_task_done=finish_category,
+            max_pending=pipeline.max_pending if pipeline else 0,
+        )
+        unfinished = [link[url_key] for link in links if not ledger.is_category_done(link[url_key])]
+        if unfinished:
+            logger.warning(f"{len(unfinished)} de {len(links)} categorías no se completaron; reintentarlas con --resume.")
+    finally:
+        pool.close()
+        writer.close()
+        ledger.close()
+        if pipeline:
+            pipeline.close()
+            logger.info("Throughput por etapa de la Fase 2:")
+            pipeline.report()
+        if delta_state:
+            delta_state.close()
+            delta_state.report()
+        metrics.observe("fase2", time.perf_counter() - phase_start)
+    return Phase2Result(writer.total_written, not unfinished)
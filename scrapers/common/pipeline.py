@@ -0,0 +1,203 @@
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from scrapers.common import metrics
+
+# Registros de log emitidos durante el parseo en un proceso de parseo (ver `_init_parse_worker`).
+# En el proceso principal es None: ahí los registros llegan directamente a los handlers del logger.
+_worker_records = None
+
+class _CaptureHandler(logging.Handler):
+    """Guarda los registros del proceso de parseo para devolverlos con la página parseada."""
+
+    def emit(self, record):
+        state = dict(record.__dict__)
+        # El mensaje se resuelve aquí y el traceback se convierte en texto: ambos deben poder enviarse al padre.
+        state["msg"] = record.getMessage()
+        state["args"] = None
+        if record.exc_info and not record.exc_text:
+            state["exc_text"] = logging.Formatter().formatException(record.exc_info)
+        state["exc_info"] = None
+        _worker_records.append(state)
+
+def _init_parse_worker(level):
+    """
+    Inicializador de los procesos de parseo. El logger del scraper llega a ellos solo por nombre y sin handlers:
+    sus registros (p. ej. tarjetas que no se pudieron procesar) se capturan en el logger raíz con el nivel del
+    logger original y se devuelven al proceso principal junto con los productos (ver `ParsePipeline.collect`).
+    """
+    global _worker_records
+    _worker_records = []
+    root = logging.getLogger()
+    root.handlers = [_CaptureHandler()]
+    root.setLevel(level)
+
+def _timed_parse(parse_page, html, link_info):
+    """
+    Parsea una página y retorna `(productos, segundos, observaciones, registros)`, donde las observaciones son las
+    métricas registradas durante el parseo (p. ej. `parseo_html`) y los registros, los de log capturados en un
+    proceso de parseo (vacío en el proceso principal). Se ejecuta en los procesos de parseo.
+    """
+    start = time.perf_counter()
+    if _worker_records is not None:
+        _worker_records.clear()
+    with metrics.capture() as observations:
+        products = parse_page(html, link_info)
+    records = list(_worker_records) if _worker_records is not None else []
+    return products, time.perf_counter() - start, observations, records
+
+class StageCounter:
+    """Contador de una etapa del pipeline: páginas procesadas, tiempo ocupado y tiempo esperando a otra etapa."""
+
+    def __init__(self, name, parallelism):
+        self.name = name
+        self.parallelism = max(1, parallelism)
+        self.items = 0
+        self.busy = 0.0
+        self.waiting = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, items=0, busy=0.0, waiting=0.0):
+        with self._lock:
+            self.items += items
+            self.busy += busy
+            self.waiting += waiting
+
+    def capacity(self):
+        """Páginas por segundo que la etapa podría sostener si nunca esperara a las demás."""
+        if self.busy <= 0:
+            return float("inf")
+        return self.items / (self.busy / self.parallelism)
+
+class ParsePipeline:
+    """
+    Desacopla las tres etapas de la Fase 2: navegación → parseo → escritura.
+
+    Los hilos de navegación (`navigate`) entregan el HTML crudo con `emit(page_num, html)` y siguen con la siguiente página;
+    el HTML se envía a un pool de `parse_workers` procesos (con 0, se parsea en el hilo escritor) y el hilo
+    escritor de `run_sharded` recoge los productos en orden con `collect`. La cola de resultados de
+    `run_sharded` es acotada, de modo que si el parseo o la escritura se atrasan, la navegación se bloquea
+    (contrapresión) y la memoria no crece con páginas pendientes.
+
+    `parse_page(html, link_info)` debe poder enviarse a otro proceso (función de módulo o `functools.partial`).
+    """
+
+    def __init__(self, parse_page, logger, navigation_workers=1, parse_workers=1):
+        self.parse_page = parse_page
+        self.logger = logger
+        self.parse_workers = parse_workers
+        # 'spawn' evita heredar por fork los locks de los hilos (navegadores, logging) que ya están corriendo.
+        self._executor = (
+            ProcessPoolExecutor(max_workers=parse_workers, mp_context=multiprocessing.get_context("spawn"),
+                                initializer=_init_parse_worker, initargs=(logger.getEffectiveLevel(),))
+            if parse_workers > 0 else None
+        )
+        self._start = time.monotonic()
+        self.navigation = StageCounter("navegación", navigation_workers)
+        self.parsing = StageCounter("parseo", parse_workers)
+        self.writing = StageCounter("escritura", 1)
+
+    @property
+    def max_pending(self):
+        """Tamaño de la cola entre etapas: suficiente para mantener ocupados a todos los procesos de parseo."""
+        return 2 * (self.navigation.parallelism + max(1, self.parse_workers))
+
+    def navigate(self, link_info, emit, scrape, inspect_first=None):
+        """
+        Ejecuta `scrape(emit_html)` en el hilo de navegación. `emit_html(page_num, html)` envía el HTML al parseo
+        y lo encola hacia el escritor con el `emit` de `run_sharded` (bloqueando si la cola está llena).
+
+        Con `inspect_first(products)`, la página 1 se parsea antes de seguir navegando y `emit_html` retorna
+        lo que retorne esa función (p. ej. False para no recorrer el resto de la paginación).
+        """
+        waited = 0.0
+
+        def emit_html(page_num, html):
+            nonlocal waited
+            result = True
+            if inspect_first and page_num == 1:
+                # La navegación espera el parseo de la primera página para decidir si continúa.
+                start = time.monotonic()
+                if self._executor:
+                    handle = self._executor.submit(_timed_parse, self.parse_page, html, link_info)
+                else:
+                    handle = Future()
+                    try:
+                        handle.set_result(_timed_parse(self.parse_page, html, link_info))
+                    except Exception as e:
+                        handle.set_exception(e)
+                # Si el parseo falla, el error lo registra el escritor al recoger la página y se sigue navegando.
+                if handle.exception() is None:
+                    result = inspect_first(handle.result()[0])
+                waited += time.monotonic() - start
+            elif self._executor:
+                handle = self._executor.submit(_timed_parse, self.parse_page, html, link_info)
+            else:
+                handle = html
+            start = time.monotonic()
+            emit(page_num, handle)
+            waited += time.monotonic() - start
+            self.navigation.add(items=1)
+            return result
+
+        start = time.monotonic()
+        try:
+            scrape(emit_html)
+        finally:
+            # El tiempo ocupado de la navegación excluye lo que estuvo bloqueada por contrapresión.
+            self.navigation.add(busy=time.monotonic() - start - waited, waiting=waited)
+
+    def collect(self, link_info, handle):
+        """
+        Retorna los productos de una página entregada por `emit_html`. Se llama desde el hilo escritor, que registra
+        en las métricas el parseo del HTML y, como `extraccion`, el resto del tiempo de parseo de la página, y
+        entrega a su logger los registros de log del proceso de parseo.
+        """
+        if isinstance(handle, Future):
+            start = time.monotonic()
+            products, seconds, observations, records = handle.result()
+            self.writing.add(waiting=time.monotonic() - start)
+        else:
+            products, seconds, observations, records = _timed_parse(self.parse_page, handle, link_info)
+        for state in records:
+            logger = logging.getLogger(state["name"])
+            if logger.isEnabledFor(state["levelno"]):
+                logger.handle(logging.makeLogRecord(state))
+        self.parsing.add(items=1, busy=seconds)
+        for name, observed in observations:
+            metrics.observe(name, observed)
+        metrics.observe("extraccion", seconds - sum(observed for name, observed in observations if name == "parseo_html"))
+        return products
+
+    def report(self):
+        """Registra el throughput de cada etapa e indica cuál limitó la ejecución. Retorna las métricas."""
+        wall = time.monotonic() - self._start
+        stages = (self.navigation, self.parsing, self.writing)
+        metrics = {}
+        for stage in stages:
+            capacity = stage.capacity()
+            metrics[stage.name] = {
+                "paginas": stage.items,
+                "paralelismo": stage.parallelism,
+                "ocupado_s": round(stage.busy, 2),
+                "esperando_s": round(stage.waiting, 2),
+                "paginas_por_s": round(stage.items / wall, 2) if wall > 0 else 0.0,
+                "capacidad_paginas_por_s": round(capacity, 2) if capacity != float("inf") else None,
+            }
+            capacity_text = f"{capacity:.2f} pág/s" if capacity != float("inf") else "sin carga"
+            self.logger.info(
+                f"  Etapa {stage.name} (x{stage.parallelism}): {stage.items} páginas, {stage.busy:.1f} s ocupada, "
+                f"{stage.waiting:.1f} s esperando, capacidad {capacity_text}."
+            )
+        bottleneck = min(stages, key=lambda stage: stage.capacity())
+        if bottleneck.items:
+            self.logger.info(f"  Etapa limitante del pipeline: {bottleneck.name}.")
+        metrics["etapa_limitante"] = bottleneck.name if bottleneck.items else None
+        return metrics
+
+    def close(self):
+        if self._executor:
+            self._executor.shutdown(wait=True, cancel_futures=True)
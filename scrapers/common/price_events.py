@@ -0,0 +1,170 @@
+import heapq
+import json
+import os
+import tempfile
+import time
+
+from scrapers.common.product_writer import iter_records
+
+SORT_KEY = "url_producto"
+
+def sorted_path_for(products_filepath):
+    """Ruta de la copia ordenada por URL de un archivo de productos (la que se compara en la ejecución siguiente)."""
+    return os.path.splitext(products_filepath)[0] + "_ordenado.jsonl"
+
+def events_path_for(products_filepath):
+    """Ruta del archivo de eventos de cambio de precio asociado a un archivo de productos."""
+    return os.path.splitext(products_filepath)[0] + "_eventos.jsonl"
+
+def _write_run(rows, directory):
+    rows.sort(key=lambda row: row[0])
+    fd, path = tempfile.mkstemp(suffix=".jsonl", dir=directory)
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        for key, line in rows:
+            # La clave va serializada al inicio de la línea para no volver a parsear el registro al mezclar.
+            f.write(f"{json.dumps(key, ensure_ascii=False)}\t{line}\n")
+    return path
+
+def _read_run(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            key, _, record = line.rstrip("\n").partition("\t")
+            yield json.loads(key), record
+
+def external_sort(jsonl_path, output_path, key=SORT_KEY, chunk_size=50_000):
+    """
+    Ordena un archivo JSONL por `key` sin cargarlo completo en memoria: lo divide en tramos de `chunk_size`
+    registros que se ordenan y se escriben a archivos temporales, y luego los mezcla en una sola pasada
+    (`heapq.merge`). Los registros sin clave se omiten y, si una clave se repite (un producto listado en varias
+    categorías), se conserva el primero. Retorna el número de registros escritos.
+    """
+    directory = os.path.dirname(os.path.abspath(output_path))
+    runs = []
+    try:
+        rows = []
+        with open(jsonl_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                value = json.loads(line).get(key)
+                if not value or value == "N/A":
+                    continue
+                rows.append((value, line))
+                if len(rows) >= chunk_size:
+                    runs.append(_write_run(rows, directory))
+                    rows = []
+        if rows:
+            runs.append(_write_run(rows, directory))
+        del rows
+
+        count = 0
+        last = None
+        tmp_path = output_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as out:
+            # `heapq.merge` es estable: a igual clave, el registro del tramo anterior (el primero del archivo) sale antes.
+            for value, line in heapq.merge(*(_read_run(path) for path in runs), key=lambda row: row[0]):
+                if value == last:
+                    continue
+                out.write(line + "\n")
+                last = value
+                count += 1
+        os.replace(tmp_path, output_path)
+        return count
+    finally:
+        for path in runs:
+            os.remove(path)
+
+def _changed(previous, current):
+    return any(previous.get(field) != current.get(field)
+               for field in ("precio_final", "precio_sin_descuento", "porcentaje_descuento"))
+
+def _price_change(previous, current):
+    old_price, new_price = previous.get("precio_final"), current.get("precio_final")
+    old_discount = previous.get("porcentaje_descuento") or 0
+    new_discount = current.get("porcentaje_descuento") or 0
+    variation = None
+    if isinstance(old_price, (int, float)) and isinstance(new_price, (int, float)) and old_price > 0:
+        variation = round((new_price - old_price) / old_price * 100, 2)
+    return {
+        "precio_anterior": old_price,
+        "precio_final": new_price,
+        "variacion_porcentaje": variation,
+        "precio_sin_descuento_anterior": previous.get("precio_sin_descuento"),
+        "precio_sin_descuento": current.get("precio_sin_descuento"),
+        "descuento_anterior": old_discount,
+        "porcentaje_descuento": new_discount,
+        "nuevo_descuento": new_discount > old_discount,
+    }
+
+def _event(kind, product, **fields):
+    return {
+        "evento": kind,
+        "url_producto": product.get(SORT_KEY),
+        "nombre_completo": product.get("nombre_completo"),
+        "categoria_principal": product.get("categoria_principal"),
+        "sub_categoria": product.get("sub_categoria"),
+        **fields,
+    }
+
+def diff_sorted(previous_path, current_path, key=SORT_KEY):
+    """
+    Compara dos archivos JSONL ordenados por `key` (ver `external_sort`) en una sola pasada, como la mezcla de
+    un merge sort: solo hay un registro de cada archivo en memoria a la vez. Genera un evento por producto:
+
+    - `cambio_precio`: cambió `precio_final`, `precio_sin_descuento` o `porcentaje_descuento`;
+    - `nuevo`: está en la ejecución actual y no en la anterior;
+    - `retirado`: estaba en la ejecución anterior y ya no aparece (con su último precio conocido).
+    """
+    previous_records = iter_records(previous_path)
+    current_records = iter_records(current_path)
+    previous = next(previous_records, None)
+    current = next(current_records, None)
+    while previous is not None or current is not None:
+        if current is None or (previous is not None and previous[key] < current[key]):
+            yield _event("retirado", previous, precio_final=previous.get("precio_final"),
+                         porcentaje_descuento=previous.get("porcentaje_descuento"))
+            previous = next(previous_records, None)
+        elif previous is None or current[key] < previous[key]:
+            yield _event("nuevo", current, precio_final=current.get("precio_final"),
+                         porcentaje_descuento=current.get("porcentaje_descuento"))
+            current = next(current_records, None)
+        else:
+            if _changed(previous, current):
+                yield _event("cambio_precio", current, **_price_change(previous, current))
+            previous = next(previous_records, None)
+            current = next(current_records, None)
+
+def update_price_events(products_filepath, store, logger, run_at, chunk_size=50_000):
+    """
+    Genera los eventos de cambio de precio de una ejecución frente a la anterior.
+
+    Ordena el JSONL de productos por URL en disco (`external_sort`), lo compara con la copia ordenada de la
+    ejecución anterior (`diff_sorted`) y escribe los eventos en `<base>_eventos.jsonl`, cada uno con su `tienda`
+    y `ejecucion`. La copia ordenada actual reemplaza a la anterior para la ejecución siguiente. En la primera
+    ejecución no hay con qué comparar y no se generan eventos. Retorna el número de eventos por tipo.
+    """
+    start = time.monotonic()
+    sorted_path = sorted_path_for(products_filepath)
+    events_path = events_path_for(products_filepath)
+    current_path = sorted_path + ".nuevo"
+    total = external_sort(products_filepath, current_path, chunk_size=chunk_size)
+
+    counts = {"cambio_precio": 0, "nuevo": 0, "retirado": 0}
+    if os.path.exists(sorted_path):
+        tmp_path = events_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for event in diff_sorted(sorted_path, current_path):
+                counts[event["evento"]] += 1
+                f.write(json.dumps({"tienda": store, "ejecucion": run_at, **event}, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, events_path)
+        logger.info(
+            f"Eventos de precio de {store}: {counts['cambio_precio']} cambios de precio, {counts['nuevo']} productos "
+            f"nuevos y {counts['retirado']} retirados entre {total} productos; guardados en '{events_path}' "
+            f"({time.monotonic() - start:.2f} s)."
+        )
+    else:
+        logger.info(f"Eventos de precio de {store}: no hay una ejecución anterior con qué comparar; "
+                    f"se guardó la base para la siguiente ({total} productos).")
+    os.replace(current_path, sorted_path)
+    return counts
@@ -0,0 +1,211 @@
+import os
+import sqlite3
+import time
+from datetime import datetime
+
+from scrapers.common.product_record import as_dict
+from scrapers.common.product_writer import iter_records
+
+# Base de datos compartida por todas las tiendas.
+HISTORY_DB_PATH = os.path.join("raw_data", "historial_precios.sqlite3")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ejecuciones (
+    tienda TEXT NOT NULL,
+    ejecucion TEXT NOT NULL,
+    productos INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (tienda, ejecucion)
+) WITHOUT ROWID;
+
+-- Datos descriptivos y último precio conocido de cada producto.
+CREATE TABLE IF NOT EXISTS productos (
+    url_producto TEXT PRIMARY KEY,
+    tienda TEXT NOT NULL,
+    categoria_principal TEXT,
+    sub_categoria TEXT,
+    tipo TEXT,
+    nombre_completo TEXT,
+    marca TEXT,
+    url_imagen TEXT,
+    precio_final REAL,
+    precio_sin_descuento REAL,
+    porcentaje_descuento INTEGER,
+    ultima_ejecucion TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_productos_categoria ON productos (tienda, categoria_principal, sub_categoria);
+CREATE INDEX IF NOT EXISTS idx_productos_marca ON productos (tienda, marca);
+
+-- Un precio por producto y ejecución. Sin rowid, las filas quedan ordenadas por la clave primaria:
+-- el historial de un producto es un único recorrido contiguo. La tienda y la categoría están en `productos`.
+CREATE TABLE IF NOT EXISTS precios (
+    url_producto TEXT NOT NULL,
+    ejecucion TEXT NOT NULL,
+    precio_final REAL,
+    precio_sin_descuento REAL,
+    porcentaje_descuento INTEGER,
+    PRIMARY KEY (url_producto, ejecucion)
+) WITHOUT ROWID;
+"""
+
+_UPSERT_PRODUCT = """
+INSERT INTO productos (url_producto, tienda, categoria_principal, sub_categoria, tipo, nombre_completo, marca, url_imagen,
+                       precio_final, precio_sin_descuento, porcentaje_descuento, ultima_ejecucion)
+VALUES (:url_producto, :tienda, :categoria_principal, :sub_categoria, :tipo, :nombre_completo, :marca, :url_imagen,
+        :precio_final, :precio_sin_descuento, :porcentaje_descuento, :ejecucion)
+ON CONFLICT (url_producto) DO UPDATE SET
+    tienda = excluded.tienda,
+    categoria_principal = excluded.categoria_principal,
+    sub_categoria = excluded.sub_categoria,
+    tipo = excluded.tipo,
+    nombre_completo = excluded.nombre_completo,
+    marca = excluded.marca,
+    url_imagen = excluded.url_imagen,
+    precio_final = excluded.precio_final,
+    precio_sin_descuento = excluded.precio_sin_descuento,
+    porcentaje_descuento = excluded.porcentaje_descuento,
+    ultima_ejecucion = excluded.ultima_ejecucion
+WHERE excluded.ultima_ejecucion >= productos.ultima_ejecucion
+"""
+
+_UPSERT_PRICE = """
+INSERT INTO precios (url_producto, ejecucion, precio_final, precio_sin_descuento, porcentaje_descuento)
+VALUES (:url_producto, :ejecucion, :precio_final, :precio_sin_descuento, :porcentaje_descuento)
+ON CONFLICT (url_producto, ejecucion) DO UPDATE SET
+    precio_final = excluded.precio_final,
+    precio_sin_descuento = excluded.precio_sin_descuento,
+    porcentaje_descuento = excluded.porcentaje_descuento
+"""
+
+def run_timestamp(epoch_seconds=None):
+    """Marca de tiempo de una ejecución (ISO 8601 local, al segundo): ordena igual como texto que como fecha."""
+    return datetime.fromtimestamp(epoch_seconds if epoch_seconds is not None else time.time()).isoformat(timespec="seconds")
+
+class PriceHistory:
+    """
+    Historial de precios de todas las tiendas en una base SQLite embebida.
+
+    Cada ejecución de un scraper agrega un precio por producto a `precios` (clave: `url_producto` + `ejecucion`) y
+    actualiza en `productos` sus datos descriptivos y el último precio conocido, con upserts masivos (`executemany`)
+    en una transacción por lote. La base usa WAL, de modo que varias tiendas pueden escribir una tras otra mientras
+    otras conexiones consultan.
+    """
+
+    def __init__(self, db_path=HISTORY_DB_PATH, logger=None, batch_size=5000):
+        self.db_path = db_path
+        self.logger = logger
+        self.batch_size = batch_size
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # El timeout cubre las escrituras simultáneas de los procesos de otras tiendas.
+        self._conn = sqlite3.connect(db_path, timeout=60)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def record_run(self, store, run_at, products):
+        """
+        Guarda los productos de una ejecución (`ProductRecord` o diccionarios, en cualquier iterable).
+        Los productos sin URL se omiten y un producto listado en varias categorías cuenta una sola vez.
+        Retorna el número de productos guardados (URLs distintas).
+        """
+        start = time.monotonic()
+        saved = 0
+        batch = []
+        for product in products:
+            row = as_dict(product)
+            if not row.get("url_producto") or row["url_producto"] == "N/A":
+                continue
+            batch.append(dict(row, ejecucion=run_at))
+            if len(batch) >= self.batch_size:
+                saved += self._write_batch(batch)
+                batch = []
+        saved += self._write_batch(batch)
+        with self._conn:
+            # Las filas de entrada repiten las URLs de los productos listados en varias categorías; se cuentan
+            # los precios guardados para esta ejecución (recorriendo los productos de la tienda por su índice).
+            saved = self._conn.execute(
+                "SELECT COUNT(*) FROM productos JOIN precios ON precios.url_producto = productos.url_producto "
+                "AND precios.ejecucion = ? WHERE productos.tienda = ?",
+                (run_at, store),
+            ).fetchone()[0]
+            self._conn.execute(
+                "INSERT INTO ejecuciones (tienda, ejecucion, productos) VALUES (?, ?, ?) "
+                "ON CONFLICT (tienda, ejecucion) DO UPDATE SET productos = excluded.productos",
+                (store, run_at, saved),
+            )
+        if self.logger:
+            self.logger.info(f"Historial de precios: {saved} productos de {store} guardados para la ejecución {run_at} "
+                             f"en {time.monotonic() - start:.2f} s ('{self.db_path}').")
+        return saved
+
+    def import_jsonl(self, jsonl_path, store, run_at):
+        """Guarda en el historial el JSONL de productos de una ejecución, leyéndolo de forma incremental."""
+        return self.record_run(store, run_at, iter_records(jsonl_path))
+
+    def _write_batch(self, rows):
+        if not rows:
+            return 0
+        with self._conn:
+            self._conn.executemany(_UPSERT_PRICE, rows)
+            self._conn.executemany(_UPSERT_PRODUCT, rows)
+        return len(rows)
+
+    def price_history(self, url_producto, since=None, until=None):
+        """Precios de un producto a lo largo del tiempo, del más antiguo al más reciente (opcionalmente entre dos fechas ISO)."""
+        query = "SELECT ejecucion, precio_final, precio_sin_descuento, porcentaje_descuento FROM precios WHERE url_producto = ?"
+        params = [url_producto]
+        if since:
+            query += " AND ejecucion >= ?"
+            params.append(since)
+        if until:
+            query += " AND ejecucion <= ?"
+            params.append(until)
+        return [dict(row) for row in self._conn.execute(query + " ORDER BY ejecucion", params)]
+
+    def price_at(self, url_producto, moment):
+        """Último precio conocido de un producto en una fecha ISO dada (p. ej. "¿cuánto costaba la semana pasada?")."""
+        row = self._conn.execute(
+            "SELECT ejecucion, precio_final, precio_sin_descuento, porcentaje_descuento FROM precios "
+            "WHERE url_producto = ? AND ejecucion <= ? ORDER BY ejecucion DESC LIMIT 1",
+            (url_producto, moment),
+        ).fetchone()
+        return dict(row) if row else None
+
+    def latest_price(self, url_producto):
+        """Datos y último precio conocido de un producto, o None si nunca se ha visto."""
+        row = self._conn.execute("SELECT * FROM productos WHERE url_producto = ?", (url_producto,)).fetchone()
+        return dict(row) if row else None
+
+    def latest_prices(self, store=None, category=None, sub_category=None, limit=None):
+        """Último precio conocido de los productos de una tienda y, opcionalmente, de una categoría o sub-categoría."""
+        query, params = "SELECT * FROM productos", []
+        conditions = []
+        for column, value in (("tienda", store), ("categoria_principal", category), ("sub_categoria", sub_category)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit)
+        return [dict(row) for row in self._conn.execute(query, params)]
+
+    def runs(self, store=None):
+        """Ejecuciones registradas, de la más reciente a la más antigua."""
+        query, params = "SELECT * FROM ejecuciones", []
+        if store:
+            query += " WHERE tienda = ?"
+            params.append(store)
+        return [dict(row) for row in self._conn.execute(query + " ORDER BY ejecucion DESC", params)]
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,65 @@
+PRODUCT_FIELDS = (
+    "tienda",
+    "categoria_principal",
+    "sub_categoria",
+    "tipo",
+    "nombre_completo",
+    "marca",
+    "precio_final",
+    "precio_sin_descuento",
+    "porcentaje_descuento",
+    "url_producto",
+    "url_imagen",
+)
+
+class ProductRecord:
+    """
+    Producto extraído de una página de listado, común a todas las tiendas.
+
+    Usa `__slots__` en lugar de un diccionario por producto: ocupa menos memoria y se serializa de forma
+    compacta al viajar de los procesos de parseo al escritor (solo los valores, en el orden de `PRODUCT_FIELDS`).
+    `to_dict()` produce el mismo diccionario, con el mismo orden de claves, que escribían los scrapers.
+    """
+
+    __slots__ = PRODUCT_FIELDS
+
+    def __init__(self, tienda, categoria_principal, sub_categoria, tipo, nombre_completo, marca,
+                 precio_final, precio_sin_descuento, porcentaje_descuento, url_producto, url_imagen):
+        self.tienda = tienda
+        self.categoria_principal = categoria_principal
+        self.sub_categoria = sub_categoria
+        self.tipo = tipo
+        self.nombre_completo = nombre_completo
+        self.marca = marca
+        self.precio_final = precio_final
+        self.precio_sin_descuento = precio_sin_descuento
+        self.porcentaje_descuento = porcentaje_descuento
+        self.url_producto = url_producto
+        self.url_imagen = url_imagen
+
+    @classmethod
+    def from_dict(cls, data):
+        """Construye un registro desde un diccionario (p. ej. una línea del JSONL de productos)."""
+        return cls(*(data.get(field, "N/A") for field in PRODUCT_FIELDS))
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in PRODUCT_FIELDS}
+
+    def get(self, field, default=None):
+        """Acceso por nombre de campo, compatible con el de los diccionarios."""
+        return getattr(self, field, default) if field in PRODUCT_FIELDS else default
+
+    def __reduce__(self):
+        return (ProductRecord, tuple(getattr(self, field) for field in PRODUCT_FIELDS))
+
+    def __eq__(self, other):
+        if not isinstance(other, ProductRecord):
+            return NotImplemented
+        return all(getattr(self, field) == getattr(other, field) for field in PRODUCT_FIELDS)
+
+    def __repr__(self):
+        return f"ProductRecord({self.tienda!r}, {self.nombre_completo!r}, {self.precio_final!r})"
+
+def as_dict(product):
+    """Diccionario de un producto, sea un `ProductRecord` o ya un diccionario."""
+    return product.to_dict() if isinstance(product, ProductRecord) else product
@@ -0,0 +1,131 @@
+import json
+import os
+import threading
+import time
+
+from scrapers.common import metrics
+from scrapers.common.product_record import as_dict
+
+class JsonlProductWriter:
+    """
+    Escritor de productos en formato JSONL (un registro JSON por línea), solo de anexado.
+
+    A diferencia de reescribir todo el archivo JSON en cada página, cada registro se escribe
+    una sola vez. Las escrituras pasan por un buffer y se sincronizan a disco (fsync) por lotes:
+    cada `fsync_every` registros o cada `fsync_interval` segundos, y siempre al cerrar.
+    """
+
+    def __init__(self, filepath, logger, fsync_every=1000, fsync_interval=30.0, buffer_size=1024 * 1024):
+        self.filepath = filepath
+        self.logger = logger
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.total_written = 0
+        self._pending_sync = 0
+        self._last_sync = time.monotonic()
+        self._lock = threading.Lock()
+        output_dir = os.path.dirname(filepath)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        # Se escribe en binario para conocer la posición exacta (en bytes) de cada bloque de registros.
+        self._file = open(filepath, 'ab', buffering=buffer_size)
+        self.offset = os.path.getsize(filepath)
+
+    def write(self, products):
+        """Anexa una lista de productos (`ProductRecord` o diccionarios) al archivo. Retorna el total acumulado de esta sesión."""
+        if not products:
+            return self.total_written
+        lines = "".join(json.dumps(as_dict(product), ensure_ascii=False) + "\n" for product in products)
+        return self.write_raw(lines.encode('utf-8'), len(products))
+
+    def write_raw(self, data, count):
+        """Anexa `count` registros ya serializados como líneas JSONL (bytes UTF-8). Retorna el total acumulado."""
+        if not data:
+            return self.total_written
+        with self._lock:
+            self._file.write(data)
+            self.offset += len(data)
+            self.total_written += count
+            self._pending_sync += count
+            if self._pending_sync >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval:
+                self._sync()
+        return self.total_written
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending_sync = 0
+        self._last_sync = time.monotonic()
+
+    def flush(self):
+        """Entrega el buffer al sistema operativo (sobrevive a la caída del proceso, no a la del equipo)."""
+        with self._lock:
+            self._file.flush()
+
+    def sync(self):
+        """Fuerza el fsync inmediato de todo lo escrito hasta ahora."""
+        with self._lock:
+            self._sync()
+
+    def close(self):
+        """Vacía el buffer, sincroniza a disco y cierra el archivo."""
+        with self._lock:
+            if self._file.closed:
+                return
+            self._sync()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+def count_records(filepath):
+    """Cuenta los registros de un archivo JSONL sin parsearlo (cuenta líneas no vacías)."""
+    count = 0
+    with open(filepath, 'rb') as f:
+        for line in f:
+            if line.strip():
+                count += 1
+    return count
+
+def iter_records(filepath):
+    """Itera los registros de un archivo JSONL uno a uno, sin cargar el archivo completo en memoria."""
+    with open(filepath, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+def iter_batches(filepath, batch_size=50_000, transform=None):
+    """
+    Itera los registros de un archivo JSONL en listas de hasta `batch_size`. Con `transform(lista)` cada lote
+    pasa por una etapa por lotes (p. ej. `add_unit_prices`) antes de entregarse.
+    """
+    batch = []
+    for record in iter_records(filepath):
+        batch.append(record)
+        if len(batch) >= batch_size:
+            yield transform(batch) if transform else batch
+            batch = []
+    if batch:
+        yield transform(batch) if transform else batch
+
+def jsonl_to_json(jsonl_path, json_path, transform=None):
+    """
+    Convierte un archivo JSONL al formato de arreglo JSON indentado que producían los scrapers
+    (equivalente a `json.dump(productos, f, indent=4, ensure_ascii=False)`), de forma incremental.
+    `transform` se aplica a los registros por lotes (ver `iter_batches`). Retorna el número de registros convertidos.
+    """
+    count = 0
+    tmp_path = json_path + ".tmp"
+    with metrics.timer("exportacion_json"), open(tmp_path, 'w', encoding='utf-8') as out:
+        for record in (record for batch in iter_batches(jsonl_path, transform=transform) for record in batch):
+            out.write("[\n" if count == 0 else ",\n")
+            body = json.dumps(record, indent=4, ensure_ascii=False)
+            out.write("\n".join("    " + line for line in body.split("\n")))
+            count += 1
+        out.write("\n]" if count else "[]")
+    os.replace(tmp_path, json_path)
+    return count
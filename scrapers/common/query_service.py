@@ -0,0 +1,256 @@
+import heapq
+import json
+import math
+import os
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from scrapers.common.normalize import fold, tokenize
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+# Exportación JSON de la última ejecución de cada tienda. Se escribe de forma atómica al final del scraper,
+# así que un cambio en su fecha de modificación indica una ejecución terminada.
+SNAPSHOT_SOURCES = {
+    "Jumbo": os.path.join(PROJECT_ROOT, "raw_data", "jumbo", "productos_jumbo.json"),
+    "Carulla": os.path.join(PROJECT_ROOT, "raw_data", "carulla", "productos_carulla.json"),
+    "Mercado Zapatoca": os.path.join(PROJECT_ROOT, "raw_data", "zapatoca", "productos_zapatoca.json"),
+}
+SORT_FIELDS = ("precio_final", "precio_por_unidad")
+
+_EMPTY = frozenset()
+
+def _sort_value(value):
+    return value if isinstance(value, (int, float)) and value > 0 else math.inf
+
+class CatalogSnapshot:
+    """
+    Catálogo inmutable de todas las tiendas con sus índices en memoria:
+
+    - índice invertido: palabra de `nombre_completo` o `marca` (sin tildes, ver `tokenize`) -> productos;
+    - tienda y categoría (cualquiera de los tres niveles, sin tildes) -> productos;
+    - productos ordenados por `precio_final` y por `precio_por_unidad`, para filtrar rangos de precio con búsqueda binaria.
+    """
+
+    def __init__(self, products, sources=None):
+        self.products = products
+        self.sources = sources or {}
+        self.loaded_at = time.time()
+        tokens, stores, categories = {}, {}, {}
+        for i, product in enumerate(products):
+            for token in set(tokenize(f"{product.get('nombre_completo') or ''} {product.get('marca') or ''}")):
+                tokens.setdefault(token, set()).add(i)
+            stores.setdefault(fold(product.get("tienda")), set()).add(i)
+            for level in ("categoria_principal", "sub_categoria", "tipo"):
+                if product.get(level):
+                    categories.setdefault(fold(product[level]), set()).add(i)
+        self.tokens = {token: frozenset(ids) for token, ids in tokens.items()}
+        self.stores = {store: frozenset(ids) for store, ids in stores.items()}
+        self.categories = {category: frozenset(ids) for category, ids in categories.items()}
+
+        self._values, self._order, self._sorted_values = {}, {}, {}
+        for field in SORT_FIELDS:
+            values = [_sort_value(product.get(field)) for product in products]
+            order = sorted(range(len(products)), key=values.__getitem__)
+            self._values[field] = values
+            self._order[field] = order
+            self._sorted_values[field] = [values[i] for i in order]
+
+    def search(self, text="", store=None, category=None, min_price=None, max_price=None, sort="precio_final", limit=10):
+        """
+        Productos que contienen todas las palabras de `text`, ordenados del más barato al más caro según `sort`
+        (`precio_final` o `precio_por_unidad`); `min_price`/`max_price` filtran sobre ese mismo campo.
+        Retorna `(productos, número de coincidencias, el más barato por tienda)`.
+        """
+        if sort not in SORT_FIELDS:
+            raise ValueError(f"Orden desconocido '{sort}'. Opciones: {', '.join(SORT_FIELDS)}.")
+        values = self._values[sort]
+        low = min_price if min_price is not None else -math.inf
+        high = max_price if max_price is not None else math.inf
+
+        filters = [self.tokens.get(token, _EMPTY) for token in tokenize(text)]
+        if store:
+            filters.append(self.stores.get(fold(store), _EMPTY))
+        if category:
+            filters.append(self.categories.get(fold(category), _EMPTY))
+
+        if filters:
+            # Se intersecta desde el conjunto más pequeño.
+            filters.sort(key=len)
+            candidates = set(filters[0])
+            for ids in filters[1:]:
+                candidates &= ids
+                if not candidates:
+                    break
+            if min_price is not None or max_price is not None:
+                candidates = {i for i in candidates if low <= values[i] <= high}
+        else:
+            sorted_values = self._sorted_values[sort]
+            order = self._order[sort]
+            candidates = order[bisect_left(sorted_values, low):bisect_right(sorted_values, high)]
+
+            # Ya están ordenados: basta recorrerlos hasta encontrar el más barato de cada tienda.
+            top = candidates[:limit]
+            best_by_store = {}
+            for i in candidates:
+                best_by_store.setdefault(self.products[i].get("tienda"), i)
+                if len(best_by_store) == len(self.stores):
+                    break
+            return self._result(top, len(candidates), best_by_store)
+
+        best_by_store = {}
+        for i in candidates:
+            store_name = self.products[i].get("tienda")
+            current = best_by_store.get(store_name)
+            if current is None or values[i] < values[current]:
+                best_by_store[store_name] = i
+        return self._result(heapq.nsmallest(limit, candidates, key=values.__getitem__), len(candidates), best_by_store)
+
+    def _result(self, top, total, best_by_store):
+        return (
+            [self.products[i] for i in top],
+            total,
+            {store_name: self.products[i] for store_name, i in best_by_store.items()},
+        )
+
+    def summary(self):
+        stores = {}
+        for product in self.products:
+            stores[product.get("tienda")] = stores.get(product.get("tienda"), 0) + 1
+        return {"productos": len(self.products), "palabras_indexadas": len(self.tokens), "por_tienda": stores,
+                "cargado": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.loaded_at))}
+
+def load_snapshot(sources=None):
+    """
+    Carga la exportación JSON de cada tienda (`{tienda: ruta}`) y construye un `CatalogSnapshot`.
+    Un producto listado en varias categorías de una tienda se carga una sola vez.
+    """
+    products, versions = {}, {}
+    for store, path in (sources or SNAPSHOT_SOURCES).items():
+        if not os.path.exists(path):
+            continue
+        versions[store] = os.path.getmtime(path)
+        with open(path, 'r', encoding='utf-8') as f:
+            for product in json.load(f):
+                products.setdefault((store, product.get("url_producto")), dict(product, tienda=product.get("tienda") or store))
+    return CatalogSnapshot(list(products.values()), versions)
+
+class QueryService:
+    """
+    Servicio local de consulta de precios sobre el último catálogo de cada tienda.
+
+    Un hilo revisa cada `poll_interval` segundos la fecha de modificación de las exportaciones de las tiendas y,
+    cuando una cambia, construye un `CatalogSnapshot` nuevo y lo reemplaza de una sola asignación: las consultas
+    en curso terminan con el catálogo anterior y las siguientes usan el nuevo, sin pausas ni bloqueos.
+
+    Endpoints (`ThreadingHTTPServer`, respuestas JSON):
+    - `GET /buscar?q=arroz diana&tienda=&categoria=&precio_min=&precio_max=&orden=precio_final&limite=10`
+    - `GET /estado`
+    """
+
+    def __init__(self, logger, host="127.0.0.1", port=8080, sources=None, poll_interval=5.0):
+        self.logger = logger
+        self.sources = sources or SNAPSHOT_SOURCES
+        self.poll_interval = poll_interval
+        self.snapshot = CatalogSnapshot([])
+        self._stop = threading.Event()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._threads = []
+
+    @property
+    def address(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def reload(self):
+        """Carga el catálogo si alguna exportación cambió. Retorna True si se reemplazó."""
+        versions = {store: os.path.getmtime(path) for store, path in self.sources.items() if os.path.exists(path)}
+        if versions == self.snapshot.sources:
+            return False
+        start = time.monotonic()
+        snapshot = load_snapshot(self.sources)
+        self.snapshot = snapshot
+        self.logger.info(f"Servicio de consulta: catálogo cargado con {len(snapshot.products)} productos "
+                         f"de {len(snapshot.sources)} tiendas en {time.monotonic() - start:.2f} s.")
+        return True
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.reload()
+            except Exception as e:
+                self.logger.error(f"Servicio de consulta: no se pudo recargar el catálogo: {e}", exc_info=True)
+
+    def start(self):
+        """Carga el catálogo e inicia el servidor y el hilo de recarga en segundo plano."""
+        self.reload()
+        for target, name in ((self._server.serve_forever, "query-http"), (self._watch, "query-reload")):
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        self.logger.info(f"Servicio de consulta escuchando en {self.address}/buscar?q=...")
+        return self
+
+    def close(self):
+        self._stop.set()
+        self._server.shutdown()
+        self._server.server_close()
+        for thread in self._threads:
+            thread.join()
+
+    def query(self, params):
+        """Atiende una consulta de `/buscar` (parámetros ya decodificados). Retorna el cuerpo de la respuesta."""
+        start = time.perf_counter()
+        snapshot = self.snapshot
+
+        def number(name):
+            value = params.get(name)
+            return float(value) if value not in (None, "") else None
+
+        limit = int(params.get("limite") or 10)
+        products, total, best_by_store = snapshot.search(
+            params.get("q", ""), store=params.get("tienda"), category=params.get("categoria"),
+            min_price=number("precio_min"), max_price=number("precio_max"),
+            sort=params.get("orden") or "precio_final", limit=max(1, min(limit, 500)),
+        )
+        return {
+            "consulta": params,
+            "coincidencias": total,
+            "resultados": products,
+            "mas_barato_por_tienda": best_by_store,
+            "milisegundos": round((time.perf_counter() - start) * 1000, 3),
+        }
+
+    def _handler_class(self):
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlsplit(self.path)
+                params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+                try:
+                    if url.path == "/buscar":
+                        self._send(200, service.query(params))
+                    elif url.path == "/estado":
+                        self._send(200, service.snapshot.summary())
+                    else:
+                        self._send(404, {"error": f"Ruta desconocida: {url.path}"})
+                except ValueError as e:
+                    self._send(400, {"error": str(e)})
+
+            def _send(self, status, body):
+                data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                service.logger.debug("Servicio de consulta: " + format % args)
+
+        return Handler
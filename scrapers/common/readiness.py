@@ -0,0 +1,191 @@
+import json
+import os
+import threading
+import time
+
+from selenium.common.exceptions import TimeoutException
+
+from scrapers.common import metrics
+
+# Sondea en una sola llamada el estado del listado: tarjetas, texto de la primera tarjeta y recursos de red.
+_PROBE_SCRIPT = """
+const cardSelector = arguments[0], anchorSelector = arguments[1];
+if (!window.__readinessBuffer) {
+    try { performance.setResourceTimingBufferSize(10000); } catch (e) {}
+    window.__readinessBuffer = true;
+}
+const anchor = anchorSelector ? document.querySelector(anchorSelector) : null;
+return {
+    cards: document.querySelectorAll(cardSelector).length,
+    anchor: anchor ? anchor.textContent.trim() : null,
+    resources: performance.getEntriesByType('resource').length,
+    readyState: document.readyState
+};
+"""
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+class PageReadiness:
+    """
+    Decide cuándo un listado terminó de renderizar, en lugar de dormir un tiempo fijo por página.
+
+    Una página se considera lista cuando, durante una ventana de calma (`quiet_window`):
+      - hay al menos una tarjeta de producto y ni su número ni el texto de la primera cambian,
+      - no aparecen nuevos recursos de red (red inactiva), y
+      - si se indicó `previous_anchor`, el texto de la primera tarjeta ya es distinto al de la página anterior.
+
+    La ventana de calma se adapta por tienda: si después de declarar lista una página el número de tarjetas
+    cambió (`confirm`), la ventana crece; si una de cada `confirm_every` páginas sigue igual tras esperar una
+    ventana más, se reduce poco a poco. La ventana aprendida y las estadísticas de espera se guardan en
+    `stats_path` para que la siguiente ejecución parta de ellas.
+    """
+
+    def __init__(self, store, logger, stats_path=None, initial_quiet=1.0, min_quiet=0.3, max_quiet=4.0, poll_interval=0.1,
+                 confirm_every=5):
+        self.store = store
+        self.logger = logger
+        self.stats_path = stats_path
+        self.min_quiet = min_quiet
+        self.max_quiet = max_quiet
+        self.poll_interval = poll_interval
+        self.quiet_window = initial_quiet
+        self.confirm_every = max(1, confirm_every)
+        self._confirmations = 0
+        self._lock = threading.Lock()
+        self._waits = []
+        self.timeouts = 0
+        self.too_early = 0
+
+        if stats_path and os.path.exists(stats_path):
+            try:
+                with open(stats_path, 'r', encoding='utf-8') as f:
+                    learned = json.load(f).get("quiet_window")
+                if learned:
+                    self.quiet_window = min(max(float(learned), min_quiet), max_quiet)
+                    logger.info(f"Ventana de calma aprendida para {store}: {self.quiet_window:.2f} s.")
+            except (OSError, ValueError):
+                logger.warning(f"No se pudieron leer las estadísticas de espera en '{stats_path}'.")
+
+    def probe(self, driver, card_selector, anchor_selector=None):
+        """Retorna el estado actual del listado: `cards`, `anchor`, `resources` y `readyState`."""
+        return driver.execute_script(_PROBE_SCRIPT, card_selector, anchor_selector)
+
+    def wait(self, driver, card_selector, anchor_selector=None, previous_anchor=None, timeout=20):
+        """
+        Espera a que el listado esté listo y retorna el último sondeo.
+
+        Si la red nunca queda inactiva (p. ej. por balizas de analítica), basta con que las tarjetas
+        permanezcan estables durante tres ventanas de calma. Si se agota `timeout` con tarjetas presentes
+        se retorna igualmente el sondeo; si no hay tarjetas (o la primera no cambió) se lanza `TimeoutException`.
+        El tiempo de espera se registra en las métricas de la ejecución como `espera_listado`.
+        """
+        with metrics.timer("espera_listado"):
+            return self._wait(driver, card_selector, anchor_selector, previous_anchor, timeout)
+
+    def _wait(self, driver, card_selector, anchor_selector, previous_anchor, timeout):
+        quiet_window = self.quiet_window
+        start = time.monotonic()
+        deadline = start + timeout
+        last = None
+        dom_stable_since = None
+        network_idle_since = None
+
+        while True:
+            now = time.monotonic()
+            snapshot = self.probe(driver, card_selector, anchor_selector)
+            candidate = (
+                snapshot["cards"] > 0
+                and snapshot["readyState"] != "loading"
+                and (previous_anchor is None or (snapshot["anchor"] is not None and snapshot["anchor"] != previous_anchor))
+            )
+
+            if candidate:
+                same_dom = last is not None and snapshot["cards"] == last["cards"] and snapshot["anchor"] == last["anchor"]
+                same_network = last is not None and snapshot["resources"] == last["resources"]
+                if not same_dom or dom_stable_since is None:
+                    dom_stable_since = now
+                if not same_network or network_idle_since is None:
+                    network_idle_since = now
+                dom_quiet = now - dom_stable_since
+                if dom_quiet >= quiet_window and (now - network_idle_since >= quiet_window or dom_quiet >= 3 * quiet_window):
+                    self._record(now - start)
+                    return snapshot
+            else:
+                dom_stable_since = network_idle_since = None
+
+            if now >= deadline:
+                with self._lock:
+                    self.timeouts += 1
+                if candidate:
+                    self.logger.warning(f"El listado no se estabilizó en {timeout} s; se continúa con {snapshot['cards']} tarjetas.")
+                    self._record(now - start)
+                    return snapshot
+                raise TimeoutException(f"El listado no estuvo listo en {timeout} s ({snapshot['cards']} tarjetas).")
+            last = snapshot
+            time.sleep(self.poll_interval)
+
+    def confirm(self, driver, snapshot, card_selector):
+        """
+        Vuelve a contar las tarjetas después de leer la página. Si cambiaron, la página se declaró lista
+        demasiado pronto y la ventana de calma crece.
+
+        Un conteo inmediato casi nunca alcanza a ver tarjetas tardías, así que no basta para reducir la ventana:
+        una de cada `confirm_every` páginas se vuelve a contar tras esperar una ventana de calma completa, y solo
+        si en esa espera no llegaron tarjetas nuevas la ventana se reduce ligeramente.
+        """
+        with self._lock:
+            self._confirmations += 1
+            delay = self.quiet_window if self._confirmations % self.confirm_every == 0 else 0.0
+        if delay:
+            with metrics.timer("confirmacion_listado"):
+                time.sleep(delay)
+        try:
+            cards = self.probe(driver, card_selector)["cards"]
+        except Exception:
+            return
+        with self._lock:
+            if cards != snapshot["cards"]:
+                self.too_early += 1
+                self.quiet_window = min(self.max_quiet, self.quiet_window * 1.5)
+                self.logger.info(f"Página declarada lista antes de tiempo ({snapshot['cards']} -> {cards} tarjetas). "
+                                 f"Ventana de calma: {self.quiet_window:.2f} s.")
+            elif delay:
+                self.quiet_window = max(self.min_quiet, self.quiet_window * 0.95)
+
+    def _record(self, seconds):
+        with self._lock:
+            self._waits.append(seconds)
+
+    def summary(self):
+        """Estadísticas de espera de esta ejecución."""
+        with self._lock:
+            waits = sorted(self._waits)
+            return {
+                "tienda": self.store,
+                "quiet_window": round(self.quiet_window, 3),
+                "paginas": len(waits),
+                "espera_promedio": round(sum(waits) / len(waits), 3) if waits else 0.0,
+                "espera_p50": round(_percentile(waits, 0.5), 3),
+                "espera_p90": round(_percentile(waits, 0.9), 3),
+                "espera_max": round(waits[-1], 3) if waits else 0.0,
+                "espera_total": round(sum(waits), 3),
+                "timeouts": self.timeouts,
+                "listas_antes_de_tiempo": self.too_early,
+            }
+
+    def save(self):
+        """Registra el resumen en el log y lo persiste en `stats_path`."""
+        summary = self.summary()
+        self.logger.info(
+            f"Esperas de carga ({self.store}): {summary['paginas']} páginas, promedio {summary['espera_promedio']:.2f} s, "
+            f"p90 {summary['espera_p90']:.2f} s, total {summary['espera_total']:.1f} s, "
+            f"{summary['listas_antes_de_tiempo']} listas antes de tiempo, ventana final {summary['quiet_window']:.2f} s."
+        )
+        if self.stats_path and summary["paginas"]:
+            with open(self.stats_path, 'w', encoding='utf-8') as f:
+                json.dump(summary, f, indent=4, ensure_ascii=False)
+        return summary
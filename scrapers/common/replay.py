@@ -0,0 +1,167 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+import requests
+
+from scrapers.common.product_writer import iter_records
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+RECORDINGS_ROOT = os.path.join(PROJECT_ROOT, "benchmarks", "grabaciones")
+
+# Cabeceras de la respuesta original que se conservan en la grabación.
+_KEPT_HEADERS = ("Content-Type",)
+
+class Recording:
+    """
+    Grabación de las respuestas HTTP de una tienda, en `<root>/<tienda>/`:
+
+    - `respuestas.jsonl`: una línea por petición (`ruta` con su query string, `estado`, `cabeceras`, `archivo`);
+    - `cuerpos/<sha1>`: el cuerpo de cada respuesta, direccionado por su contenido;
+    - `enlaces.json`: el catálogo de enlaces del menú (las URLs sin el dominio), con el que se reemplaza la Fase 1.
+    """
+
+    def __init__(self, store, root=RECORDINGS_ROOT):
+        self.store = store
+        self.directory = os.path.join(root, store)
+        self.index_path = os.path.join(self.directory, "respuestas.jsonl")
+        self.links_path = os.path.join(self.directory, "enlaces.json")
+        self.responses = {}
+        self._lock = threading.Lock()
+        if os.path.exists(self.index_path):
+            for entry in iter_records(self.index_path):
+                self.responses[entry["ruta"]] = entry
+
+    def exists(self):
+        return bool(self.responses) and os.path.exists(self.links_path)
+
+    def get(self, path):
+        """Retorna `(estado, cabeceras, cuerpo)` de una ruta grabada, o None."""
+        entry = self.responses.get(path)
+        if entry is None:
+            return None
+        with open(os.path.join(self.directory, entry["archivo"]), 'rb') as f:
+            return entry["estado"], entry["cabeceras"], f.read()
+
+    def put(self, path, status, headers, body):
+        relative = os.path.join("cuerpos", hashlib.sha1(body).hexdigest())
+        body_path = os.path.join(self.directory, relative)
+        with self._lock:
+            if not os.path.exists(body_path):
+                os.makedirs(os.path.dirname(body_path), exist_ok=True)
+                with open(body_path, 'wb') as f:
+                    f.write(body)
+            entry = {"ruta": path, "estado": status, "cabeceras": headers, "archivo": relative}
+            self.responses[path] = entry
+            with open(self.index_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def load_links(self):
+        with open(self.links_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def save_links(self, links):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.links_path, 'w', encoding='utf-8') as f:
+            json.dump(links, f, indent=4, ensure_ascii=False)
+
+class ReplayServer:
+    """
+    Servidor HTTP local que reproduce la grabación de una tienda para medir los scrapers sin salir a internet.
+
+    Las respuestas de texto se sirven con el dominio original (`origin`) reemplazado por el del servidor, de modo
+    que los enlaces absolutos (paginación, siguiente página) también apuntan a la grabación. Con `record=True`
+    las rutas que no están grabadas se piden al sitio real y se agregan a la grabación; sin él, responden 404.
+    `latency` (segundos) simula el tiempo de red de cada respuesta.
+    """
+
+    def __init__(self, recording, origin, logger, record=False, latency=0.0, host="127.0.0.1", port=0):
+        self.recording = recording
+        self.origin = origin.rstrip('/')
+        self.logger = logger
+        self.record = record
+        self.latency = latency
+        self.requests_served = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._upstream = requests.Session() if record else None
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def address(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name=f"replay-{self.recording.store}", daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread:
+            self._thread.join()
+        if self._upstream:
+            self._upstream.close()
+
+    def local_url(self, path):
+        """URL del servidor para una ruta grabada (p. ej. las de `enlaces.json`)."""
+        return self.address + path
+
+    def _fetch_upstream(self, path, user_agent):
+        response = self._upstream.get(self.origin + path, headers={"User-Agent": user_agent or ""}, timeout=30)
+        headers = {name: response.headers[name] for name in _KEPT_HEADERS if name in response.headers}
+        self.recording.put(path, response.status_code, headers, response.content)
+        return response.status_code, headers, response.content
+
+    def respond(self, path, user_agent=None):
+        """Retorna `(estado, cabeceras, cuerpo)` para una ruta, ya con el dominio reescrito."""
+        with self._lock:
+            self.requests_served += 1
+        found = self.recording.get(path)
+        if found is None:
+            with self._lock:
+                self.misses += 1
+            if not self.record:
+                return 404, {"Content-Type": "text/plain"}, b"Ruta no grabada"
+            found = self._fetch_upstream(path, user_agent)
+        status, headers, body = found
+        content_type = headers.get("Content-Type", "")
+        if content_type.startswith(("text/", "application/json")):
+            body = body.replace(self.origin.encode('utf-8'), self.address.encode('utf-8'))
+        if self.latency:
+            time.sleep(self.latency)
+        return status, headers, body
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                url = urlsplit(self.path)
+                path = url.path + (f"?{url.query}" if url.query else "")
+                try:
+                    status, headers, body = server.respond(path, self.headers.get("User-Agent"))
+                except Exception as e:
+                    server.logger.error(f"Servidor de reproducción: error respondiendo {path}: {e}", exc_info=True)
+                    status, headers, body = 502, {"Content-Type": "text/plain"}, str(e).encode('utf-8')
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                server.logger.debug("Servidor de reproducción: " + format % args)
+
+        return Handler
@@ -0,0 +1,98 @@
+import json
+import os
+from functools import partial
+
+from scrapers.common.price_events import update_price_events
+from scrapers.common.price_history import PriceHistory, run_timestamp
+from scrapers.common.product_writer import count_records, jsonl_to_json
+
+class ScrapeOptions:
+    """
+    Opciones de una ejecución de scraping, comunes a todas las tiendas (ver los argumentos del orquestador).
+
+    - Fase 2: `workers`, `max_pages_per_driver`, `resume`, `engine` (uno de los `ENGINES` de la tienda),
+      `parse_workers`, `lightweight`, `warm_browsers`, `delta` y `http_cache`.
+    - Fase 1: `links_ttl_hours` (None usa el valor de la tienda).
+    - Etapas posteriores (ver `finish_run`): `unit_prices`, `history`, `events`, `images` y `parquet`.
+    """
+
+    def __init__(self, workers=1, max_pages_per_driver=50, resume=False, engine="selenium", parse_workers=1,
+                 lightweight=True, warm_browsers=1, links_ttl_hours=None, delta=False, parquet=False, history=True,
+                 unit_prices=True, events=True, images=False, http_cache=True):
+        self.workers = workers
+        self.max_pages_per_driver = max_pages_per_driver
+        self.resume = resume
+        self.engine = engine
+        self.parse_workers = parse_workers
+        self.lightweight = lightweight
+        self.warm_browsers = warm_browsers
+        self.links_ttl_hours = links_ttl_hours
+        self.delta = delta
+        self.parquet = parquet
+        self.history = history
+        self.unit_prices = unit_prices
+        self.events = events
+        self.images = images
+        self.http_cache = http_cache
+
+    def __repr__(self):
+        return f"ScrapeOptions({', '.join(f'{name}={value!r}' for name, value in vars(self).items())})"
+
+def finish_run(products_filepath, store, options, logger, user_agent, start_time, complete=True):
+    """
+    Etapas que siguen a la Fase 2 en todas las tiendas, sobre el JSONL de productos `products_filepath`:
+    exportación a JSON (junto al JSONL, con extensión `.json`), historial de precios, eventos de cambio de precio,
+    descarga de imágenes y exportación a Parquet, según `options` (un `ScrapeOptions`). El fallo de una etapa se
+    registra y no detiene las siguientes. `start_time` (`time.time()` al iniciar) fecha la ejecución en el historial.
+
+    Con `complete=False` (ver `Phase2Result`) no se generan eventos de precio: los productos de las categorías que
+    faltan se reportarían como retirados y la copia parcial reemplazaría la base de la ejecución siguiente.
+    """
+    products_json_filepath = os.path.splitext(products_filepath)[0] + ".json"
+    # Las columnas de precio por unidad se agregan a las exportaciones; el JSONL queda tal como lo escribió la Fase 2.
+    transform = None
+    if options.unit_prices:
+        try:
+            from scrapers.common.unit_price import add_unit_prices
+            transform = partial(add_unit_prices, logger=logger)
+        except ImportError as e:
+            logger.warning(f"No se calculará el precio por unidad: {e}")
+    try:
+        logger.info(f"Resumen: Total de productos extraídos para {store}: {count_records(products_filepath)}")
+        jsonl_to_json(products_filepath, products_json_filepath, transform=transform)
+        logger.info(f"Productos exportados en formato JSON a '{products_json_filepath}'.")
+    except (FileNotFoundError, json.JSONDecodeError):
+        logger.warning("No se pudo leer el archivo final de productos o está vacío.")
+
+    if not os.path.exists(products_filepath):
+        return
+
+    if options.history:
+        try:
+            with PriceHistory(logger=logger) as price_history:
+                price_history.import_jsonl(products_filepath, store, run_timestamp(start_time))
+        except Exception as e:
+            logger.error(f"No se pudo guardar el historial de precios: {e}", exc_info=True)
+
+    if options.events and not complete:
+        logger.warning("No se generan los eventos de cambio de precio: la Fase 2 no completó todas las categorías.")
+    elif options.events:
+        try:
+            update_price_events(products_filepath, store, logger, run_timestamp(start_time))
+        except Exception as e:
+            logger.error(f"No se pudieron generar los eventos de cambio de precio: {e}", exc_info=True)
+
+    if options.images:
+        try:
+            # Importación diferida: aiohttp solo es necesario para esta etapa.
+            from scrapers.common.image_cache import fetch_store_images
+            fetch_store_images(products_filepath, store, user_agent, logger)
+        except Exception as e:
+            logger.error(f"No se pudieron descargar las imágenes de los productos: {e}", exc_info=True)
+
+    if options.parquet:
+        try:
+            from scrapers.common.parquet_writer import PARQUET_ROOT, jsonl_to_parquet
+            jsonl_to_parquet(products_filepath, PARQUET_ROOT, store, logger, transform=transform)
+        except Exception as e:
+            logger.error(f"No se pudo exportar los productos a Parquet: {e}", exc_info=True)
@@ -0,0 +1,104 @@
+import queue
+import threading
+
+# Marcador que indica a un worker que no quedan más tareas en la cola.
+_FIN = object()
+# Marcador que indica que una tarea terminó sin errores.
+_TASK_DONE = object()
+
+class _Stopped(Exception):
+    """Lo lanza `emit` en los workers cuando el hilo que consume los resultados falló y la ejecución se detiene."""
+
+def run_sharded(tasks, process_task, num_workers, on_result, logger, worker_setup=None, worker_teardown=None, on_task_done=None,
+                max_pending=0):
+    """
+    Reparte `tasks` entre `num_workers` hilos que las toman de una cola compartida.
+
+    - `process_task(state, task, emit)` se ejecuta en el hilo del worker. Por cada página procesada
+      llama a `emit(page_num, products)`. `state` es lo que retorne `worker_setup()` (por ejemplo,
+      un WebDriver propio del worker) o None.
+    - `on_result(task, page_num, products)` y `on_task_done(task)` se ejecutan SIEMPRE en el hilo que
+      llama a esta función, de modo que la escritura de resultados queda serializada y no necesita locks.
+      `on_task_done` solo se llama si `process_task` terminó sin lanzar excepciones.
+    - Un error en una tarea se registra y el worker continúa con la siguiente.
+    - Con `max_pending > 0` la cola de resultados es acotada: si `on_result` se atrasa, `emit` bloquea a los
+      workers hasta que haya espacio (contrapresión).
+    - Si `on_result` u `on_task_done` lanzan una excepción, los workers se detienen (el siguiente `emit` aborta su
+      tarea y no toman tareas nuevas), la cola de resultados se vacía para desbloquearlos, se espera a que liberen
+      sus recursos (`worker_teardown`) y la excepción se propaga.
+
+    Retorna el número de tareas procesadas con éxito.
+    """
+    num_workers = max(1, min(num_workers, len(tasks)))
+    task_queue = queue.Queue()
+    result_queue = queue.Queue(maxsize=max_pending)
+    for task in tasks:
+        task_queue.put(task)
+    for _ in range(num_workers):
+        task_queue.put(_FIN)
+
+    stop = threading.Event()
+
+    def emit(task, page_num, products):
+        if stop.is_set():
+            raise _Stopped()
+        result_queue.put((task, page_num, products))
+
+    def worker():
+        state = None
+        try:
+            if worker_setup:
+                state = worker_setup()
+            while not stop.is_set():
+                task = task_queue.get()
+                if task is _FIN:
+                    break
+                try:
+                    process_task(state, task, lambda page_num, products, task=task: emit(task, page_num, products))
+                    result_queue.put((task, _TASK_DONE, None))
+                except Exception as e:
+                    if stop.is_set():
+                        break
+                    logger.error(f"[{threading.current_thread().name}] Error procesando la tarea {task}: {e}", exc_info=True)
+        except Exception as e:
+            logger.error(f"[{threading.current_thread().name}] Error crítico en el worker: {e}", exc_info=True)
+        finally:
+            if worker_teardown and state is not None:
+                try:
+                    worker_teardown(state)
+                except Exception as e:
+                    logger.warning(f"[{threading.current_thread().name}] Error liberando recursos del worker: {e}")
+            result_queue.put(_FIN)
+
+    logger.info(f"Iniciando Fase 2 con {num_workers} worker(s) para {len(tasks)} tareas.")
+    threads = [threading.Thread(target=worker, name=f"worker-{i + 1}", daemon=True) for i in range(num_workers)]
+    for thread in threads:
+        thread.start()
+
+    completed = 0
+    active_workers = num_workers
+    try:
+        while active_workers:
+            item = result_queue.get()
+            if item is _FIN:
+                active_workers -= 1
+                continue
+            task, page_num, products = item
+            if page_num is _TASK_DONE:
+                completed += 1
+                if on_task_done:
+                    on_task_done(task)
+            else:
+                on_result(task, page_num, products)
+    except BaseException:
+        logger.error("Falló el procesamiento de los resultados de la Fase 2; se detienen los workers.")
+        stop.set()
+        # Los workers bloqueados en una cola llena necesitan espacio para ver la señal y terminar.
+        while active_workers:
+            if result_queue.get() is _FIN:
+                active_workers -= 1
+        raise
+    finally:
+        for thread in threads:
+            thread.join()
+    return completed
@@ -0,0 +1,121 @@
+import time
+
+import numpy as np
+
+from scrapers.common.normalize import QUANTITY_RE, UNITS, fold_joined, parse_number
+from scrapers.common.product_record import as_dict
+
+# Unidad de la columna `cantidad` según la unidad base de la medida (g -> kg, ml -> l) y su factor.
+PRICE_UNITS = {"g": ("kg", 0.001), "ml": ("l", 0.001), "un": ("un", 1.0)}
+_BASE_CODES = {base: code for code, base in enumerate(PRICE_UNITS)}
+_UNIT_NAMES = np.array([PRICE_UNITS[base][0] for base in PRICE_UNITS] + [None], dtype=object)
+_UNIT_SCALE = np.array([PRICE_UNITS[base][1] for base in PRICE_UNITS])
+_COUNT_CODE = _BASE_CODES["un"]
+_NO_UNIT = len(PRICE_UNITS)
+
+def _first_per_row(rows, mask, n):
+    """Índice (en las coincidencias) de la primera coincidencia de cada fila que cumple `mask`, o -1."""
+    first = np.full(n, -1)
+    selected = np.flatnonzero(mask)
+    unique_rows, positions = np.unique(rows[selected], return_index=True)
+    first[unique_rows] = selected[positions]
+    return first
+
+def compute_unit_prices(names, prices):
+    """
+    Calcula el contenido y el precio por unidad de un catálogo completo.
+
+    Los nombres se normalizan y se recorren con el tokenizador compilado `QUANTITY_RE` en una sola pasada; el resto
+    (conversión de unidades, elección de la medida de cada producto y división) son operaciones de arreglos de NumPy.
+    Sigue las mismas reglas que `parse_quantity`: la primera medida de peso o volumen y, si no hay, el conteo.
+
+    Retorna `(cantidad, unidad, precio_por_unidad)`: `cantidad` en kg, l o un (NaN si el nombre no la indica),
+    `unidad` ('kg', 'l', 'un' o None) y el precio por kg, litro o unidad (NaN si no se conoce la cantidad o el precio).
+    """
+    n = len(names)
+    text = fold_joined(names)
+    # Posición de inicio de cada nombre dentro del texto unido.
+    separators = np.flatnonzero(np.frombuffer(text.encode("ascii"), dtype=np.uint8) == ord("|"))
+    starts = np.concatenate(([0], separators + 1))
+
+    matches = list(QUANTITY_RE.finditer(text))
+    positions = np.fromiter((match.start() for match in matches), dtype=np.int64, count=len(matches))
+    amounts = np.fromiter((parse_number(match.group("amount")) for match in matches), dtype=np.float64, count=len(matches))
+    packs = np.fromiter((int(match.group("pack") or 1) for match in matches), dtype=np.float64, count=len(matches))
+    units = [UNITS[match.group("unit")] for match in matches]
+    codes = np.fromiter((_BASE_CODES[base] for base, _ in units), dtype=np.int64, count=len(matches))
+    factors = np.fromiter((factor for _, factor in units), dtype=np.float64, count=len(matches))
+
+    rows = np.searchsorted(starts, positions, side="right") - 1
+    # Un elemento extra al final: los productos sin coincidencias (índice -1) lo seleccionan y se descartan con `np.where`.
+    totals = np.append(amounts * factors * packs, np.nan)
+    codes = np.append(codes, _NO_UNIT)
+    measure = _first_per_row(rows, codes[:-1] != _COUNT_CODE, n)
+    count = _first_per_row(rows, codes[:-1] == _COUNT_CODE, n)
+
+    has_measure, has_count = measure >= 0, count >= 0
+    code = np.where(has_measure, codes[measure], np.where(has_count, _COUNT_CODE, _NO_UNIT))
+    base_amount = np.where(has_measure, totals[measure], np.where(has_count, totals[count], np.nan))
+    quantity = base_amount * np.append(_UNIT_SCALE, np.nan)[code]
+
+    prices = np.asarray(prices, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        unit_price = np.where((quantity > 0) & (prices > 0), prices / quantity, np.nan)
+    return quantity, _UNIT_NAMES[code], unit_price
+
+def add_unit_prices(products, logger=None):
+    """
+    Agrega las columnas `cantidad`, `unidad` y `precio_por_unidad` (ver `compute_unit_prices`) a una lista de
+    productos. Retorna una lista de diccionarios con las columnas nuevas al final (None donde no aplican).
+    """
+    start = time.perf_counter()
+    products = [dict(as_dict(product)) for product in products]
+    quantity, unit, unit_price = compute_unit_prices(
+        [product.get("nombre_completo") for product in products],
+        [product.get("precio_final") or 0 for product in products],
+    )
+    known = ~np.isnan(quantity)
+    quantity = np.where(known, np.round(quantity, 6), None)
+    unit_price = np.where(np.isnan(unit_price), None, np.round(unit_price, 2))
+    for product, q, u, p in zip(products, quantity.tolist(), unit.tolist(), unit_price.tolist()):
+        product["cantidad"] = q
+        product["unidad"] = u
+        product["precio_por_unidad"] = p
+    if logger:
+        logger.info(f"Precio por unidad calculado para {int(np.count_nonzero(known))} de {len(products)} productos en {time.perf_counter() - start:.2f} s.")
+    return products
+
+if __name__ == '__main__':
+    # Benchmark sobre el catálogo de ejemplo: python -m scrapers.common.unit_price [ruta.json]
+    import json
+    import os
+    import sys
+
+    from scrapers.common.normalize import parse_quantity
+
+    path = sys.argv[1] if len(sys.argv) > 1 else os.path.join("raw_data", "jumbo", "jumbo_products.json")
+    with open(path, 'r', encoding='utf-8') as f:
+        catalog = json.load(f)
+    names = [product["nombre_completo"] for product in catalog]
+    prices = [product["precio_final"] for product in catalog]
+
+    def per_product():
+        result = []
+        for name, price in zip(names, prices):
+            quantity = parse_quantity(name)
+            if quantity:
+                unit, scale = PRICE_UNITS[quantity.unidad]
+                result.append((quantity.cantidad * scale, unit, price / (quantity.cantidad * scale) if quantity.cantidad and price else None))
+            else:
+                result.append((None, None, None))
+        return result
+
+    for label, run in (("por producto (parse_quantity)", per_product), ("vectorizado (compute_unit_prices)", lambda: compute_unit_prices(names, prices))):
+        run()
+        start = time.perf_counter()
+        for _ in range(10):
+            run()
+        elapsed = (time.perf_counter() - start) / 10
+        print(f"{label}: {elapsed * 1000:.1f} ms para {len(names)} productos ({elapsed / len(names) * 1e6:.1f} µs por producto)")
+    quantity, unit, unit_price = compute_unit_prices(names, prices)
+    print(f"Productos con cantidad: {int(np.count_nonzero(~np.isnan(quantity)))} de {len(names)}")
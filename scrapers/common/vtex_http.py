@@ -0,0 +1,177 @@
+import json
+import re
+import threading
+from contextlib import nullcontext
+from urllib.parse import parse_qs, urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from scrapers.common import metrics
+
+# La API pública de catálogo de VTEX no entrega resultados más allá de este índice.
+VTEX_MAX_INDEX = 2500
+
+# Código de la API de catálogo (parámetro `map`) para cada faceta de las URLs de la tienda que sabe traducir.
+_FACET_CODES = {"c": "c", "b": "b", "brand": "b"}
+_CATEGORY_FACET = re.compile(r"^category-\d+$")
+# Parámetros de las URLs de la tienda que solo ordenan el listado, con su nombre en la API de catálogo.
+_ORDER_PARAMS = {"order": "O", "O": "O"}
+
+class VtexCatalogClient:
+    """
+    Cliente HTTP para la API pública de búsqueda de catálogo de VTEX
+    (`/api/catalog_system/pub/products/search/<ruta-de-categoría>`).
+
+    Reemplaza el render de la página de listado en Chrome por peticiones JSON sobre conexiones
+    reutilizadas (keep-alive). Expone la misma interfaz `session()` / `count_page()` / `close()` que
+    `DriverPool`, de modo que puede pasarse como `pool` a `run_phase2`.
+
+    Con `cache` (un `ResponseCache`) cada página se pide de forma condicional y, si no cambió, se lee del disco;
+    el cliente cierra el caché al cerrarse.
+
+    Los enlaces con filtros que la API no admite (p. ej. búsquedas de texto, `_q=...&map=...,ft`) no se pueden
+    descargar con este cliente: `supports(url)` permite detectarlos antes y recorrerlos con el navegador.
+    """
+
+    def __init__(self, base_url, user_agent, logger, page_size=50, timeout=20, max_connections=4, cache=None):
+        self.base_url = base_url.rstrip('/')
+        self.logger = logger
+        self.cache = cache
+        self.page_size = page_size
+        self.timeout = timeout
+        self.pages_fetched = 0
+        self._lock = threading.Lock()
+
+        self._session = requests.Session()
+        retry = Retry(total=3, backoff_factor=1, status_forcelist=(429, 500, 502, 503, 504), allowed_methods=("GET",))
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, max_connections), max_retries=retry)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        self._session.headers.update({"User-Agent": user_agent, "Accept": "application/json"})
+
+    def search_url(self, category_url):
+        """Traduce la URL de una página de categoría a la URL de búsqueda de catálogo equivalente."""
+        path = urlsplit(category_url).path.strip('/')
+        return f"{self.base_url}/api/catalog_system/pub/products/search/{path}"
+
+    @staticmethod
+    def catalog_params(category_url):
+        """
+        Parámetros de la API de catálogo para el listado de una URL de la tienda, o None si no se puede expresar.
+
+        Sin query string, cada segmento de la ruta es una categoría (`map=c,c,c`). Con `map` en la URL (p. ej.
+        `.../tecno?map=category-1,category-1,brand`, un filtro por marca) se traduce cada faceta a su código de la
+        API (`map=c,c,b`); el orden del listado (`order`) se conserva como `O`. Cualquier otro parámetro o faceta
+        (búsqueda de texto, especificaciones) cambia los productos de una forma que la API no reproduce: None.
+        """
+        url = urlsplit(category_url)
+        segments = url.path.strip('/').split('/')
+        query = parse_qs(url.query, keep_blank_values=True)
+        params = {}
+        for name, values in query.items():
+            if name in _ORDER_PARAMS:
+                params[_ORDER_PARAMS[name]] = values[-1]
+            elif name != "map":
+                return None
+        facets = query["map"][-1].split(',') if "map" in query else ["c"] * len(segments)
+        if len(facets) != len(segments):
+            return None
+        codes = []
+        for facet in facets:
+            code = "c" if _CATEGORY_FACET.match(facet) else _FACET_CODES.get(facet)
+            if code is None:
+                return None
+            codes.append(code)
+        params["map"] = ",".join(codes)
+        return params
+
+    def supports(self, category_url):
+        """True si el listado de la URL puede descargarse de la API de catálogo (ver `catalog_params`)."""
+        return self.catalog_params(category_url) is not None
+
+    def fetch_page(self, category_url, page_num):
+        """Descarga una página (1-indexada) de productos de la categoría. Retorna la lista JSON de VTEX."""
+        facets = self.catalog_params(category_url)
+        if facets is None:
+            raise ValueError(f"La API de catálogo no admite los filtros del enlace {category_url}.")
+        start = (page_num - 1) * self.page_size
+        end = min(start + self.page_size - 1, VTEX_MAX_INDEX)
+        params = {"_from": start, "_to": end, **facets}
+        url = requests.Request("GET", self.search_url(category_url), params=params).prepare().url
+        with metrics.timer("descarga_http"):
+            body = self._get(url)
+        self.count_page(None)
+        return json.loads(body)
+
+    def _get(self, url):
+        """Descarga una URL (de forma condicional si está en el caché) y retorna el cuerpo en bytes."""
+        headers = self.cache.validators(url) if self.cache else {}
+        response = self._session.get(url, headers=headers, timeout=self.timeout)
+        if response.status_code == 304 and self.cache:
+            body = self.cache.hit(url)
+            if body is not None:
+                return body
+            response = self._session.get(url, timeout=self.timeout)
+        response.raise_for_status()
+        if self.cache:
+            self.cache.put(url, response.headers, response.content)
+        return response.content
+
+    def iter_pages(self, category_url, pages_done=frozenset()):
+        """
+        Recorre la categoría página por página y produce `(page_num, items)`.
+        Las páginas en `pages_done` no se producen, pero igual se recorren para detectar el final.
+        """
+        page_num = 1
+        while (page_num - 1) * self.page_size <= VTEX_MAX_INDEX:
+            items = self.fetch_page(category_url, page_num)
+            if page_num not in pages_done:
+                yield page_num, items
+            if len(items) < self.page_size:
+                break
+            page_num += 1
+
+    # --- Interfaz compatible con DriverPool ---
+
+    def session(self):
+        """El cliente es seguro para hilos: `with client.session() as http:` retorna el propio cliente."""
+        return nullcontext(self)
+
+    def count_page(self, _):
+        with self._lock:
+            self.pages_fetched += 1
+
+    def close(self):
+        self._session.close()
+        self.logger.info(f"Cliente HTTP de VTEX cerrado: {self.pages_fetched} páginas descargadas.")
+        if self.cache:
+            self.cache.close()
+
+def first_offer(item):
+    """Retorna el `commertialOffer` del primer vendedor con stock del primer SKU (o del primero, si ninguno tiene)."""
+    skus = item.get("items") or []
+    if not skus:
+        return None
+    sellers = skus[0].get("sellers") or []
+    for seller in sellers:
+        offer = seller.get("commertialOffer") or {}
+        if offer.get("AvailableQuantity", 0) > 0:
+            return offer
+    return sellers[0].get("commertialOffer") if sellers else None
+
+def first_image(item):
+    """Retorna el primer objeto de imagen del primer SKU, o None."""
+    skus = item.get("items") or []
+    images = skus[0].get("images") if skus else None
+    return images[0] if images else None
+
+def thumbnail_url(image, assets_url, width, height):
+    """
+    URL de la miniatura redimensionada de vtexassets para un objeto de imagen de la API, en el mismo formato que
+    el `<img src>` de las tarjetas de los listados (`/arquivos/ids/<id>-<ancho>-<alto>?v=...&width=...`).
+    """
+    version = parse_qs(urlsplit(image.get("imageUrl", "")).query).get("v", [""])[0]
+    return (f"{assets_url}/arquivos/ids/{image['imageId']}-{width}-{height}"
+            f"?v={version}&width={width}&height={height}&aspect=true")
@@ -1,28 +1,47 @@
 import time
-import logging
-import json
 import os
+import sys
+from functools import partial
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait, Select
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException, StaleElementReferenceException
 from selenium.webdriver.common.action_chains import ActionChains
-from bs4 import BeautifulSoup
 
-# Importaciones para la gestión automática del driver
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.chrome.service import Service as ChromeService
+# Permite importar los módulos compartidos también al ejecutar este archivo directamente.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from scrapers.common import metrics
+from scrapers.common.browser_profile import ScrapeProfile
+from scrapers.common.driver_factory import new_chrome
+from scrapers.common.driver_pool import DriverPool
+from scrapers.common.html_parser import parse_listing
+from scrapers.common.http_cache import ResponseCache
+from scrapers.common.link_catalog import LinkCatalog
+from scrapers.common.phase2 import run_phase2
+from scrapers.common.product_record import ProductRecord
+from scrapers.common.readiness import PageReadiness
+from scrapers.common.scrape_run import ScrapeOptions, finish_run
 
-# --- Configuración de Logging ---
-logging.basicConfig(level=logging.INFO,
-                    format='%(asctime)s - %(levelname)s - %(message)s')
+BASE_URL = "https://www.jumbocolombia.com"
+IMAGE_BASE_URL = "https://jumbocolombiaio.vtexassets.com"
+PRODUCT_CARD_SELECTOR = "section.vtex-product-summary-2-x-container"
+# Motores disponibles para la Fase 2: navegador completo o API de catálogo de VTEX.
+ENGINES = ("selenium", "http")
+# Horas tras las cuales se vuelve a recorrer el menú para actualizar el catálogo de enlaces.
+LINKS_TTL_HOURS = 72
 
-def initialize_driver(user_agent, logger):
-    """Configura e inicializa una nueva instancia de WebDriver con webdriver-manager."""
+def initialize_driver(user_agent, logger, profile=None):
+    """
+    Configura e inicializa una nueva instancia de WebDriver con webdriver-manager.
+    Con `profile` (un `ScrapeProfile`) el navegador es headless y sin descargar recursos pesados.
+    """
     logger.info("Configurando WebDriver...")
     options = webdriver.ChromeOptions()
-    options.add_argument("--start-maximized")
+    if profile:
+        profile.configure(options)
+    else:
+        options.add_argument("--start-maximized")
     options.add_argument("--disable-notifications")
     # options.add_argument("--headless")
     options.add_argument("--no-sandbox")
@@ -34,8 +53,7 @@ def initialize_driver(user_agent, logger):
     options.add_experimental_option('useAutomationExtension', False)
     
     try:
-        service = ChromeService(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=options)
+        driver = new_chrome(options, logger, cache_namespace="jumbo")
         logger.info("WebDriver configurado con éxito.")
         return driver
     except Exception as e:
@@ -43,10 +61,10 @@ def initialize_driver(user_agent, logger):
         return None
 
 def _parse_product_data(page_source, category_info, logger):
-    """Usa BeautifulSoup para parsear el HTML de la página y extraer datos de productos."""
-    soup = BeautifulSoup(page_source, 'html.parser')
+    """Parsea solo las tarjetas de producto del HTML de la página y extrae sus datos."""
+    soup = parse_listing(page_source, PRODUCT_CARD_SELECTOR)
     products_on_page = []
-    product_cards = soup.select("section.vtex-product-summary-2-x-container")
+    product_cards = soup.select(PRODUCT_CARD_SELECTOR)
 
     for card in product_cards:
         try:
@@ -67,127 +85,107 @@ def _parse_product_data(page_source, category_info, logger):
                 discount_percentage = round(((original_price - final_price) / original_price) * 100)
 
             product_url_element = card.select_one("a.vtex-product-summary-2-x-clearLink")
-            product_url = "https://www.jumbocolombia.com" + product_url_element['href'] if product_url_element else "N/A"
+            product_url = BASE_URL + product_url_element['href'] if product_url_element else "N/A"
 
             image_element = card.select_one("img.vtex-product-summary-2-x-imageNormal")
             image_url = image_element['src'] if image_element else "N/A"
             
-            product_data = {
-                "tienda": "Jumbo",
-                "categoria_principal": category_info.get("categoria_principal", "N/A"),
-                "sub_categoria": category_info.get("sub_categoria", "N/A"),
-                "tipo": category_info.get("item", "N/A"),
-                "nombre_completo": full_name,
-                "marca": brand,
-                "precio_final": final_price,
-                "precio_sin_descuento": original_price,
-                "porcentaje_descuento": discount_percentage,
-                "url_producto": product_url,
-                "url_imagen": image_url,
-            }
+            product_data = ProductRecord(
+                tienda="Jumbo",
+                categoria_principal=category_info.get("categoria_principal", "N/A"),
+                sub_categoria=category_info.get("sub_categoria", "N/A"),
+                tipo=category_info.get("item", "N/A"),
+                nombre_completo=full_name,
+                marca=brand,
+                precio_final=final_price,
+                precio_sin_descuento=original_price,
+                porcentaje_descuento=discount_percentage,
+                url_producto=product_url,
+                url_imagen=image_url,
+            )
             products_on_page.append(product_data)
         except (AttributeError, ValueError, KeyError, IndexError) as e:
             logger.warning(f"No se pudo procesar una tarjeta de producto. Error: {e}. Saltando.")
             continue
     return products_on_page
 
-def scrape_jumbo(user_agent, logger):
-    """Función principal que implementa la arquitectura de 2 fases con paginación y guardado persistente."""
-    start_time = time.time()
-    logger.info("--- INICIANDO PROCESO DE SCRAPING PARA JUMBO ---")
+def _product_from_vtex(item, category_info):
+    """
+    Convierte un producto de la API de catálogo de VTEX al mismo `ProductRecord` que produce `_parse_product_data`.
+    Al igual que el parser del DOM, el precio sin descuento se toma igual al precio final.
+    """
+    from scrapers.common.vtex_http import first_image, first_offer, thumbnail_url
+    offer = first_offer(item) or {}
+    final_price = float(offer.get("Price") or 0)
+    original_price = final_price
 
-    output_dir = os.path.join("raw_data", "jumbo")
-    os.makedirs(output_dir, exist_ok=True)
-    links_filepath = os.path.join(output_dir, "jumbo_links.json")
-    # ** Cambio de Nombre de Archivo **
-    products_filepath = os.path.join(output_dir, "productos_jumbo.json")
-    
-    links_to_visit = []
-    # --- FASE 1: RECOLECCIÓN DE ENLACES ---
-    if not os.path.exists(links_filepath):
-        driver = initialize_driver(user_agent, logger)
-        if not driver:
-            logger.critical("No se pudo inicializar el driver para la Fase 1. Abortando.")
-            return
+    discount_percentage = 0
+    if original_price > final_price:
+        discount_percentage = round(((original_price - final_price) / original_price) * 100)
 
-        try:
-            logger.info("--- FASE 1: Iniciando recolección de enlaces del menú ---")
-            driver.get("https://www.jumbocolombia.com/")
-            wait = WebDriverWait(driver, 20)
-            actions = ActionChains(driver)
-            
-            menu_button_xpath = "//button[.//span[text()='Todas las categorías']]"
-            menu_button = wait.until(EC.element_to_be_clickable((By.XPATH, menu_button_xpath)))
-            driver.execute_script("arguments[0].click();", menu_button)
-            
-            main_menu_container_selector = "div.tiendasjumboqaio-jumbo-main-menu-2-x-first_level_menu_wrapper"
-            wait.until(EC.visibility_of_element_located((By.CSS_SELECTOR, main_menu_container_selector)))
-            
-            main_category_items_selector = "li.tiendasjumboqaio-jumbo-main-menu-2-x-menu_item--header-submenu-item"
-            num_main_categories = len(driver.find_elements(By.CSS_SELECTOR, main_category_items_selector))
+    image = first_image(item)
+    # Misma miniatura 300x300 que muestra la página de listado.
+    image_url = thumbnail_url(image, IMAGE_BASE_URL, 300, 300) if image else "N/A"
 
-            for i in range(num_main_categories):
-                main_categories = driver.find_elements(By.CSS_SELECTOR, main_category_items_selector)
-                category_element = main_categories[i]
-                try:
-                    main_category_name = category_element.find_element(By.TAG_NAME, 'a').text.strip()
-                    if not main_category_name: continue
-                    actions.move_to_element(category_element).perform()
-                    time.sleep(0.5)
-                except (NoSuchElementException, StaleElementReferenceException): continue
+    return ProductRecord(
+        tienda="Jumbo",
+        categoria_principal=category_info.get("categoria_principal", "N/A"),
+        sub_categoria=category_info.get("sub_categoria", "N/A"),
+        tipo=category_info.get("item", "N/A"),
+        nombre_completo=(item.get("productName") or "N/A").strip(),
+        marca=(item.get("brand") or "N/A").strip(),
+        precio_final=final_price,
+        precio_sin_descuento=original_price,
+        porcentaje_descuento=discount_percentage,
+        url_producto=f"{BASE_URL}/{item['linkText']}/p" if item.get("linkText") else "N/A",
+        url_imagen=image_url,
+    )
 
-                submenu_container = wait.until(EC.visibility_of_element_located((By.CSS_SELECTOR, "div.tiendasjumboqaio-jumbo-main-menu-2-x-submenus_wrapper")))
-                sub_category_columns = submenu_container.find_elements(By.CSS_SELECTOR, "li.tiendasjumboqaio-jumbo-main-menu-2-x-second_li")
-
-                for column in sub_category_columns:
-                    try:
-                        sub_category_name = column.find_element(By.CSS_SELECTOR, "a.tiendasjumboqaio-jumbo-main-menu-2-x-second_level_link").text.strip()
-                        final_items = column.find_elements(By.CSS_SELECTOR, "a.tiendasjumboqaio-jumbo-main-menu-2-x-item_node_inner_third_level")
-                        for item in final_items:
-                            link_data = {"categoria_principal": main_category_name, "sub_categoria": sub_category_name, "item": item.text.strip(), "url": item.get_attribute('href')}
-                            if link_data["url"] and link_data not in links_to_visit:
-                                links_to_visit.append(link_data)
-                    except (NoSuchElementException, StaleElementReferenceException): continue
-            
-            with open(links_filepath, 'w', encoding='utf-8') as f:
-                json.dump(links_to_visit, f, indent=4, ensure_ascii=False)
-            logger.info(f"--- FASE 1 Finalizada: Se recolectaron y guardaron {len(links_to_visit)} enlaces en '{links_filepath}'. ---")
-
-        finally:
-            if driver: driver.quit()
-    else:
-        logger.info(f"--- FASE 1 Omitida: Usando archivo de enlaces existente en '{links_filepath}'. ---")
-        with open(links_filepath, 'r', encoding='utf-8') as f:
-            links_to_visit = json.load(f)
-
-    # --- FASE 2: EXTRACCIÓN DE PRODUCTOS ---
-    if not links_to_visit:
-        logger.warning("No hay enlaces para procesar en la Fase 2.")
-        return
-
-    if os.path.exists(products_filepath):
-        os.remove(products_filepath)
-        logger.info(f"Archivo de productos anterior '{products_filepath}' eliminado.")
+def scrape_category_http(link_info, client, logger, emit, pages_done=frozenset()):
+    """Equivalente HTTP de `scrape_category`: obtiene los listados desde la API de catálogo de VTEX sin navegador."""
+    logger.info(f"\nProcesando (HTTP): {link_info['categoria_principal']} > {link_info['item']} | URL: {link_info['url']}")
+    try:
+        for page_num, items in client.iter_pages(link_info['url'], pages_done):
+            products_on_page = []
+            for item in items:
+                try:
+                    products_on_page.append(_product_from_vtex(item, link_info))
+                except (AttributeError, ValueError, KeyError, IndexError, TypeError) as e:
+                    logger.warning(f"No se pudo procesar un producto de la API. Error: {e}. Saltando.")
+            logger.info(f"  - Página {page_num}: se encontraron {len(products_on_page)} productos.", extra={"pagina": page_num})
+            if emit(page_num, products_on_page) is False:
+                logger.info("  - Listado sin cambios desde la ejecución anterior. Se omiten las demás páginas.")
+                break
+    except Exception as e:
+        logger.error(f"Error CRÍTICO procesando la URL {link_info['url']}: {e}", exc_info=True)
+        raise
 
-    for link_info in links_to_visit:
-        driver = initialize_driver(user_agent, logger)
-        if not driver: continue
-        
-        products_from_this_link = []
+def scrape_category(link_info, pool, readiness, logger, emit, pages_done=frozenset()):
+    """
+    Recorre todas las páginas de un enlace de categoría usando una sesión del pool.
+    El HTML de cada página se entrega a `emit(page_num, html)` para que el pipeline lo parsee con `_parse_product_data`;
+    las páginas en `pages_done` ya fueron guardadas y se omiten. Si `emit` retorna False para la página 1
+    (modo delta, listado sin cambios), no se recorre el resto de la paginación.
+    """
+    with pool.session() as driver:
         try:
             logger.info(f"\nProcesando: {link_info['categoria_principal']} > {link_info['item']} | URL: {link_info['url']}")
             driver.get(link_info['url'])
             wait = WebDriverWait(driver, 20)
             
             gallery_selector = "#gallery-layout-container"
+            first_product_name_selector = f"{gallery_selector} section:first-child span.vtex-product-summary-2-x-productBrand"
             wait.until(EC.visibility_of_element_located((By.CSS_SELECTOR, gallery_selector)))
-            time.sleep(4)
+            snapshot = readiness.wait(driver, PRODUCT_CARD_SELECTOR, first_product_name_selector)
+            pool.count_page(driver)
             
-            logger.info("  - Extrayendo productos de la página 1...")
-            products_on_page = _parse_product_data(driver.page_source, link_info, logger)
-            if products_on_page:
-                products_from_this_link.extend(products_on_page)
-                logger.info(f"    > Se encontraron {len(products_on_page)} productos.")
+            if 1 not in pages_done:
+                logger.info("  - Extrayendo productos de la página 1...")
+                page_source = driver.page_source
+                readiness.confirm(driver, snapshot, PRODUCT_CARD_SELECTOR)
+                if emit(1, page_source) is False:
+                    logger.info("  - Listado sin cambios desde la ejecución anterior. Se omiten las demás páginas.")
+                    return
 
             try:
                 dropdown_selector = "div.vtex-styleguide-9-x-dropdown select"
@@ -198,52 +196,175 @@ def scrape_jumbo(user_agent, logger):
                 if total_pages > 1:
                     logger.info(f"  - Se detectaron {total_pages} páginas.")
                     for page_num in range(2, total_pages + 1):
-                        logger.info(f"  - Navegando a página {page_num}...")
-                        first_product_name_selector = f"{gallery_selector} section:first-child span.vtex-product-summary-2-x-productBrand"
-                        anchor_text = wait.until(EC.visibility_of_element_located((By.CSS_SELECTOR, first_product_name_selector))).text
+                        if page_num in pages_done:
+                            continue
+                        logger.info(f"  - Navegando a página {page_num}...", extra={"pagina": page_num})
                         select_element = driver.find_element(By.CSS_SELECTOR, dropdown_selector)
                         Select(select_element).select_by_value(str(page_num))
-                        wait.until(lambda d: d.find_element(By.CSS_SELECTOR, first_product_name_selector).text != anchor_text)
-                        time.sleep(4)
+                        snapshot = readiness.wait(driver, PRODUCT_CARD_SELECTOR, first_product_name_selector, previous_anchor=snapshot["anchor"])
+                        pool.count_page(driver)
 
-                        products_on_page = _parse_product_data(driver.page_source, link_info, logger)
-                        if products_on_page:
-                            products_from_this_link.extend(products_on_page)
-                            logger.info(f"    > Se encontraron {len(products_on_page)} productos.")
+                        page_source = driver.page_source
+                        readiness.confirm(driver, snapshot, PRODUCT_CARD_SELECTOR)
+                        emit(page_num, page_source)
             
             except (NoSuchElementException, TimeoutException):
                 logger.info("  - No se encontró paginador o es de una sola página.")
         
         except Exception as e:
             logger.error(f"Error CRÍTICO procesando la URL {link_info['url']}: {e}", exc_info=True)
-        finally:
-            if driver: driver.quit()
-
-        if products_from_this_link:
-            all_products = []
-            if os.path.exists(products_filepath):
-                with open(products_filepath, 'r', encoding='utf-8') as f:
-                    try:
-                        all_products = json.load(f)
-                    except json.JSONDecodeError:
-                        all_products = []
-            
-            all_products.extend(products_from_this_link)
-            with open(products_filepath, 'w', encoding='utf-8') as f:
-                json.dump(all_products, f, indent=4, ensure_ascii=False)
-            logger.info(f"  > Guardados {len(products_from_this_link)} productos. Total acumulado: {len(all_products)}.")
+            raise
+
+def collect_links(user_agent, logger):
+    """Fase 1: recorre el menú 'Todas las categorías' y retorna los enlaces de tercer nivel (lista vacía si falla)."""
+    driver = initialize_driver(user_agent, logger)
+    if not driver:
+        logger.critical("No se pudo inicializar el driver para la Fase 1.")
+        return []
+
+    links_to_visit = []
+    try:
+        logger.info("--- FASE 1: Iniciando recolección de enlaces del menú ---")
+        driver.get(BASE_URL + "/")
+        wait = WebDriverWait(driver, 20)
+        actions = ActionChains(driver)
+        
+        menu_button_xpath = "//button[.//span[text()='Todas las categorías']]"
+        menu_button = wait.until(EC.element_to_be_clickable((By.XPATH, menu_button_xpath)))
+        driver.execute_script("arguments[0].click();", menu_button)
+        
+        main_menu_container_selector = "div.tiendasjumboqaio-jumbo-main-menu-2-x-first_level_menu_wrapper"
+        wait.until(EC.visibility_of_element_located((By.CSS_SELECTOR, main_menu_container_selector)))
+        
+        main_category_items_selector = "li.tiendasjumboqaio-jumbo-main-menu-2-x-menu_item--header-submenu-item"
+        num_main_categories = len(driver.find_elements(By.CSS_SELECTOR, main_category_items_selector))
+
+        for i in range(num_main_categories):
+            main_categories = driver.find_elements(By.CSS_SELECTOR, main_category_items_selector)
+            category_element = main_categories[i]
+            try:
+                main_category_name = category_element.find_element(By.TAG_NAME, 'a').text.strip()
+                if not main_category_name: continue
+                actions.move_to_element(category_element).perform()
+                metrics.sleep(0.5)
+            except (NoSuchElementException, StaleElementReferenceException): continue
+
+            submenu_container = wait.until(EC.visibility_of_element_located((By.CSS_SELECTOR, "div.tiendasjumboqaio-jumbo-main-menu-2-x-submenus_wrapper")))
+            sub_category_columns = submenu_container.find_elements(By.CSS_SELECTOR, "li.tiendasjumboqaio-jumbo-main-menu-2-x-second_li")
+
+            for column in sub_category_columns:
+                try:
+                    sub_category_name = column.find_element(By.CSS_SELECTOR, "a.tiendasjumboqaio-jumbo-main-menu-2-x-second_level_link").text.strip()
+                    final_items = column.find_elements(By.CSS_SELECTOR, "a.tiendasjumboqaio-jumbo-main-menu-2-x-item_node_inner_third_level")
+                    for item in final_items:
+                        link_data = {"categoria_principal": main_category_name, "sub_categoria": sub_category_name, "item": item.text.strip(), "url": item.get_attribute('href')}
+                        if link_data["url"] and link_data not in links_to_visit:
+                            links_to_visit.append(link_data)
+                except (NoSuchElementException, StaleElementReferenceException): continue
+        logger.info(f"--- FASE 1 Finalizada: Se recolectaron {len(links_to_visit)} enlaces. ---")
+        return links_to_visit
+    finally:
+        driver.quit()
+
+def scrape_jumbo(user_agent, logger, options=None):
+    """
+    Función principal que implementa la arquitectura de 2 fases con paginación y guardado persistente.
+    `options` (un `ScrapeOptions`) reúne las opciones de la ejecución; sin él se usan las opciones por defecto.
+    """
+    options = options or ScrapeOptions()
+    start_time = time.time()
+    logger.info("--- INICIANDO PROCESO DE SCRAPING PARA JUMBO ---")
+
+    output_dir = os.path.join("raw_data", "jumbo")
+    os.makedirs(output_dir, exist_ok=True)
+    # Archivo de enlaces de versiones anteriores; se importa al catálogo si este aún no existe.
+    links_filepath = os.path.join(output_dir, "jumbo_links.json")
+    # ** Cambio de Nombre de Archivo **
+    products_filepath = os.path.join(output_dir, "productos_jumbo.jsonl")
+    products_json_filepath = os.path.join(output_dir, "productos_jumbo.json")
+    
+    # --- FASE 1: RECOLECCIÓN DE ENLACES (solo si el catálogo venció) ---
+    catalog = LinkCatalog(
+        "Jumbo",
+        os.path.join(output_dir, "jumbo_link_catalog.json"),
+        logger,
+        LINKS_TTL_HOURS if options.links_ttl_hours is None else options.links_ttl_hours,
+        url_key="url",
+        label_keys=("categoria_principal", "sub_categoria", "item"),
+        legacy_path=links_filepath,
+    )
+    links_to_visit = catalog.get_links(lambda: collect_links(user_agent, logger))
+
+    # --- FASE 2: EXTRACCIÓN DE PRODUCTOS ---
+    if not links_to_visit:
+        logger.warning("No hay enlaces para procesar en la Fase 2.")
+        return
+
+    if os.path.exists(products_json_filepath):
+        os.remove(products_json_filepath)
+
+    readiness = None
+    parse_page = None
+    profile = None
+    fallback_pool = None
+    if options.engine == "http":
+        # Importación diferida: requests solo es necesario para este motor.
+        from scrapers.common.vtex_http import VtexCatalogClient
+        logger.info("Fase 2 con motor HTTP (API de catálogo de VTEX, sin navegador).")
+        cache = ResponseCache("Jumbo", os.path.join(output_dir, "cache_http"), logger) if options.http_cache else None
+        pool = VtexCatalogClient(BASE_URL, user_agent, logger, max_connections=options.workers, cache=cache)
+        browser_links = [link['url'] for link in links_to_visit if not pool.supports(link['url'])]
+        if browser_links:
+            # Enlaces con filtros que la API no reproduce (p. ej. búsquedas de texto): se recorren con el navegador
+            # y su HTML se parsea en el mismo hilo.
+            logger.warning(f"{len(browser_links)} enlaces tienen filtros que la API de catálogo no admite; se recorren con Selenium: {browser_links}")
+            readiness = PageReadiness("Jumbo", logger, stats_path=os.path.join(output_dir, "jumbo_readiness.json"))
+            fallback_pool = DriverPool(lambda: initialize_driver(user_agent, logger), logger, max_size=options.workers, max_pages=options.max_pages_per_driver)
+
+        def category_scraper(link_info, pool, emit, pages_done):
+            if pool.supports(link_info['url']):
+                return scrape_category_http(link_info, pool, logger, emit, pages_done)
+            emit_html = lambda page_num, html: emit(page_num, _parse_product_data(html, link_info, logger))
+            return scrape_category(link_info, fallback_pool, readiness, logger, emit_html, pages_done)
+    else:
+        pool = None
+        readiness = PageReadiness("Jumbo", logger, stats_path=os.path.join(output_dir, "jumbo_readiness.json"))
+        category_scraper = lambda link_info, pool, emit, pages_done: scrape_category(link_info, pool, readiness, logger, emit, pages_done)
+        parse_page = partial(_parse_product_data, logger=logger)
+        if options.lightweight:
+            profile = ScrapeProfile("Jumbo", logger, stats_path=os.path.join(output_dir, "jumbo_browser_profile.json"))
+
+    try:
+        result = run_phase2(
+            links_to_visit,
+            category_scraper,
+            lambda: initialize_driver(user_agent, logger, profile),
+            products_filepath,
+            logger,
+            workers=options.workers,
+            max_pages_per_driver=options.max_pages_per_driver,
+            resume=options.resume,
+            pool=pool,
+            parse_page=parse_page,
+            parse_workers=options.parse_workers,
+            profile=profile,
+            warm_browsers=options.warm_browsers,
+            delta=options.delta,
+        )
+    finally:
+        if fallback_pool:
+            fallback_pool.close()
+    if readiness:
+        readiness.save()
+    if profile:
+        profile.save()
 
     duration = time.time() - start_time
     logger.info(f"--- FASE 2 Finalizada: Proceso de scraping de productos completado. ---")
     
     # --- RESUMEN FINAL ---
-    try:
-        with open(products_filepath, 'r', encoding='utf-8') as f:
-            final_products = json.load(f)
-            logger.info(f"Resumen: Total de productos extraídos para Jumbo: {len(final_products)}")
-    except (FileNotFoundError, json.JSONDecodeError):
-        logger.warning("No se pudo leer el archivo final de productos o está vacío.")
-    
+    finish_run(products_filepath, "Jumbo", options, logger, user_agent, start_time, complete=result.complete)
+
     logger.info(f"Duración total del scraper de Jumbo: {duration:.2f} segundos.")
     logger.info("--- SCRAPING PARA JUMBO FINALIZADO ---")
 
@@ -1,44 +1,75 @@
 import time
 import logging
-import json
 import os
 import re
 import sys
 import gc # Garbage Collector
-from selenium import webdriver
+from functools import partial
+from urllib.parse import urljoin
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException, StaleElementReferenceException
 from selenium.webdriver.common.action_chains import ActionChains
-from bs4 import BeautifulSoup
-
-# Importaciones para la gestión automática del driver
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.chrome.service import Service as ChromeService
 from selenium.webdriver.chrome.options import Options
 
+# Permite importar los módulos compartidos también al ejecutar este archivo directamente.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from scrapers.common import metrics
+from scrapers.common.browser_profile import ScrapeProfile
+from scrapers.common.driver_factory import new_chrome
+from scrapers.common.driver_pool import DriverPool
+from scrapers.common.html_parser import parse_html, parse_listing
+from scrapers.common.http_cache import ResponseCache
+from scrapers.common.link_catalog import LinkCatalog
+from scrapers.common.phase2 import run_phase2
+from scrapers.common.product_record import ProductRecord
+from scrapers.common.readiness import PageReadiness
+from scrapers.common.scrape_run import ScrapeOptions, finish_run
+
 # --- CONSTANTES ESPECiFICAS PARA ZAPATOCA ---
 BASE_URL = "https://www.mercadozapatoca.com/"
 STORE_NAME = "Mercado Zapatoca"
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
 OUTPUT_DIR = os.path.join(PROJECT_ROOT, "raw_data", "zapatoca")
-LINKS_FILEPATH = os.path.join(OUTPUT_DIR, "zapatoca_links.json") # Archivo para guardar los links
-PRODUCTS_FILEPATH = os.path.join(OUTPUT_DIR, "productos_zapatoca.json")
+LINKS_FILEPATH = os.path.join(OUTPUT_DIR, "zapatoca_links.json") # Archivo de links de versiones anteriores (se importa al catálogo)
+LINK_CATALOG_FILEPATH = os.path.join(OUTPUT_DIR, "zapatoca_link_catalog.json")
+# Horas tras las cuales se vuelve a recorrer el menú para actualizar el catálogo de enlaces.
+LINKS_TTL_HOURS = 72
+PRODUCTS_FILEPATH = os.path.join(OUTPUT_DIR, "productos_zapatoca.jsonl")
+PRODUCTS_JSON_FILEPATH = os.path.join(OUTPUT_DIR, "productos_zapatoca.json") # Exportación en formato de arreglo JSON
+
+# Motores disponibles para la Fase 2: navegador completo o descarga asíncrona del HTML del servidor.
+ENGINES = ("selenium", "async")
+# Descargas simultáneas máximas del motor asíncrono.
+ASYNC_MAX_CONCURRENCY = 8
+# Selectores usados para decidir cuándo un listado terminó de cargar.
+PRODUCT_CARD_SELECTOR = "div.dpr_container"
+FIRST_PRODUCT_NAME_SELECTOR = "div.dpr_container div.dpr_product-name"
+STATS_FILEPATH = os.path.join(OUTPUT_DIR, "zapatoca_readiness.json")
+PROFILE_STATS_FILEPATH = os.path.join(OUTPUT_DIR, "zapatoca_browser_profile.json")
+# Caché de respuestas del motor asíncrono (revalidación con ETag / Last-Modified).
+HTTP_CACHE_DIR = os.path.join(OUTPUT_DIR, "cache_http")
 
 # Timeouts (en segundos)
 FAST_TIMEOUT = 15
 PAGE_LOAD_TIMEOUT = 25
 IMPLICIT_WAIT = 5
 
-def setup_driver(user_agent, logger):
-    """Configura e inicializa una instancia de WebDriver con medidas anti-detección."""
+def setup_driver(user_agent, logger, profile=None):
+    """
+    Configura e inicializa una instancia de WebDriver con medidas anti-detección.
+    Con `profile` (un `ScrapeProfile`) el navegador es headless y sin descargar recursos pesados.
+    """
     logger.info("Configurando una nueva instancia de WebDriver...")
     options = Options()
     options.page_load_strategy = 'eager'
     options.add_argument(f"user-agent={user_agent}")
-    options.add_argument("--window-size=1920,1080")
-    options.add_argument("--start-maximized")
+    if profile:
+        profile.configure(options)
+    else:
+        options.add_argument("--window-size=1920,1080")
+        options.add_argument("--start-maximized")
     options.add_argument("--disable-notifications")
     options.add_argument("--no-sandbox")
     options.add_argument("--disable-dev-shm-usage")
@@ -50,8 +81,7 @@ def setup_driver(user_agent, logger):
     options.add_experimental_option('useAutomationExtension', False)
 
     try:
-        service = ChromeService(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=options)
+        driver = new_chrome(options, logger, cache_namespace="zapatoca")
         driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
         logger.info("WebDriver configurado exitosamente.")
         return driver
@@ -68,10 +98,10 @@ def clean_price(price_str):
 
 def extract_product_data(soup, category_info, logger):
     """
-    Usa BeautifulSoup para parsear el HTML de la página de productos y extraer los datos.
+    Extrae los datos de las tarjetas de producto de una página ya parseada (ver `parse_listing`).
     """
     products_on_page = []
-    product_containers = soup.select("div.dpr_container") 
+    product_containers = soup.select(PRODUCT_CARD_SELECTOR)
 
     for product_card in product_containers:
         try:
@@ -102,38 +132,30 @@ def extract_product_data(soup, category_info, logger):
             image_element = product_card.select_one("div.dpr_imagen_thumb img")
             image_url = image_element['src'] if image_element and image_element.has_attr('src') else "N/A"
             
-            products_on_page.append({
-                "tienda": STORE_NAME,
-                "categoria_principal": category_info.get("categoria_principal", "N/A"),
-                "sub_categoria": category_info.get("sub_categoria", "N/A"),
-                "tipo": category_info.get("tipo", "N/A"),
-                "nombre_completo": full_name,
-                "marca": brand.upper(),
-                "precio_final": final_price,
-                "precio_sin_descuento": original_price,
-                "porcentaje_descuento": discount,
-                "url_producto": product_url,
-                "url_imagen": image_url,
-            })
+            products_on_page.append(ProductRecord(
+                tienda=STORE_NAME,
+                categoria_principal=category_info.get("categoria_principal", "N/A"),
+                sub_categoria=category_info.get("sub_categoria", "N/A"),
+                tipo=category_info.get("tipo", "N/A"),
+                nombre_completo=full_name,
+                marca=brand.upper(),
+                precio_final=final_price,
+                precio_sin_descuento=original_price,
+                porcentaje_descuento=discount,
+                url_producto=product_url,
+                url_imagen=image_url,
+            ))
         except Exception as e:
             logger.warning(f"No se pudo procesar una tarjeta de producto. Error: {e}. Saltando...")
             continue
     return products_on_page
 
-def append_to_json(new_data, filepath, logger):
-    """Añade datos de forma segura a un archivo JSON."""
-    if not new_data: return
-    products = []
-    try:
-        if os.path.exists(filepath):
-            with open(filepath, 'r', encoding='utf-8') as f:
-                products = json.load(f)
-    except (json.JSONDecodeError, FileNotFoundError):
-        products = []
-    products.extend(new_data)
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(products, f, indent=4, ensure_ascii=False)
-    logger.info(f"Guardados {len(new_data)} productos. Total acumulado en '{filepath}': {len(products)}.")
+def parse_page(html, link_info, logger):
+    """Parsea el HTML de una página de categoría y extrae sus productos (se ejecuta en los procesos de parseo)."""
+    soup = parse_listing(html, PRODUCT_CARD_SELECTOR)
+    if not soup.select_one(PRODUCT_CARD_SELECTOR):
+        logger.warning(f"No se encontraron productos en {link_info.get('url')}.")
+    return extract_product_data(soup, link_info, logger)
 
 def collect_and_structure_links(driver, logger):
     """
@@ -147,7 +169,7 @@ def collect_and_structure_links(driver, logger):
     try:
         ingresar_button = wait.until(EC.element_to_be_clickable((By.ID, "btn_aceptar_terminos")))
         driver.execute_script("arguments[0].click();", ingresar_button)
-        time.sleep(IMPLICIT_WAIT)
+        metrics.sleep(IMPLICIT_WAIT)
     except Exception:
         logger.warning("No se pudo interactuar con el modal de ubicación. Continuando...")
 
@@ -162,7 +184,7 @@ def collect_and_structure_links(driver, logger):
         for i in range(len(main_categories_elements)):
             main_cat_element = driver.find_elements(By.CSS_SELECTOR, "#mega-menu > ul > li.has-children")[i]
             actions.move_to_element(main_cat_element).perform()
-            time.sleep(0.2)
+            metrics.sleep(0.2)
             main_cat_name = main_cat_element.find_element(By.XPATH, "./a").text.strip()
             if main_cat_name not in links_structure:
                 links_structure[main_cat_name] = {}
@@ -171,7 +193,7 @@ def collect_and_structure_links(driver, logger):
             for sub_element in all_sub_elements:
                 if "has-children" in sub_element.get_attribute("class"):
                     actions.move_to_element(sub_element).perform()
-                    time.sleep(0.2)
+                    metrics.sleep(0.2)
                     sub_cat_a = sub_element.find_element(By.XPATH, "./a")
                     sub_cat_name = sub_cat_a.text.strip()
                     if sub_cat_name not in links_structure[main_cat_name]:
@@ -203,90 +225,236 @@ def collect_and_structure_links(driver, logger):
     logger.info(f"Estructura de enlaces finalizada. Se encontraron {len(links_structure)} categorías principales.")
     return links_structure
 
-def scrape_zapatoca(user_agent, logger):
-    """Función principal que orquesta el scraping en dos fases."""
+def scrape_category(link_info, pool, readiness, logger, emit, pages_done=frozenset()):
+    """
+    Recorre todas las páginas de un enlace de categoría con una sesión del pool.
+    El HTML de cada página se entrega a `emit(page_num, html)` para que el pipeline lo parsee con `parse_page`;
+    las páginas en `pages_done` ya fueron guardadas y se omiten. Si `emit` retorna False para la página 1
+    (modo delta, listado sin cambios), no se recorre el resto de la paginación.
+    """
+    logger.info(f"\n--- Procesando: {link_info['categoria_principal']} > {link_info['sub_categoria']} > {link_info['tipo']} ---")
+    with pool.session() as driver:
+        driver.get(link_info["url"])
+        page_num = 1
+        previous_anchor = None
+        while True:
+            try:
+                WebDriverWait(driver, PAGE_LOAD_TIMEOUT).until(EC.visibility_of_element_located((By.ID, "productos")))
+                # 'Siguiente' provoca una navegación completa: se espera a que el primer producto cambie y el listado se estabilice.
+                snapshot = readiness.wait(driver, PRODUCT_CARD_SELECTOR, FIRST_PRODUCT_NAME_SELECTOR,
+                                          previous_anchor=previous_anchor, timeout=PAGE_LOAD_TIMEOUT)
+            except TimeoutException:
+                logger.warning(f"No se encontró el contenedor de productos en la pág {page_num}. Finalizando este enlace.")
+                break
+            pool.count_page(driver)
+            previous_anchor = snapshot["anchor"]
+
+            if page_num in pages_done:
+                logger.info(f"Página {page_num} ya guardada en la ejecución anterior. Avanzando...", extra={"pagina": page_num})
+            else:
+                logger.info(f"Extrayendo datos de la página {page_num}...", extra={"pagina": page_num})
+                page_source = driver.page_source
+                readiness.confirm(driver, snapshot, PRODUCT_CARD_SELECTOR)
+                if emit(page_num, page_source) is False:
+                    logger.info("Listado sin cambios desde la ejecución anterior. Se omiten las demás páginas.")
+                    break
+            
+            try:
+                next_page_button = driver.find_element(By.XPATH, "//a[contains(text(), 'Siguiente')]")
+                driver.execute_script("arguments[0].click();", next_page_button)
+                page_num += 1
+            except NoSuchElementException:
+                logger.info("No hay más páginas.")
+                break
+
+def _next_link(soup):
+    """El enlace "Siguiente" de la paginación, o None."""
+    return soup.find(lambda tag: tag.name == "a" and "Siguiente" in tag.get_text())
+
+def _has_script_pagination(html):
+    """
+    True si la página tiene un "Siguiente" que solo funciona con JavaScript (`href="javascript:..."` o sin `href`
+    pero con `onclick`): el motor asíncrono no puede seguirlo, pero el navegador sí lo haría con un clic.
+    """
+    next_link = _next_link(parse_html(html))
+    if not next_link:
+        return False
+    href = next_link.get("href", "").strip()
+    return href.lower().startswith("javascript") or (not href and next_link.has_attr("onclick"))
+
+def _pagination_links(html, page_url, page_num):
+    """
+    Retorna `{numero_de_pagina: url}` con los enlaces de paginación de una página de categoría:
+    los números visibles junto al enlace "Siguiente" y el propio "Siguiente" (página actual + 1).
+    """
+    soup = parse_html(html)
+    next_link = _next_link(soup)
+    if not next_link:
+        return {}
+
+    links = {}
+    next_href = next_link.get("href", "")
+    if next_href and not next_href.startswith(("#", "javascript")):
+        links[page_num + 1] = urljoin(page_url, next_href)
+
+    paginator = next_link.find_parent(["ul", "nav", "div"])
+    for anchor in (paginator.find_all("a", href=True) if paginator else []):
+        text = anchor.get_text(strip=True)
+        href = anchor["href"]
+        if text.isdigit() and not href.startswith(("#", "javascript")):
+            links.setdefault(int(text), urljoin(page_url, href))
+    return links
+
+def scrape_category_async(link_info, fetcher, logger, emit, pages_done=frozenset(), fallback=None):
+    """
+    Equivalente sin navegador de `scrape_category`: descarga el HTML de la categoría y de todas sus páginas
+    con el `AsyncPageFetcher` y lo entrega a `emit(page_num, html)` igual que `scrape_category`.
+
+    La primera página se entrega antes de descargar las demás: en modo delta, si no cambió, la paginación no se pide.
+    Las siguientes se descargan de forma concurrente y se entregan en orden a medida que llegan (ver
+    `crawl_paginated`): si una falla, solo se pierde esa página y la categoría termina con el error.
+    Si la última página descargada tiene un "Siguiente" que solo funciona con JavaScript, el resto de la categoría
+    se recorre con `fallback(link_info, emit, pages_done)` (el recorrido con navegador), omitiendo las páginas ya
+    entregadas.
+    """
+    logger.info(f"\n--- Procesando (async): {link_info['categoria_principal']} > {link_info['sub_categoria']} > {link_info['tipo']} ---")
+    first_html = fetcher.fetch(link_info["url"])
+    if 1 not in pages_done and emit(1, first_html) is False:
+        logger.info("Listado sin cambios desde la ejecución anterior. Se omiten las demás páginas.")
+        return
+    emitted = set(pages_done) | {1}
+    last_page, last_html, downloaded = 1, first_html, 1
+    # Cada página se entrega apenas se descarga: si una falla, las anteriores ya quedaron guardadas en la bitácora.
+    for page_num, html in fetcher.crawl_paginated(link_info["url"], _pagination_links, first_html=first_html):
+        if page_num == 1:
+            continue
+        if page_num not in pages_done:
+            emit(page_num, html)
+        emitted.add(page_num)
+        last_page, last_html = page_num, html
+        downloaded += 1
+    logger.info(f"Se descargaron {downloaded} páginas.")
+
+    if _has_script_pagination(last_html):
+        if fallback is None:
+            logger.warning(f"La página {last_page} de {link_info['url']} pagina con JavaScript; las páginas siguientes no se descargaron.")
+            return
+        logger.warning(f"La página {last_page} de {link_info['url']} pagina con JavaScript; se continúa con el navegador.")
+        fallback(link_info, emit, frozenset(emitted))
+
+def flatten_links(links_structure):
+    """Aplana la estructura jerárquica de enlaces de la Fase 1 en una lista de tareas independientes."""
+    return [
+        {
+            "categoria_principal": main_cat,
+            "sub_categoria": sub_cat,
+            "tipo": type_info["tipo_producto"],
+            "url": type_info["link"]
+        }
+        for main_cat, sub_cats in links_structure.items()
+        for sub_cat, types_list in sub_cats.items()
+        for type_info in types_list
+    ]
+
+def scrape_zapatoca(user_agent, logger, options=None):
+    """
+    Función principal que orquesta el scraping en dos fases.
+    `options` (un `ScrapeOptions`) reúne las opciones de la ejecución; sin él se usan las opciones por defecto.
+    """
+    options = options or ScrapeOptions()
     start_time = time.time()
     logger.info(f"--- INICIANDO SCRAPER PARA {STORE_NAME} ---")
 
     os.makedirs(OUTPUT_DIR, exist_ok=True)
     
-    # --- FASE 1: RECOLECCIÓN Y ESTRUCTURACIÓN DE ENLACES ---
-    if not os.path.exists(LINKS_FILEPATH):
-        logger.info(f"Archivo de enlaces '{LINKS_FILEPATH}' no encontrado. Iniciando Fase 1.")
+    # --- FASE 1: RECOLECCIÓN Y ESTRUCTURACIÓN DE ENLACES (solo si el catálogo venció) ---
+    catalog = LinkCatalog(
+        STORE_NAME,
+        LINK_CATALOG_FILEPATH,
+        logger,
+        LINKS_TTL_HOURS if options.links_ttl_hours is None else options.links_ttl_hours,
+        url_key="url",
+        label_keys=("categoria_principal", "sub_categoria", "tipo"),
+        legacy_path=LINKS_FILEPATH,
+        legacy_loader=flatten_links,
+    )
+
+    def crawl_links():
+        logger.info("Catálogo de enlaces vencido o inexistente. Iniciando Fase 1.")
         driver = setup_driver(user_agent, logger)
-        if not driver: return
+        if not driver:
+            return []
         try:
             links_structure = collect_and_structure_links(driver, logger)
-            with open(LINKS_FILEPATH, 'w', encoding='utf-8') as f:
-                json.dump(links_structure, f, indent=4, ensure_ascii=False)
-            logger.info(f"FASE 1 COMPLETADA: Estructura de enlaces guardada en '{LINKS_FILEPATH}'.")
         finally:
-            if driver: driver.quit()
-    else:
-        logger.info(f"Archivo de enlaces '{LINKS_FILEPATH}' encontrado. Saltando Fase 1.")
+            driver.quit()
+        logger.info("FASE 1 COMPLETADA.")
+        return flatten_links(links_structure)
 
-    # --- FASE 2: EXTRACCIÓN DE PRODUCTOS ---
-    logger.info("Iniciando Fase 2: Extracción de productos desde la estructura de enlaces.")
-    try:
-        with open(LINKS_FILEPATH, 'r', encoding='utf-8') as f:
-            links_structure = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        logger.error(f"No se pudo leer el archivo de enlaces '{LINKS_FILEPATH}'. Abortando Fase 2.")
-        return
+    links_to_visit = catalog.get_links(crawl_links)
 
-    if not links_structure:
-        logger.warning("La estructura de enlaces está vacía. No hay nada que procesar.")
+    # --- FASE 2: EXTRACCIÓN DE PRODUCTOS ---
+    logger.info("Iniciando Fase 2: Extracción de productos desde el catálogo de enlaces.")
+    if not links_to_visit:
+        logger.warning("El catálogo de enlaces está vacío. No hay nada que procesar.")
         return
         
-    if os.path.exists(PRODUCTS_FILEPATH):
-        os.remove(PRODUCTS_FILEPATH)
-        logger.info(f"Archivo de productos anterior '{PRODUCTS_FILEPATH}' eliminado.")
-
-    # Iterar sobre la estructura jerárquica
-    for main_cat, sub_cats in links_structure.items():
-        logger.info(f"\n\n===== PROCESANDO CATEGORÍA PRINCIPAL: {main_cat} =====")
-        driver = setup_driver(user_agent, logger) # Reiniciar driver por cada categoría principal
-        if not driver:
-            logger.error(f"No se pudo reiniciar el driver para la categoría '{main_cat}'. Saltando.")
-            continue
-        try:
-            for sub_cat, types_list in sub_cats.items():
-                for type_info in types_list:
-                    link_info = {
-                        "categoria_principal": main_cat,
-                        "sub_categoria": sub_cat,
-                        "tipo": type_info["tipo_producto"],
-                        "url": type_info["link"]
-                    }
-                    logger.info(f"\n--- Procesando: {main_cat} > {sub_cat} > {type_info['tipo_producto']} ---")
-                    driver.get(link_info["url"])
-                    page_num = 1
-                    while True:
-                        logger.info(f"Extrayendo datos de la página {page_num}...")
-                        try:
-                            WebDriverWait(driver, PAGE_LOAD_TIMEOUT).until(EC.visibility_of_element_located((By.ID, "productos")))
-                            time.sleep(IMPLICIT_WAIT)
-                        except TimeoutException:
-                            logger.warning(f"No se encontró el contenedor de productos en la pág {page_num}. Finalizando este enlace.")
-                            break
-                        
-                        soup = BeautifulSoup(driver.page_source, "html.parser")
-                        new_products = extract_product_data(soup, link_info, logger)
-                        if new_products: append_to_json(new_products, PRODUCTS_FILEPATH, logger)
-                        
-                        try:
-                            next_page_button = driver.find_element(By.XPATH, "//a[contains(text(), 'Siguiente')]")
-                            driver.execute_script("arguments[0].click();", next_page_button)
-                            page_num += 1
-                        except NoSuchElementException:
-                            logger.info("No hay más páginas.")
-                            break
-        finally:
-            if driver: driver.quit()
-            gc.collect()
-            logger.info(f"WebDriver para la categoría '{main_cat}' cerrado y recursos liberados.")
+    if os.path.exists(PRODUCTS_JSON_FILEPATH):
+        os.remove(PRODUCTS_JSON_FILEPATH)
+
+    readiness = None
+    profile = None
+    fallback_pool = None
+    if options.engine == "async":
+        # Importación diferida: aiohttp solo es necesario para este motor.
+        from scrapers.common.async_fetcher import AsyncPageFetcher
+        logger.info(f"Fase 2 con motor asíncrono (sin navegador, hasta {ASYNC_MAX_CONCURRENCY} descargas simultáneas).")
+        cache = ResponseCache(STORE_NAME, HTTP_CACHE_DIR, logger) if options.http_cache else None
+        pool = AsyncPageFetcher(user_agent, logger, max_concurrency=ASYNC_MAX_CONCURRENCY, cache=cache)
+        # Las categorías que paginan con JavaScript se terminan con el navegador. El pool solo lanza Chrome si se usa.
+        readiness = PageReadiness(STORE_NAME, logger, stats_path=STATS_FILEPATH)
+        fallback_pool = DriverPool(lambda: setup_driver(user_agent, logger), logger, max_size=options.workers, max_pages=options.max_pages_per_driver)
+        browser_fallback = lambda link_info, emit, pages_done: scrape_category(link_info, fallback_pool, readiness, logger, emit, pages_done)
+        category_scraper = lambda link_info, pool, logger, emit, pages_done: scrape_category_async(link_info, pool, logger, emit, pages_done, browser_fallback)
+    else:
+        readiness = PageReadiness(STORE_NAME, logger, stats_path=STATS_FILEPATH)
+        category_scraper = lambda link_info, pool, logger, emit, pages_done: scrape_category(link_info, pool, readiness, logger, emit, pages_done)
+        pool = None
+        if options.lightweight:
+            profile = ScrapeProfile(STORE_NAME, logger, stats_path=PROFILE_STATS_FILEPATH)
+
+    try:
+        result = run_phase2(
+            links_to_visit,
+            lambda link_info, pool, emit, pages_done: category_scraper(link_info, pool, logger, emit, pages_done),
+            lambda: setup_driver(user_agent, logger, profile),
+            PRODUCTS_FILEPATH,
+            logger,
+            workers=options.workers,
+            max_pages_per_driver=options.max_pages_per_driver,
+            resume=options.resume,
+            pool=pool,
+            parse_page=partial(parse_page, logger=logger),
+            parse_workers=options.parse_workers,
+            profile=profile,
+            warm_browsers=options.warm_browsers,
+            delta=options.delta,
+        )
+    finally:
+        if fallback_pool:
+            fallback_pool.close()
+    if readiness:
+        readiness.save()
+    if profile:
+        profile.save()
+    gc.collect()
             
     duration = time.time() - start_time
+
+    # --- RESUMEN FINAL ---
+    finish_run(PRODUCTS_FILEPATH, STORE_NAME, options, logger, user_agent, start_time, complete=result.complete)
+
+    logger.info(f"Duración total del scraper de {STORE_NAME}: {duration:.2f} segundos.")
     logger.info(f"\n--- SCRAPING PARA {STORE_NAME} FINALIZADO ---")
     
 if __name__ == '__main__':
@@ -0,0 +1,76 @@
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+class StaticSite:
+    """
+    Servidor HTTP local para las pruebas de los motores sin navegador. `routes` asocia una ruta (sin query string)
+    a `(content_type, cuerpo)` o a una función `f(query) -> (content_type, cuerpo)` que recibe el query string
+    ya parseado (ver `parse_qs`); una respuesta con otro estado que 200 se indica como `(estado, content_type,
+    cuerpo)`, y con cabeceras adicionales como `(estado, content_type, cuerpo, cabeceras)`. Si las cabeceras traen
+    `ETag` o `Last-Modified` y la petición los envía en `If-None-Match` o `If-Modified-Since`, se responde 304
+    sin cuerpo. Las rutas desconocidas responden 404.
+    """
+
+    def __init__(self):
+        self.routes = {}
+        self.requests = []
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def _handler_class(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlsplit(self.path)
+                site.requests.append(self.path)
+                route = site.routes.get(url.path)
+                if route is None:
+                    self.send_error(404)
+                    return
+                response = route(parse_qs(url.query)) if callable(route) else route
+                if len(response) == 2:
+                    response = (200, *response)
+                status, content_type, body, headers = response if len(response) == 4 else (*response, {})
+                body = body.encode("utf-8") if isinstance(body, str) else body
+                if any(headers.get(validator) and self.headers.get(condition) == headers[validator]
+                       for validator, condition in (("ETag", "If-None-Match"), ("Last-Modified", "If-Modified-Since"))):
+                    status, body = 304, b""
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+@pytest.fixture
+def site():
+    server = StaticSite()
+    yield server
+    server.close()
+
+@pytest.fixture
+def logger():
+    return logging.getLogger("tests")
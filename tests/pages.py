@@ -0,0 +1,92 @@
+"""
+Páginas de listado de prueba: los mismos productos como respuesta de la API de catálogo de VTEX y como HTML de las
+tarjetas de Jumbo, Carulla y Zapatoca, con los selectores que usan los parsers del DOM.
+"""
+from scrapers.carulla import scraper_carulla
+from scrapers.jumbo import scraper_jumbo
+
+# (nombre, marca, slug, id de imagen, versión, precio, precio de lista)
+PRODUCTS = [
+    ("Arroz Diana blanco x5kg", "DIANA", "arroz-diana-x-5-kg", "186323", "637813981860700000", 22490, 22490),
+    ("Arroz ROA Florhuila x 3000 g", "ROA", "arroz-roa-florhuila-3000-g", "190041", "637901234567800000", 12900, 14500),
+    ("Fríjol bola roja La Muñeca x 500 g", "LA MUÑECA", "frijol-bola-roja-la-muneca-500g", "201877", "638001122334400000", 6990, 6990),
+    ("Lenteja ZENÚ 1000 g", "ZENU", "lenteja-zenu-1000g", "175500", "637700000000000000", 5400, 6000),
+    ("Garbanzo Diana x 500 g", "DIANA", "garbanzo-diana-500g", "188810", "637855555555500000", 4350, 4350),
+]
+
+def vtex_item(product, assets_url):
+    name, brand, slug, image_id, version, price, list_price = product
+    return {
+        "productName": name,
+        "brand": brand,
+        "linkText": slug,
+        "items": [{
+            "images": [{"imageId": image_id, "imageUrl": f"{assets_url}/arquivos/ids/{image_id}/{slug}.jpg?v={version}"}],
+            "sellers": [{"commertialOffer": {"Price": price, "ListPrice": list_price, "AvailableQuantity": 10}}],
+        }],
+    }
+
+def thumbnail(assets_url, product, size):
+    _, _, _, image_id, version, _, _ = product
+    return f"{assets_url}/arquivos/ids/{image_id}-{size}-{size}?v={version}&width={size}&height={size}&aspect=true"
+
+def pesos(value):
+    return "$ " + f"{value:,}".replace(",", ".")
+
+def jumbo_card(product):
+    name, brand, slug, _, _, price, _ = product
+    return f"""
+    <section class="vtex-product-summary-2-x-container">
+      <a class="vtex-product-summary-2-x-clearLink" href="/{slug}/p">
+        <img class="vtex-product-summary-2-x-imageNormal" src="{thumbnail(scraper_jumbo.IMAGE_BASE_URL, product, 300)}">
+        <span class="vtex-product-summary-2-x-productBrandName">{brand}</span>
+        <span class="vtex-product-summary-2-x-productBrand">{name}</span>
+      </a>
+      <div class="tiendasjumboqaio-jumbo-minicart-2-x-price">{pesos(price)}</div>
+    </section>"""
+
+def carulla_card(product):
+    name, _, slug, _, _, price, list_price = product
+    size = scraper_carulla.CARD_IMAGE_SIZE[0]
+    list_price_tag = (f'<p class="priceSection_container-promotion_price-dashed__FJ7nI">{pesos(list_price)}</p>'
+                      if list_price > price else "")
+    return f"""
+    <article class="productCard_productCard__M0677">
+      <a data-testid="product-link" href="/{slug}/p"><img src="{thumbnail(scraper_carulla.IMAGE_BASE_URL, product, size)}"></a>
+      <h3 class="styles_name__qQJiK">{name}</h3>
+      {list_price_tag}
+      <p class="ProductPrice_container__price__XmMWA">{pesos(price)}</p>
+    </article>"""
+
+def listing(cards):
+    return f"<html><body><header>Menú</header><div id='gallery'>{''.join(cards)}</div></body></html>"
+
+# Productos de Zapatoca por página: (nombre, precio, precio sugerido o None, porcentaje de la cinta o None)
+ZAPATOCA_PAGES = {
+    1: [("ACEITE CANOLA LA BUENA 900 ML", 12900, None, None), ("ACEITE CANOLA DORADO 3000 ML", 38900, 42000, 7)],
+    2: [("ACEITE CANOLA PREMIER 1000 ML", 15500, 17200, None), ("ACEITE CANOLA OLEOCALI 500 ML", 7800, None, None)],
+    3: [("ACEITE CANOLA GOURMET 2000 ML", 29900, None, None)],
+}
+
+def zapatoca_card(product, page_num, position):
+    name, price, suggested, ribbon = product
+    suggested_tag = f'<div class="dpr_suggested_price">$ {suggested:,}</div>' if suggested else ""
+    ribbon_tag = f'<div class="wrapper-ribbon" data-discount-percent="{ribbon}"></div>' if ribbon else ""
+    return f"""
+    <div class="dpr_container">
+      {ribbon_tag}
+      <div class="dpr_imagen_thumb"><img src="/media/{page_num}-{position}.jpg"></div>
+      <a class="dpr_listname" href="/p/{page_num}-{position}/">{name}</a>
+      <div class="dpr_product-name">{name}</div>
+      <div class="dpr_listprice">$ {price:,}</div>
+      {suggested_tag}
+    </div>"""
+
+def zapatoca_page(page_num, last_page, next_href=None):
+    numbers = "".join(f'<li><a href="?page={n}">{n}</a></li>' for n in range(1, last_page + 1))
+    if next_href is None:
+        next_href = f"?page={page_num + 1}" if page_num < last_page else "#"
+    cards = "".join(zapatoca_card(product, page_num, i) for i, product in enumerate(ZAPATOCA_PAGES[page_num]))
+    return (f"<html><body><nav class='menu'><a href='/c/abarrotes/'>Abarrotes</a></nav>"
+            f"<div class='productos'>{cards}</div>"
+            f"<ul class='paginacion'>{numbers}<li><a href=\"{next_href}\">Siguiente</a></li></ul></body></html>")
@@ -0,0 +1,129 @@
+"""
+El motor asíncrono de Zapatoca descarga el mismo HTML que el navegador entregaría a `parse_page`: se sirve una
+categoría paginada desde un servidor local y sus productos se comparan con los de parsear cada página por separado,
+que es lo que hace el recorrido con Selenium con el `page_source` de cada página.
+"""
+import threading
+
+import pytest
+
+aiohttp = pytest.importorskip("aiohttp")
+
+from scrapers.common.async_fetcher import AsyncPageFetcher
+from scrapers.zapatoca import scraper_zapatoca
+from tests.pages import ZAPATOCA_PAGES, zapatoca_page
+
+UA = "Mozilla/5.0 (pruebas)"
+CATEGORY_PATH = "/c/abarrotes/aceites/canola/"
+
+def serve_category(site, pages):
+    site.routes[CATEGORY_PATH] = lambda query: ("text/html; charset=utf-8", pages[int(query.get("page", ["1"])[0])])
+
+def link_info(site):
+    return {"categoria_principal": "ABARROTES", "sub_categoria": "ACEITES", "tipo": "CANOLA", "url": site.url + CATEGORY_PATH}
+
+def crawl(site, logger, fallback=None):
+    fetcher = AsyncPageFetcher(UA, logger, max_concurrency=2)
+    emitted = []
+    try:
+        scraper_zapatoca.scrape_category_async(link_info(site), fetcher, logger, lambda page_num, html: emitted.append((page_num, html)),
+                                               fallback=fallback)
+    finally:
+        fetcher.close()
+    return emitted
+
+def test_async_engine_matches_per_page_parsing(site, logger):
+    pages = {n: zapatoca_page(n, len(ZAPATOCA_PAGES)) for n in ZAPATOCA_PAGES}
+    serve_category(site, pages)
+
+    emitted = crawl(site, logger)
+    from_engine = [product.to_dict() for _, html in emitted for product in scraper_zapatoca.parse_page(html, link_info(site), logger)]
+    from_pages = [product.to_dict() for n in sorted(pages) for product in scraper_zapatoca.parse_page(pages[n], link_info(site), logger)]
+
+    assert [page_num for page_num, _ in emitted] == [1, 2, 3]
+    assert len(from_pages) == sum(len(products) for products in ZAPATOCA_PAGES.values())
+    assert from_engine == from_pages
+
+def test_script_pagination_continues_with_fallback(site, logger):
+    # La página 2 no muestra más números y su "Siguiente" solo funciona con JavaScript.
+    pages = {1: zapatoca_page(1, 2), 2: zapatoca_page(2, 2, next_href="javascript:void(0)"), 3: zapatoca_page(3, 3)}
+    serve_category(site, pages)
+    calls = []
+
+    emitted = crawl(site, logger, fallback=lambda info, emit, pages_done: calls.append(pages_done))
+
+    assert [page_num for page_num, _ in emitted] == [1, 2]
+    assert calls == [frozenset({1, 2})]
+
+def test_unchanged_first_page_stops_pagination(site, logger):
+    serve_category(site, {n: zapatoca_page(n, len(ZAPATOCA_PAGES)) for n in ZAPATOCA_PAGES})
+    fetcher = AsyncPageFetcher(UA, logger, max_concurrency=2)
+    emitted = []
+
+    def emit(page_num, html):
+        # Modo delta: la primera página es igual a la de la ejecución anterior.
+        emitted.append(page_num)
+        return False
+
+    try:
+        scraper_zapatoca.scrape_category_async(link_info(site), fetcher, logger, emit)
+    finally:
+        fetcher.close()
+
+    assert emitted == [1]
+    assert site.requests == [CATEGORY_PATH]
+
+def test_pages_are_emitted_as_they_download(site, logger):
+    pages = {n: zapatoca_page(n, len(ZAPATOCA_PAGES)) for n in ZAPATOCA_PAGES}
+    page_2_emitted = threading.Event()
+    events = []
+
+    def serve(query):
+        page_num = int(query.get("page", ["1"])[0])
+        if page_num == 3:
+            # La página 3 solo responde cuando la 2 ya se entregó: sin entrega incremental, la prueba espera el timeout.
+            page_2_emitted.wait(timeout=5)
+            events.append("sirve 3")
+        return "text/html; charset=utf-8", pages[page_num]
+    site.routes[CATEGORY_PATH] = serve
+
+    def emit(page_num, html):
+        events.append(f"emite {page_num}")
+        if page_num == 2:
+            page_2_emitted.set()
+
+    fetcher = AsyncPageFetcher(UA, logger, max_concurrency=2)
+    try:
+        scraper_zapatoca.scrape_category_async(link_info(site), fetcher, logger, emit)
+    finally:
+        fetcher.close()
+
+    assert events == ["emite 1", "emite 2", "sirve 3", "emite 3"]
+
+def test_failed_page_loses_only_itself(site, logger):
+    pages = {n: zapatoca_page(n, len(ZAPATOCA_PAGES)) for n in ZAPATOCA_PAGES}
+    serve_category(site, pages)
+    site.routes[CATEGORY_PATH] = lambda query, serve=site.routes[CATEGORY_PATH]: (
+        (404, "text/html", "no existe") if query.get("page") == ["2"] else serve(query))
+    emitted = []
+    fetcher = AsyncPageFetcher(UA, logger, max_concurrency=2)
+    try:
+        with pytest.raises(aiohttp.ClientResponseError):
+            scraper_zapatoca.scrape_category_async(link_info(site), fetcher, logger, lambda page_num, html: emitted.append(page_num))
+    finally:
+        fetcher.close()
+
+    # La categoría no queda completa (se lanza el error), pero las páginas 1 y 3 ya se entregaron.
+    assert emitted == [1, 3]
+
+@pytest.mark.parametrize("status, attempts", [(404, 1), (410, 1), (503, 2)])
+def test_only_transient_errors_are_retried(site, logger, status, attempts):
+    site.routes[CATEGORY_PATH] = (status, "text/html", "error")
+    fetcher = AsyncPageFetcher(UA, logger, max_concurrency=2, retries=1)
+    try:
+        with pytest.raises(aiohttp.ClientResponseError):
+            fetcher.fetch(site.url + CATEGORY_PATH)
+    finally:
+        fetcher.close()
+
+    assert len(site.requests) == attempts
@@ -0,0 +1,79 @@
+import json
+
+from scrapers.common.checkpoint import RunLedger
+from scrapers.common.phase2 import ledger_path_for, run_phase2
+
+URL = "https://tienda.test/despensa/arroz"
+
+class FakePool:
+    def close(self):
+        pass
+
+def products(url, page_num, count=2):
+    return [{"url_producto": f"{url}/producto-{page_num}-{i}/p", "precio_final": 1000 * page_num + i} for i in range(count)]
+
+def read_jsonl(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+def test_truncated_ledger_is_reloaded(tmp_path, logger):
+    path = str(tmp_path / "productos_ledger.jsonl")
+    ledger = RunLedger(path, logger)
+    ledger.mark_page(URL, 1)
+    ledger.mark_page(URL, 2)
+    ledger.close()
+    # Corte abrupto a mitad de la escritura del evento de la página 3.
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('{"evento": "pagina", "url": "' + URL + '", "pag')
+
+    ledger = RunLedger(path, logger, resume=True)
+    assert ledger.pages_done(URL) == {1, 2}
+    ledger.mark_page(URL, 3)
+    ledger.mark_category(URL)
+    ledger.close()
+
+    ledger = RunLedger(path, logger, resume=True)
+    assert ledger.pages_done(URL) == {1, 2, 3}
+    assert ledger.is_category_done(URL)
+    ledger.close()
+
+def test_ledger_without_resume_starts_over(tmp_path, logger):
+    path = str(tmp_path / "productos_ledger.jsonl")
+    ledger = RunLedger(path, logger)
+    ledger.mark_category(URL)
+    ledger.close()
+
+    ledger = RunLedger(path, logger)
+    assert not ledger.is_category_done(URL)
+    assert ledger.pages_done(URL) == set()
+    ledger.close()
+
+def test_resume_skips_saved_pages(tmp_path, logger):
+    products_filepath = str(tmp_path / "productos.jsonl")
+    links = [{"url": URL}, {"url": URL + "-integral"}]
+    calls = []
+
+    def scrape_category(link_info, pool, emit, pages_done, fail_on=None):
+        calls.append((link_info["url"], set(pages_done)))
+        for page_num in (1, 2, 3):
+            if page_num == fail_on and link_info["url"] == URL:
+                raise RuntimeError("se cerró el navegador")
+            if page_num not in pages_done:
+                emit(page_num, products(link_info["url"], page_num))
+
+    first = run_phase2(links, lambda *args: scrape_category(*args, fail_on=3), None, products_filepath, logger,
+                       pool=FakePool())
+    assert first.complete is False
+    assert calls == [(URL, set()), (URL + "-integral", set())]
+
+    calls.clear()
+    second = run_phase2(links, scrape_category, None, products_filepath, logger, pool=FakePool(), resume=True)
+    # La categoría terminada no se vuelve a recorrer y de la otra solo falta la página 3.
+    assert second.complete is True
+    assert calls == [(URL, {1, 2})]
+    assert second.total_written == 2
+
+    saved = [record["url_producto"] for record in read_jsonl(products_filepath)]
+    expected = [product["url_producto"] for link in links for page_num in (1, 2, 3) for product in products(link["url"], page_num)]
+    assert sorted(saved) == sorted(expected)
+    assert len(read_jsonl(ledger_path_for(products_filepath))) == 2 * 3 + 2
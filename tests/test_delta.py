@@ -0,0 +1,83 @@
+import json
+
+from scrapers.common.delta import state_path_for
+from scrapers.common.phase2 import run_phase2
+
+ARROZ = "https://tienda.test/despensa/arroz"
+CAFE = "https://tienda.test/despensa/cafe"
+
+class FakePool:
+    def close(self):
+        pass
+
+def page(url, page_num, price=1000, count=2):
+    return [{"url_producto": f"{url}/producto-{page_num}-{i}/p", "precio_final": price + i} for i in range(count)]
+
+def read_jsonl(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+def run(products_filepath, logger, catalog):
+    """Ejecuta la Fase 2 en modo delta sobre `catalog` (`{url: {pagina: productos}}`); retorna las páginas emitidas."""
+    emitted = []
+
+    def scrape_category(link_info, pool, emit, pages_done):
+        for page_num, products in sorted(catalog[link_info["url"]].items()):
+            if page_num in pages_done:
+                continue
+            emitted.append((link_info["url"], page_num))
+            if emit(page_num, products) is False:
+                return
+
+    run_phase2([{"url": url} for url in catalog], scrape_category, None, products_filepath, logger,
+               pool=FakePool(), delta=True)
+    return emitted
+
+def saved(products_filepath):
+    return sorted((record["url_producto"], record["precio_final"]) for record in read_jsonl(products_filepath))
+
+def expected(catalog):
+    return sorted((product["url_producto"], product["precio_final"])
+                  for pages in catalog.values() for products in pages.values() for product in products)
+
+def test_unchanged_first_page_stops_pagination(tmp_path, logger):
+    products_filepath = str(tmp_path / "productos.jsonl")
+    catalog = {ARROZ: {n: page(ARROZ, n) for n in (1, 2, 3)}}
+    assert run(products_filepath, logger, catalog) == [(ARROZ, 1), (ARROZ, 2), (ARROZ, 3)]
+
+    # Una página profunda cambió, pero la primera no: se arrastran las páginas de la ejecución anterior.
+    changed_deep_page = {ARROZ: {**catalog[ARROZ], 3: page(ARROZ, 3, price=5000)}}
+    assert run(products_filepath, logger, changed_deep_page) == [(ARROZ, 1)]
+    assert saved(products_filepath) == expected(catalog)
+
+def test_changed_first_page_is_crawled_and_offsets_carry_forward(tmp_path, logger):
+    products_filepath = str(tmp_path / "productos.jsonl")
+    first = {ARROZ: {n: page(ARROZ, n) for n in (1, 2)}, CAFE: {n: page(CAFE, n, count=3) for n in (1, 2, 3)}}
+    run(products_filepath, logger, first)
+
+    # El arroz cambia de precio (y de tamaño en bytes) y queda antes que el café: el café se copia en otra posición.
+    second = {ARROZ: {n: page(ARROZ, n, price=123456, count=4) for n in (1, 2)}, CAFE: first[CAFE]}
+    assert run(products_filepath, logger, second) == [(ARROZ, 1), (ARROZ, 2), (CAFE, 1)]
+    assert saved(products_filepath) == expected(second)
+
+    # La tercera ejecución copia las dos categorías con las posiciones registradas en la segunda.
+    assert run(products_filepath, logger, second) == [(ARROZ, 1), (CAFE, 1)]
+    assert saved(products_filepath) == expected(second)
+    state = {record["url"]: record for record in read_jsonl(state_path_for(products_filepath))}
+    assert state[ARROZ]["arrastres"] == 1 and state[CAFE]["arrastres"] == 2
+    with open(products_filepath, 'rb') as f:
+        data = f.read()
+    for url, record in state.items():
+        assert sorted(record["paginas"], key=int) == [str(n) for n in sorted(second[url])]
+        for page_num, (offset, length) in record["paginas"].items():
+            lines = data[offset:offset + length].decode('utf-8').splitlines()
+            assert [json.loads(line) for line in lines] == second[url][int(page_num)]
+
+def test_categories_are_crawled_after_max_carries(tmp_path, logger):
+    products_filepath = str(tmp_path / "productos.jsonl")
+    catalog = {ARROZ: {n: page(ARROZ, n) for n in (1, 2)}}
+    runs = [run(products_filepath, logger, catalog) for _ in range(5)]
+
+    # Tras tres arrastres consecutivos (el máximo por defecto) la categoría se recorre completa de nuevo.
+    assert [len(emitted) for emitted in runs] == [2, 1, 1, 1, 2]
+    assert saved(products_filepath) == expected(catalog)
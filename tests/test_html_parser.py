@@ -0,0 +1,50 @@
+"""
+`parse_listing` debe producir los mismos registros con los dos backends de BeautifulSoup: html.parser (el de los
+datos históricos) y lxml (opcional, ver `SCRAPERS_HTML_PARSER`), en las páginas de las tres tiendas.
+"""
+import logging
+
+import pytest
+
+from scrapers.carulla import scraper_carulla
+from scrapers.common import html_parser
+from scrapers.jumbo import scraper_jumbo
+from scrapers.zapatoca import scraper_zapatoca
+from tests.pages import PRODUCTS, ZAPATOCA_PAGES, carulla_card, jumbo_card, listing, zapatoca_page
+
+LOGGER = logging.getLogger("tests")
+JUMBO_LINK = {"categoria_principal": "Supermercado", "sub_categoria": "Despensa", "item": "Arroz y granos", "url": "/arroz"}
+CARULLA_LINK = {"main_category": "Despensa", "sub_category": "Granos", "tipo": "Arroz", "href": "/arroz"}
+ZAPATOCA_LINK = {"categoria_principal": "ABARROTES", "sub_categoria": "ACEITES", "tipo": "CANOLA", "url": "/canola"}
+
+# HTML como el de las tiendas reales: etiquetas sin cerrar y scripts con marcado dentro, fuera de las tarjetas.
+NOISE = "<p>Envíos a todo el país<br><li>Promociones<script>var t = '<div class=\"x\">';</script>"
+
+STORE_PAGES = {
+    "jumbo": (lambda html: scraper_jumbo._parse_product_data(html, JUMBO_LINK, LOGGER),
+              listing([NOISE] + [jumbo_card(product) for product in PRODUCTS])),
+    "carulla": (lambda html: scraper_carulla.parse_page(html, CARULLA_LINK, LOGGER),
+                listing([NOISE] + [carulla_card(product) for product in PRODUCTS])),
+    "zapatoca": (lambda html: scraper_zapatoca.parse_page(html, ZAPATOCA_LINK, LOGGER),
+                 zapatoca_page(1, len(ZAPATOCA_PAGES)).replace("<body>", "<body>" + NOISE)),
+}
+
+def parse_with(backend, store, monkeypatch):
+    parse, html = STORE_PAGES[store]
+    monkeypatch.setattr(html_parser, "DEFAULT_BACKEND", backend)
+    return [product.to_dict() for product in parse(html)]
+
+@pytest.mark.parametrize("store", sorted(STORE_PAGES))
+def test_backends_produce_equal_records(store, monkeypatch):
+    pytest.importorskip("lxml")
+    records = parse_with("html.parser", store, monkeypatch)
+    assert records
+    assert parse_with("lxml", store, monkeypatch) == records
+
+@pytest.mark.parametrize("store", sorted(STORE_PAGES))
+def test_listing_strainer_matches_full_parse(store, monkeypatch):
+    parse, html = STORE_PAGES[store]
+    records = parse_with("html.parser", store, monkeypatch)
+    # Sin el SoupStrainer (selector compuesto), `parse_listing` parsea la página entera.
+    monkeypatch.setattr(html_parser, "_strainer_for", lambda selector: None)
+    assert [product.to_dict() for product in parse(html)] == records
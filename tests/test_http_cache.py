@@ -0,0 +1,82 @@
+import os
+
+import pytest
+
+from scrapers.common.http_cache import ResponseCache
+
+URL = "https://tienda.test/despensa/arroz?page=1"
+
+def cache_for(tmp_path, logger, **kwargs):
+    return ResponseCache("Tienda", str(tmp_path / "cache"), logger, **kwargs)
+
+def test_only_responses_with_validators_are_cached(tmp_path, logger):
+    cache = cache_for(tmp_path, logger)
+    cache.put(URL, {}, b"sin validadores")
+    cache.put(URL + "2", {"ETag": '"v1"', "Last-Modified": "Wed, 01 Jan 2025 00:00:00 GMT"}, b"con validadores")
+
+    assert cache.validators(URL) == {}
+    assert cache.validators(URL + "2") == {"If-None-Match": '"v1"', "If-Modified-Since": "Wed, 01 Jan 2025 00:00:00 GMT"}
+    assert (cache.misses, cache.uncacheable) == (2, 1)
+    cache.close()
+
+    # El índice y los cuerpos sobreviven a la ejecución.
+    reopened = cache_for(tmp_path, logger)
+    assert reopened.hit(URL + "2") == b"con validadores"
+    assert (reopened.hits, reopened.bytes_saved) == (1, len(b"con validadores"))
+    reopened.close()
+
+def test_missing_body_is_forgotten(tmp_path, logger):
+    cache = cache_for(tmp_path, logger)
+    cache.put(URL, {"ETag": '"v1"'}, b"cuerpo")
+    for name in os.listdir(tmp_path / "cache" / "cuerpos"):
+        os.remove(tmp_path / "cache" / "cuerpos" / name)
+
+    assert cache.hit(URL) is None
+    assert cache.validators(URL) == {}
+    cache.close()
+
+def test_least_recently_used_responses_are_evicted(tmp_path, logger):
+    cache = cache_for(tmp_path, logger, max_bytes=250)
+    for page in (1, 2):
+        cache.put(f"{URL}&p={page}", {"ETag": f'"{page}"'}, b"x" * 100)
+    # La página 1 se vuelve a usar: la menos usada es la 2.
+    cache.hit(f"{URL}&p=1")
+    cache.put(f"{URL}&p=3", {"ETag": '"3"'}, b"x" * 100)
+
+    assert cache.validators(f"{URL}&p=1") and cache.validators(f"{URL}&p=3")
+    assert cache.validators(f"{URL}&p=2") == {}
+    assert len(os.listdir(tmp_path / "cache" / "cuerpos")) == 2
+    cache.close()
+
+def test_async_fetcher_revalidates_with_the_cache(tmp_path, site, logger):
+    pytest.importorskip("aiohttp")
+    from scrapers.common.async_fetcher import AsyncPageFetcher
+
+    site.routes["/arroz"] = (200, "text/html; charset=utf-8", "<html>arroz</html>", {"ETag": '"v1"'})
+    for run in range(2):
+        cache = cache_for(tmp_path, logger)
+        fetcher = AsyncPageFetcher("Mozilla/5.0 (pruebas)", logger, cache=cache)
+        try:
+            assert fetcher.fetch(site.url + "/arroz") == "<html>arroz</html>"
+        finally:
+            fetcher.close()
+    # La segunda ejecución recibió un 304 y leyó el cuerpo del disco.
+    assert (cache.hits, cache.misses) == (1, 0)
+
+def test_vtex_client_revalidates_with_the_cache(tmp_path, site, logger):
+    pytest.importorskip("requests")
+    from scrapers.common.vtex_http import VtexCatalogClient
+
+    site.routes["/api/catalog_system/pub/products/search/despensa/arroz"] = (
+        200, "application/json", '[{"productId": "1"}]', {"Last-Modified": "Wed, 01 Jan 2025 00:00:00 GMT"})
+    pages = []
+    for run in range(2):
+        cache = cache_for(tmp_path, logger)
+        client = VtexCatalogClient(site.url, "Mozilla/5.0 (pruebas)", logger, cache=cache)
+        try:
+            pages.append(client.fetch_page(site.url + "/despensa/arroz", 1))
+        finally:
+            client.close()
+
+    assert pages == [[{"productId": "1"}]] * 2
+    assert (cache.hits, cache.misses) == (1, 0)
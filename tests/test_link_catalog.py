@@ -0,0 +1,76 @@
+import json
+import os
+import time
+
+from scrapers.common.link_catalog import LinkCatalog, diff_links
+
+LABELS = ("categoria", "tipo")
+
+def link(tipo, path, categoria="Despensa"):
+    return {"categoria": categoria, "tipo": tipo, "url": f"https://tienda.test/{path}"}
+
+def catalog(tmp_path, logger, ttl_hours=72, **kwargs):
+    return LinkCatalog("Tienda", str(tmp_path / "tienda_link_catalog.json"), logger, ttl_hours, label_keys=LABELS, **kwargs)
+
+def write_catalog(tmp_path, links, age_hours):
+    data = {"tienda": "Tienda", "actualizado": time.time() - age_hours * 3600, "enlaces": links}
+    (tmp_path / "tienda_link_catalog.json").write_text(json.dumps(data), encoding='utf-8')
+
+def test_diff_links_classifies_changes():
+    previous = [link("Arroz", "arroz"), link("Café", "cafe"), link("Leche", "leche"), link("Pan", "pan")]
+    current = [link("Arroz", "arroz"), link("Café molido", "cafe"), link("Leche", "lacteos/leche"), link("Huevos", "huevos")]
+
+    diff = diff_links(previous, current, "url", LABELS)
+
+    assert diff["sin_cambios"] == 1
+    assert diff["agregados"] == [link("Huevos", "huevos")]
+    assert diff["eliminados"] == [link("Pan", "pan")]
+    assert diff["renombrados"] == [{"antes": link("Café", "cafe"), "ahora": link("Café molido", "cafe")}]
+    assert diff["movidos"] == [{"antes": link("Leche", "leche"), "ahora": link("Leche", "lacteos/leche")}]
+
+def test_fresh_catalog_skips_crawl_and_stale_catalog_refreshes(tmp_path, logger):
+    crawls = []
+
+    def crawl():
+        crawls.append(1)
+        return [link("Arroz", "arroz"), link("Huevos", "huevos"), link("Arroz", "arroz")]
+
+    write_catalog(tmp_path, [link("Arroz", "arroz"), link("Pan", "pan")], age_hours=2)
+
+    assert catalog(tmp_path, logger).get_links(crawl) == [link("Arroz", "arroz"), link("Pan", "pan")]
+    assert crawls == []
+
+    # Con un TTL menor que la edad del catálogo se recorre el menú y la Fase 2 ya no recibe la URL eliminada.
+    assert catalog(tmp_path, logger, ttl_hours=1).get_links(crawl) == [link("Arroz", "arroz"), link("Huevos", "huevos")]
+    assert crawls == [1]
+    with open(tmp_path / "tienda_link_catalog_cambios.jsonl", 'r', encoding='utf-8') as f:
+        changes = [json.loads(line) for line in f]
+    assert len(changes) == 1
+    assert changes[0]["agregados"] == [link("Huevos", "huevos")] and changes[0]["eliminados"] == [link("Pan", "pan")]
+    assert catalog(tmp_path, logger).is_fresh()
+
+def test_failed_crawl_keeps_previous_links(tmp_path, logger):
+    write_catalog(tmp_path, [link("Arroz", "arroz")], age_hours=100)
+
+    def crawl():
+        raise RuntimeError("menú sin cargar")
+
+    assert catalog(tmp_path, logger).get_links(crawl) == [link("Arroz", "arroz")]
+    assert catalog(tmp_path, logger).get_links(lambda: []) == [link("Arroz", "arroz")]
+    assert not (tmp_path / "tienda_link_catalog_cambios.jsonl").exists()
+
+def test_legacy_links_file_is_imported_with_its_age(tmp_path, logger):
+    legacy_path = tmp_path / "tienda_links.json"
+    legacy_path.write_text(json.dumps({"Despensa": {"Arroz": "https://tienda.test/arroz"}}), encoding='utf-8')
+    old = time.time() - 100 * 3600
+    os.utime(legacy_path, (old, old))
+
+    def loader(data):
+        return [{"categoria": cat, "tipo": tipo, "url": url} for cat, types in data.items() for tipo, url in types.items()]
+
+    imported = catalog(tmp_path, logger, legacy_path=str(legacy_path), legacy_loader=loader)
+
+    assert imported.links == [link("Arroz", "arroz")]
+    assert imported.updated_at == old
+    assert not imported.is_fresh()
+    assert (tmp_path / "tienda_link_catalog.json").exists()
@@ -0,0 +1,45 @@
+import json
+import logging
+import threading
+
+from scrapers.common.log_pipeline import JsonFormatter, close_logger, start_queue_logging
+
+class BlockingHandler(logging.Handler):
+    """Guarda los registros formateados; el primero espera a `unblocked` para que los demás queden en la cola."""
+
+    def __init__(self):
+        super().__init__()
+        self.unblocked = threading.Event()
+        self.lines = []
+        self.setFormatter(JsonFormatter())
+
+    def emit(self, record):
+        self.unblocked.wait(timeout=5)
+        self.lines.append(self.format(record))
+
+def test_message_and_traceback_are_resolved_when_logged():
+    logger = logging.getLogger("tests.log_pipeline")
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    handler = BlockingHandler()
+    start_queue_logging(logger, [handler], store="Tienda")
+    try:
+        logger.info("inicio")
+        pending = ["página 1"]
+        logger.info("Pendientes: %s", pending)
+        # El argumento cambia mientras el registro espera en la cola.
+        pending.append("página 2")
+        try:
+            raise ValueError("precio inválido")
+        except ValueError:
+            logger.error("No se pudo parsear", exc_info=True)
+    finally:
+        handler.unblocked.set()
+        close_logger(logger)
+
+    entries = [json.loads(line) for line in handler.lines]
+    assert [entry["mensaje"] for entry in entries] == ["inicio", "Pendientes: ['página 1']", "No se pudo parsear"]
+    assert all(entry["tienda"] == "Tienda" for entry in entries)
+    assert "excepcion" not in entries[1]
+    assert entries[2]["excepcion"].startswith("Traceback")
+    assert "ValueError: precio inválido" in entries[2]["excepcion"]
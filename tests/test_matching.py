@@ -0,0 +1,105 @@
+import json
+import logging
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from scrapers.common.matching import ProductMatcher, build_canonical_table
+
+def product(store, name, brand, slug):
+    return {"tienda": store, "nombre_completo": name, "marca": brand, "url_producto": f"https://{store.split()[-1].lower()}.test/{slug}/p"}
+
+CATALOG = [
+    product("Jumbo", "Arroz Diana Blanco x 5 kg", "Diana", "arroz-diana-5"),
+    product("Carulla", "ARROZ DIANA BLANCO 5000 G", "DIANA", "arroz-diana-5"),
+    product("Mercado Zapatoca", "DIANA ARROZ BLANCO 5KG", "DIANA", "arroz-diana-5"),
+    product("Jumbo", "Arroz Diana Blanco x 1 kg", "Diana", "arroz-diana-1"),
+    product("Carulla", "Café Sello Rojo Tradicional 500 g", "Sello Rojo", "cafe-sello-rojo"),
+    product("Mercado Zapatoca", "CAFE SELLO ROJO TRADICIONAL 500 GR", "CAFE", "cafe-sello-rojo"),
+]
+
+def groups(rows):
+    """Grupos de `(tienda, slug)` con el mismo identificador canónico."""
+    by_id = {}
+    for row in rows:
+        by_id.setdefault(row["id_canonico"], set()).add((row["tienda"], row["url_producto"].split("/")[-2]))
+    return sorted(sorted(group) for group in by_id.values())
+
+def ids(rows):
+    return {(row["tienda"], row["url_producto"]): row["id_canonico"] for row in rows}
+
+def test_same_product_is_matched_across_stores(logger):
+    rows = ProductMatcher(logger).match(CATALOG)
+
+    assert groups(rows) == [
+        [("Carulla", "arroz-diana-5"), ("Jumbo", "arroz-diana-5"), ("Mercado Zapatoca", "arroz-diana-5")],
+        [("Carulla", "cafe-sello-rojo"), ("Mercado Zapatoca", "cafe-sello-rojo")],
+        [("Jumbo", "arroz-diana-1")],
+    ]
+    by_slug = {(row["tienda"], row["url_producto"].split("/")[-2]): row for row in rows}
+    assert by_slug[("Mercado Zapatoca", "cafe-sello-rojo")]["marca_normalizada"] == "sello rojo"
+    assert by_slug[("Carulla", "arroz-diana-5")]["cantidad"] == 5000.0
+    assert by_slug[("Jumbo", "arroz-diana-1")]["puntaje"] is None
+
+def test_products_of_one_store_are_never_grouped(logger):
+    duplicated = CATALOG + [product("Jumbo", "Arroz Diana Blanco 5 kg", "Diana", "arroz-diana-5-oferta")]
+
+    for group in groups(ProductMatcher(logger).match(duplicated)):
+        stores = [store for store, _ in group]
+        assert len(stores) == len(set(stores))
+
+def test_large_blocks_are_split_recursively(logger, caplog):
+    variants = [product(store, f"Arroz Diana {variant} 5 kg", "Diana", f"arroz-{variant.lower()}")
+                for store in ("Jumbo", "Carulla") for variant in ("Blanco", "Integral", "Parbolizado")]
+
+    # Con bloques de a lo sumo dos productos, el bloque (diana, 5 kg) se subdivide por "arroz", "diana" y la variedad.
+    with caplog.at_level(logging.INFO):
+        split = ProductMatcher(logger, max_block=2).match(variants)
+
+    assert groups(split) == groups(ProductMatcher(logger).match(variants))
+    assert len(groups(split)) == 3
+    assert "en 3 bloques; 3 comparaciones" in caplog.text
+    assert "sin más palabras" not in caplog.text
+
+    with caplog.at_level(logging.WARNING):
+        ProductMatcher(logger, max_block=2).match(variants + [product("Mercado Zapatoca", "Arroz Diana Blanco 5 kg", "Diana", "arroz-blanco")])
+    assert "sin más palabras para subdividir" in caplog.text
+
+def test_canonical_ids_are_stable_across_runs(logger):
+    first = ids(ProductMatcher(logger).match(CATALOG))
+    arroz_id = first[("Jumbo", CATALOG[0]["url_producto"])]
+
+    # Zapatoca cambia el contenido de su arroz: el grupo se divide y la parte más grande conserva el identificador.
+    changed = [dict(CATALOG[2], nombre_completo="DIANA ARROZ BLANCO 10KG") if p is CATALOG[2] else p for p in CATALOG]
+    changed.append(product("Mercado Zapatoca", "ARROZ DIANA BLANCO 1 KG", "DIANA", "arroz-diana-1"))
+    second = ids(ProductMatcher(logger).match(changed, previous_ids=first))
+
+    assert second[("Jumbo", CATALOG[0]["url_producto"])] == arroz_id
+    assert second[("Carulla", CATALOG[1]["url_producto"])] == arroz_id
+    assert second[("Mercado Zapatoca", CATALOG[2]["url_producto"])] not in first.values()
+    # El producto nuevo se une al grupo del arroz de 1 kg de Jumbo, que conserva su identificador.
+    assert second[("Mercado Zapatoca", changed[-1]["url_producto"])] == first[("Jumbo", CATALOG[3]["url_producto"])]
+    assert len(set(second.values())) == 4
+
+def test_build_canonical_table_keeps_previous_ids(tmp_path, logger):
+    sources = {}
+    for store in ("Jumbo", "Carulla", "Mercado Zapatoca"):
+        sources[store] = str(tmp_path / f"{store}.jsonl")
+        with open(sources[store], 'w', encoding='utf-8') as f:
+            for record in CATALOG:
+                if record["tienda"] == store:
+                    # La tienda se deduce de la fuente cuando el registro no la trae.
+                    f.write(json.dumps({key: value for key, value in record.items() if key != "tienda"}) + "\n")
+    output_path = str(tmp_path / "productos_canonicos.jsonl")
+
+    first = build_canonical_table(logger, sources=sources, output_path=output_path)
+    with open(sources["Jumbo"], 'a', encoding='utf-8') as f:
+        f.write(json.dumps({"nombre_completo": "Aceite Girasol Premier 1 L", "marca": "Premier",
+                            "url_producto": "https://jumbo.test/aceite/p"}) + "\n")
+    second = build_canonical_table(logger, sources=sources, output_path=output_path)
+
+    assert groups(first) == groups(ProductMatcher(logger).match(CATALOG))
+    assert {key: value for key, value in ids(second).items() if key in ids(first)} == ids(first)
+    with open(output_path, 'r', encoding='utf-8') as f:
+        assert len(f.readlines()) == len(CATALOG) + 1
@@ -0,0 +1,58 @@
+import json
+import logging
+
+import pytest
+
+from scrapers.common.phase2 import run_phase2
+
+URL = "https://tienda.test/despensa/arroz"
+
+class FakePool:
+    def close(self):
+        pass
+
+def parse_page(html, link_info):
+    """Parser de prueba: cada línea del "HTML" es un producto; las que no son números se descartan con una advertencia."""
+    products = []
+    for line in html.splitlines():
+        if line == "falla":
+            raise ValueError("página ilegible")
+        if not line.isdigit():
+            logging.getLogger("tests.pipeline").warning(f"Tarjeta sin precio en {link_info['url']}: {line}")
+            continue
+        products.append({"url_producto": f"{link_info['url']}/{line}/p", "precio_final": int(line)})
+    return products
+
+def read_jsonl(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+def run(tmp_path, logger, pages, parse_workers):
+    def scrape_category(link_info, pool, emit, pages_done):
+        for page_num, html in enumerate(pages, start=1):
+            emit(page_num, html)
+
+    return run_phase2([{"url": URL}], scrape_category, None, str(tmp_path / "productos.jsonl"), logger,
+                      pool=FakePool(), parse_page=parse_page, parse_workers=parse_workers)
+
+@pytest.mark.parametrize("parse_workers", [0, 2])
+def test_pipeline_writes_pages_in_order_and_forwards_worker_logs(tmp_path, logger, caplog, parse_workers):
+    pages = ["1\n2", "3\nsin-precio\n4", "5"]
+
+    with caplog.at_level(logging.INFO):
+        result = run(tmp_path, logger, pages, parse_workers)
+
+    assert result == (5, True)
+    assert [record["precio_final"] for record in read_jsonl(tmp_path / "productos.jsonl")] == [1, 2, 3, 4, 5]
+    # La advertencia emitida dentro del proceso de parseo llega al logger del proceso principal.
+    warnings = [record for record in caplog.records if record.name == "tests.pipeline"]
+    assert [record.getMessage() for record in warnings] == [f"Tarjeta sin precio en {URL}: sin-precio"]
+    assert "Etapa limitante del pipeline" in caplog.text
+
+@pytest.mark.parametrize("parse_workers", [0, 1])
+def test_unparsed_page_leaves_category_unfinished(tmp_path, logger, caplog, parse_workers):
+    with caplog.at_level(logging.ERROR):
+        result = run(tmp_path, logger, ["1", "falla", "3"], parse_workers)
+
+    assert result == (2, False)
+    assert "Error parseando la página 2" in caplog.text
@@ -0,0 +1,100 @@
+import json
+import logging
+
+import pytest
+
+from scrapers.common.price_events import (events_path_for, external_sort, sorted_path_for, update_price_events)
+from scrapers.common.scrape_run import ScrapeOptions, finish_run
+
+RUN_AT = "2026-01-02T03:04:05"
+
+def product(slug, price, list_price=None, discount=0, category="Despensa"):
+    return {"url_producto": f"https://tienda.test/{slug}/p", "nombre_completo": slug.replace("-", " ").title(),
+            "categoria_principal": category, "sub_categoria": "Granos", "precio_final": price,
+            "precio_sin_descuento": list_price or price, "porcentaje_descuento": discount}
+
+def write_jsonl(path, records):
+    with open(path, 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+def read_jsonl(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 4, 1000])
+def test_external_sort_merges_runs(tmp_path, chunk_size):
+    # Con tramos pequeños hay varios archivos temporales y la mezcla cruza sus límites.
+    slugs = ["mango", "arroz", "leche", "zanahoria", "cafe", "banano", "huevos", "queso", "pan", "frijol"]
+    write_jsonl(tmp_path / "productos.jsonl", [product(slug, 1000 + i) for i, slug in enumerate(slugs)])
+
+    count = external_sort(str(tmp_path / "productos.jsonl"), str(tmp_path / "ordenado.jsonl"), chunk_size=chunk_size)
+
+    records = read_jsonl(tmp_path / "ordenado.jsonl")
+    assert count == len(slugs)
+    assert [record["url_producto"] for record in records] == sorted(product(slug, 0)["url_producto"] for slug in slugs)
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["ordenado.jsonl", "productos.jsonl"]
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 1000])
+def test_external_sort_keeps_first_of_duplicate_urls(tmp_path, chunk_size):
+    # El mismo producto listado en dos categorías: se conserva el primero del archivo aunque caiga en otro tramo.
+    records = [product("arroz", 1000, category="Despensa"), product("cafe", 2000),
+               product("arroz", 1100, category="Ofertas"), {"nombre_completo": "Sin URL"},
+               product("arroz", 1200, category="Granel")]
+    write_jsonl(tmp_path / "productos.jsonl", records)
+
+    count = external_sort(str(tmp_path / "productos.jsonl"), str(tmp_path / "ordenado.jsonl"), chunk_size=chunk_size)
+
+    assert count == 2
+    assert read_jsonl(tmp_path / "ordenado.jsonl") == [records[0], records[1]]
+
+def test_consecutive_runs_produce_events(tmp_path, logger):
+    products_filepath = str(tmp_path / "productos.jsonl")
+    write_jsonl(products_filepath, [product("arroz", 1000), product("cafe", 2000), product("leche", 3000),
+                                    product("pan", 500)])
+    first = update_price_events(products_filepath, "Tienda", logger, RUN_AT, chunk_size=2)
+
+    assert first == {"cambio_precio": 0, "nuevo": 0, "retirado": 0}
+    assert not (tmp_path / "productos_eventos.jsonl").exists()
+
+    write_jsonl(products_filepath, [product("pan", 500), product("leche", 2700, list_price=3000, discount=10),
+                                    product("huevos", 9000), product("arroz", 1000)])
+    second = update_price_events(products_filepath, "Tienda", logger, "2026-01-03T03:04:05", chunk_size=2)
+
+    events = {event["url_producto"].split("/")[-2]: event for event in read_jsonl(events_path_for(products_filepath))}
+    assert second == {"cambio_precio": 1, "nuevo": 1, "retirado": 1}
+    assert set(events) == {"cafe", "huevos", "leche"}
+    assert events["cafe"]["evento"] == "retirado" and events["cafe"]["precio_final"] == 2000
+    assert events["huevos"]["evento"] == "nuevo" and events["huevos"]["precio_final"] == 9000
+    assert events["leche"]["evento"] == "cambio_precio"
+    assert events["leche"]["precio_anterior"] == 3000 and events["leche"]["precio_final"] == 2700
+    assert events["leche"]["variacion_porcentaje"] == -10.0
+    assert events["leche"]["nuevo_descuento"] is True
+    assert all(event["tienda"] == "Tienda" and event["ejecucion"] == "2026-01-03T03:04:05" for event in events.values())
+    # La copia ordenada de esta ejecución es la base de la siguiente.
+    assert [record["url_producto"].split("/")[-2] for record in read_jsonl(sorted_path_for(products_filepath))] == \
+        ["arroz", "huevos", "leche", "pan"]
+
+def test_duplicate_urls_produce_one_event(tmp_path, logger):
+    products_filepath = str(tmp_path / "productos.jsonl")
+    write_jsonl(products_filepath, [product("arroz", 1000)])
+    update_price_events(products_filepath, "Tienda", logger, RUN_AT, chunk_size=1)
+
+    write_jsonl(products_filepath, [product("arroz", 1200, category="Despensa"), product("arroz", 1200, category="Ofertas")])
+    counts = update_price_events(products_filepath, "Tienda", logger, RUN_AT, chunk_size=1)
+
+    assert counts == {"cambio_precio": 1, "nuevo": 0, "retirado": 0}
+    assert len(read_jsonl(events_path_for(products_filepath))) == 1
+
+@pytest.mark.parametrize("complete", [True, False])
+def test_finish_run_skips_events_when_phase2_incomplete(tmp_path, logger, caplog, complete):
+    products_filepath = str(tmp_path / "productos.jsonl")
+    write_jsonl(products_filepath, [product("arroz", 1000)])
+    options = ScrapeOptions(history=False, unit_prices=False, events=True)
+
+    with caplog.at_level(logging.WARNING, logger=logger.name):
+        finish_run(products_filepath, "Tienda", options, logger, "UA", 0, complete=complete)
+
+    # Sin la Fase 2 completa, la copia parcial no debe reemplazar la base de la ejecución siguiente.
+    assert (tmp_path / "productos_ordenado.jsonl").exists() is complete
+    assert ("no completó todas las categorías" in caplog.text) is not complete
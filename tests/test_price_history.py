@@ -0,0 +1,32 @@
+from scrapers.common.price_history import PriceHistory
+
+RUN_AT = "2026-01-02T03:04:05"
+
+def product(store, slug, price, category="Despensa"):
+    return {"url_producto": f"https://{store.lower()}.test/{slug}/p", "tienda": store, "categoria_principal": category,
+            "sub_categoria": "Granos", "tipo": "Arroz", "nombre_completo": slug.title(), "marca": "Marca",
+            "url_imagen": None, "precio_final": price, "precio_sin_descuento": price, "porcentaje_descuento": 0}
+
+def test_run_counts_distinct_urls(tmp_path):
+    with PriceHistory(str(tmp_path / "historial.sqlite3")) as history:
+        # El arroz aparece en dos categorías y un registro no tiene URL.
+        saved = history.record_run("Jumbo", RUN_AT, [
+            product("Jumbo", "arroz", 1000), product("Jumbo", "cafe", 2000),
+            product("Jumbo", "arroz", 1000, category="Ofertas"), dict(product("Jumbo", "pan", 500), url_producto="N/A"),
+        ])
+        # Otra tienda que inició en el mismo segundo no se suma a la ejecución de Jumbo.
+        history.record_run("Carulla", RUN_AT, [product("Carulla", "arroz", 1100)])
+
+        assert saved == 2
+        assert {run["tienda"]: run["productos"] for run in history.runs()} == {"Jumbo": 2, "Carulla": 1}
+
+def test_history_keeps_one_price_per_run(tmp_path):
+    with PriceHistory(str(tmp_path / "historial.sqlite3"), batch_size=1) as history:
+        history.record_run("Jumbo", "2026-01-01T00:00:00", [product("Jumbo", "arroz", 1000)])
+        history.record_run("Jumbo", RUN_AT, [product("Jumbo", "arroz", 1200), product("Jumbo", "arroz", 1200)])
+
+        url = product("Jumbo", "arroz", 0)["url_producto"]
+        assert [row["precio_final"] for row in history.price_history(url)] == [1000, 1200]
+        assert history.price_at(url, "2026-01-01T12:00:00")["precio_final"] == 1000
+        assert history.latest_price(url)["ultima_ejecucion"] == RUN_AT
+        assert [run["productos"] for run in history.runs("Jumbo")] == [1, 1]
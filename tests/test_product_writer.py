@@ -0,0 +1,42 @@
+import json
+
+from scrapers.common.product_writer import jsonl_to_json
+
+RECORDS = [
+    {"tienda": "Jumbo", "nombre_completo": "Arroz Diana blanco x5kg", "precio_final": 22490.0, "porcentaje_descuento": 0},
+    {"tienda": "Carulla", "nombre_completo": "Fríjol bola roja \"La Muñeca\" x 500 g", "precio_final": 6990.0,
+     "porcentaje_descuento": 10, "anidado": {"lista": [1, 2, {"a": None}], "vacio": {}}},
+    {"tienda": "Mercado Zapatoca", "nombre_completo": "ACEITE CANOLA 900 ML", "precio_final": 12900.5, "etiquetas": []},
+]
+
+def write_jsonl(path, records):
+    with open(path, 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+def expected_json(records):
+    return json.dumps(records, indent=4, ensure_ascii=False)
+
+def test_jsonl_to_json_matches_json_dump(tmp_path):
+    write_jsonl(tmp_path / "productos.jsonl", RECORDS)
+
+    count = jsonl_to_json(str(tmp_path / "productos.jsonl"), str(tmp_path / "productos.json"))
+
+    assert count == len(RECORDS)
+    assert (tmp_path / "productos.json").read_text(encoding='utf-8') == expected_json(RECORDS)
+
+def test_jsonl_to_json_empty_file(tmp_path):
+    write_jsonl(tmp_path / "productos.jsonl", [])
+
+    assert jsonl_to_json(str(tmp_path / "productos.jsonl"), str(tmp_path / "productos.json")) == 0
+    assert (tmp_path / "productos.json").read_text(encoding='utf-8') == expected_json([])
+
+def test_jsonl_to_json_applies_transform(tmp_path):
+    write_jsonl(tmp_path / "productos.jsonl", RECORDS)
+
+    def transform(batch):
+        return [dict(record, precio_final=record["precio_final"] * 2) for record in batch]
+
+    jsonl_to_json(str(tmp_path / "productos.jsonl"), str(tmp_path / "productos.json"), transform=transform)
+
+    assert (tmp_path / "productos.json").read_text(encoding='utf-8') == expected_json(transform(RECORDS))
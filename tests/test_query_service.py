@@ -0,0 +1,85 @@
+import json
+import os
+import urllib.error
+import urllib.request
+
+import pytest
+
+from scrapers.common.query_service import CatalogSnapshot, QueryService
+
+def product(store, name, brand, price, unit_price=None, category="Despensa"):
+    return {"tienda": store, "nombre_completo": name, "marca": brand, "precio_final": price,
+            "precio_por_unidad": unit_price, "categoria_principal": category, "sub_categoria": "Granos", "tipo": "Arroz",
+            "url_producto": f"https://{store.lower()}.test/{name.lower().replace(' ', '-')}/p"}
+
+PRODUCTS = [
+    product("Jumbo", "Arroz Diana Blanco 5 kg", "Diana", 22490, 4.5),
+    product("Carulla", "Arroz Diana Blanco 1 kg", "Diana", 5200, 5.2),
+    product("Zapatoca", "ARROZ ROA 1 KG", "ROA", 4900, 4.9),
+    product("Jumbo", "Café Sello Rojo 500 g", "Sello Rojo", 13900, 27.8, category="Bebidas"),
+    product("Carulla", "Café Águila Roja 500 g", "Águila Roja", 0, None, category="Bebidas"),
+]
+
+def names(products):
+    return [p["nombre_completo"] for p in products]
+
+def test_search_filters_and_sorts():
+    snapshot = CatalogSnapshot(PRODUCTS)
+
+    results, total, best = snapshot.search("arroz")
+    assert total == 3
+    assert names(results) == ["ARROZ ROA 1 KG", "Arroz Diana Blanco 1 kg", "Arroz Diana Blanco 5 kg"]
+    assert {store: p["precio_final"] for store, p in best.items()} == {"Zapatoca": 4900, "Carulla": 5200, "Jumbo": 22490}
+
+    assert names(snapshot.search("arroz", sort="precio_por_unidad", limit=1)[0]) == ["Arroz Diana Blanco 5 kg"]
+    assert names(snapshot.search("ARROZ diana", store="jumbo")[0]) == ["Arroz Diana Blanco 5 kg"]
+    assert names(snapshot.search("aguila", category="bebidas")[0]) == ["Café Águila Roja 500 g"]
+    assert snapshot.search("arroz", min_price=5000, max_price=6000)[1] == 1
+    assert snapshot.search("inexistente") == ([], 0, {})
+    with pytest.raises(ValueError):
+        snapshot.search("arroz", sort="nombre")
+
+def test_search_without_filters_uses_the_sorted_index():
+    snapshot = CatalogSnapshot(PRODUCTS)
+
+    results, total, best = snapshot.search(min_price=5000, limit=2)
+
+    # Los precios en cero o ausentes se ordenan al final y quedan fuera de cualquier rango con máximo.
+    assert total == 4
+    assert names(results) == ["Arroz Diana Blanco 1 kg", "Café Sello Rojo 500 g"]
+    assert {store: p["precio_final"] for store, p in best.items()} == {"Carulla": 5200, "Jumbo": 13900}
+    assert snapshot.search(max_price=100000)[1] == 4
+
+def write_snapshot(path, products, mtime):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(products, f, ensure_ascii=False)
+    os.utime(path, (mtime, mtime))
+
+def get(url):
+    try:
+        with urllib.request.urlopen(url, timeout=5) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+def test_service_answers_queries_and_reloads_changed_snapshots(tmp_path, logger):
+    sources = {"Jumbo": str(tmp_path / "jumbo.json"), "Carulla": str(tmp_path / "carulla.json")}
+    write_snapshot(sources["Jumbo"], [p for p in PRODUCTS if p["tienda"] == "Jumbo"], 1_000_000)
+
+    service = QueryService(logger, port=0, sources=sources, poll_interval=60).start()
+    try:
+        status, body = get(service.address + "/buscar?q=arroz&limite=5")
+        assert status == 200
+        assert body["coincidencias"] == 1 and body["resultados"][0]["tienda"] == "Jumbo"
+        assert service.reload() is False
+
+        # Terminó la ejecución de Carulla y se reescribió su exportación.
+        write_snapshot(sources["Carulla"], [p for p in PRODUCTS if p["tienda"] == "Carulla"], 1_000_100)
+        assert service.reload() is True
+        status, body = get(service.address + "/buscar?q=arroz")
+        assert set(body["mas_barato_por_tienda"]) == {"Jumbo", "Carulla"}
+        assert get(service.address + "/estado")[1]["por_tienda"] == {"Jumbo": 2, "Carulla": 2}
+        assert get(service.address + "/buscar?q=arroz&orden=nombre")[0] == 400
+        assert get(service.address + "/otra")[0] == 404
+    finally:
+        service.close()
@@ -0,0 +1,73 @@
+import threading
+
+import pytest
+
+from scrapers.common.sharding import run_sharded
+
+def run_in_thread(target, timeout=10):
+    """Ejecuta `target` en un hilo y falla la prueba si no termina en `timeout` segundos (en lugar de colgarse)."""
+    outcome = {}
+
+    def runner():
+        try:
+            outcome["result"] = target()
+        except BaseException as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=runner, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), "run_sharded no terminó"
+    return outcome
+
+def test_results_and_task_completion_are_delivered(logger):
+    pages, done = [], []
+
+    def process_task(state, task, emit):
+        for page_num in (1, 2):
+            emit(page_num, [f"{task}-{page_num}"])
+
+    completed = run_sharded(["a", "b", "c"], process_task, 2, lambda task, page_num, products: pages.append(products[0]), logger,
+                            on_task_done=done.append, max_pending=1)
+
+    assert completed == 3
+    assert sorted(pages) == ["a-1", "a-2", "b-1", "b-2", "c-1", "c-2"]
+    assert sorted(done) == ["a", "b", "c"]
+
+def test_failed_task_is_not_marked_done(logger):
+    def process_task(state, task, emit):
+        if task == "b":
+            raise RuntimeError("falla la categoría")
+        emit(1, [task])
+
+    done = []
+    completed = run_sharded(["a", "b", "c"], process_task, 2, lambda *args: None, logger, on_task_done=done.append)
+
+    assert completed == 2
+    assert sorted(done) == ["a", "c"]
+
+@pytest.mark.parametrize("failing_hook", ["on_result", "on_task_done"])
+def test_failing_consumer_stops_workers_without_hanging(failing_hook, logger):
+    torn_down = []
+    started = []
+
+    def process_task(state, task, emit):
+        started.append(task)
+        for page_num in range(1, 20):
+            emit(page_num, [task])
+
+    def fail(*args):
+        raise OSError("disco lleno")
+
+    hooks = {"on_result": lambda *args: None, "on_task_done": None}
+    hooks[failing_hook] = fail
+    outcome = run_in_thread(lambda: run_sharded(
+        list(range(50)), process_task, 3, hooks["on_result"], logger,
+        worker_setup=object, worker_teardown=torn_down.append, on_task_done=hooks["on_task_done"], max_pending=1,
+    ))
+
+    assert isinstance(outcome.get("error"), OSError)
+    # Cada worker liberó sus recursos y ninguno siguió tomando tareas.
+    assert len(torn_down) == 3
+    assert len(started) < 50
+    assert not [thread for thread in threading.enumerate() if thread.name.startswith("worker-")]
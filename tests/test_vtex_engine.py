@@ -0,0 +1,79 @@
+"""
+El motor HTTP de Jumbo y Carulla (API de catálogo de VTEX) debe producir los mismos productos que el parser del
+DOM sobre el listado equivalente: se sirve la respuesta JSON de la API desde un servidor local y se compara con el
+HTML de las tarjetas de los mismos productos.
+"""
+import json
+
+import pytest
+
+pytest.importorskip("requests")
+
+from scrapers.carulla import scraper_carulla
+from scrapers.common.vtex_http import VtexCatalogClient
+from scrapers.jumbo import scraper_jumbo
+from tests.pages import PRODUCTS, carulla_card, jumbo_card, listing, vtex_item
+
+UA = "Mozilla/5.0 (pruebas)"
+SEARCH_PATH = "/api/catalog_system/pub/products/search"
+
+def serve_catalog(site, category_path, items):
+    """Publica `items` en la API de catálogo del sitio para `category_path`, paginados con `_from` y `_to`."""
+    def search(query):
+        start, end = int(query["_from"][0]), int(query["_to"][0])
+        assert query["map"] == ["c,c,c"]
+        return "application/json", json.dumps(items[start:end + 1])
+    site.routes[SEARCH_PATH + category_path] = search
+
+def collect_http(module, site, link_info, logger):
+    client = VtexCatalogClient(site.url, UA, logger, page_size=2)
+    pages, products = [], []
+
+    def emit(page_num, page):
+        pages.append(page_num)
+        products.extend(product.to_dict() for product in page)
+
+    try:
+        module.scrape_category_http(link_info, client, logger, emit)
+    finally:
+        client.close()
+    return pages, products
+
+def test_jumbo_http_engine_matches_dom_parser(site, logger):
+    link_info = {"categoria_principal": "Supermercado", "sub_categoria": "Despensa", "item": "Arroz y granos",
+                 "url": f"{site.url}/supermercado/despensa/arroz-y-granos"}
+    serve_catalog(site, "/supermercado/despensa/arroz-y-granos",
+                  [vtex_item(product, scraper_jumbo.IMAGE_BASE_URL) for product in PRODUCTS])
+
+    pages, from_api = collect_http(scraper_jumbo, site, link_info, logger)
+    from_dom = [product.to_dict() for product in
+                scraper_jumbo._parse_product_data(listing(jumbo_card(product) for product in PRODUCTS), link_info, logger)]
+
+    assert pages == [1, 2, 3]
+    assert len(from_dom) == len(PRODUCTS)
+    assert from_api == from_dom
+
+def test_carulla_http_engine_matches_dom_parser(site, logger):
+    link_info = {"main_category": "Despensa", "sub_category": "Granos", "tipo": "Arroz",
+                 "href": f"{site.url}/despensa/granos/arroz"}
+    serve_catalog(site, "/despensa/granos/arroz",
+                  [vtex_item(product, scraper_carulla.IMAGE_BASE_URL) for product in PRODUCTS])
+
+    pages, from_api = collect_http(scraper_carulla, site, link_info, logger)
+    from_dom = [product.to_dict() for product in
+                scraper_carulla.parse_page(listing(carulla_card(product) for product in PRODUCTS), link_info, logger)]
+
+    assert pages == [1, 2, 3]
+    assert len(from_dom) == len(PRODUCTS)
+    assert any(product["porcentaje_descuento"] for product in from_dom)
+    assert from_api == from_dom
+
+@pytest.mark.parametrize("url, params", [
+    ("https://www.jumbocolombia.com/supermercado/despensa/aceite", {"map": "c,c,c"}),
+    ("https://www.jumbocolombia.com/tecnologia/televisores/samsung?map=category-1,category-2,brand", {"map": "c,c,b"}),
+    ("https://www.jumbocolombia.com/supermercado/despensa?order=OrderByPriceASC", {"map": "c,c", "O": "OrderByPriceASC"}),
+    ("https://www.jumbocolombia.com/arroz?_q=arroz&map=ft", None),
+    ("https://www.jumbocolombia.com/supermercado/despensa?map=c", None),
+])
+def test_catalog_params(url, params):
+    assert VtexCatalogClient.catalog_params(url) == params